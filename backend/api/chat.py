@@ -1,17 +1,28 @@
 import os
+import asyncio
+import hashlib
 import httpx
 import json
+import logging
 import redis
+import redis.asyncio as aioredis
+import time
 import uuid
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
+from database import db
+from n8n_client import n8n_client, CircuitOpenError, N8N_URL
 
-router = APIRouter(prefix="/chat", tags=["chat"])
+logger = logging.getLogger(__name__)
 
-# Get n8n URL from environment or use default
-N8N_URL = os.getenv("N8N_URL", "http://n8n:5678")
+router = APIRouter(prefix="/chat", tags=["chat"])
 
 def translate_resume_url(public_url: str) -> str:
     """
@@ -40,15 +51,614 @@ def translate_resume_url(public_url: str) -> str:
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "n8n_password")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "2"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+# Shared by every chat request; created at application startup.
+# Async, so a slow Redis round trip never blocks the event loop for other requests.
+redis_pool: Optional[aioredis.ConnectionPool] = None
+
+def init_redis_pool() -> aioredis.ConnectionPool:
+    """
+    Create the shared Redis connection pool (idempotent; connects lazily).
+    
+    A blocking pool makes requests wait up to REDIS_POOL_TIMEOUT for a free
+    connection instead of failing when all REDIS_MAX_CONNECTIONS are in use.
+    """
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = aioredis.BlockingConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+        )
+    return redis_pool
+
+async def close_redis_pool():
+    """Disconnect every pooled Redis connection (application shutdown)"""
+    global redis_pool
+    if redis_pool is not None:
+        await redis_pool.disconnect()
+        redis_pool = None
+
+def get_redis_client() -> aioredis.Redis:
+    """Get an async Redis client backed by the shared connection pool"""
+    return aioredis.Redis(connection_pool=init_redis_pool())
+
+# Deletes a lock only if it still holds the caller's token, so a holder whose
+# lock expired never releases the next holder's
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+@asynccontextmanager
+async def redis_lock(r: aioredis.Redis, key: str, ttl_ms: int):
+    """SET NX PX lock shared by all backend workers; yields whether it was acquired"""
+    token = uuid.uuid4().hex
+    acquired = await r.set(key, token, nx=True, px=ttl_ms)
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            await r.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+# Sorted set of session ids scored by session start time (epoch seconds), so the
+# sessions list is a range query instead of a KEYS scan of the whole keyspace
+SESSION_INDEX_KEY = "chat_session_index"
+SESSION_INDEX_RECONCILE_SECONDS = int(os.getenv("CHAT_SESSION_INDEX_RECONCILE_SECONDS", "300"))
+SESSIONS_PAGE_SIZE = int(os.getenv("CHAT_SESSIONS_PAGE_SIZE", "50"))
+MESSAGES_PAGE_SIZE = int(os.getenv("CHAT_MESSAGES_PAGE_SIZE", "50"))
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+def session_score(session_id: str) -> Optional[float]:
+    """Epoch seconds of an ISO 8601 session id, or None if it is not a session id"""
+    try:
+        started = datetime.fromisoformat(session_id)
+    except ValueError:
+        return None
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    return started.timestamp()
+
+async def index_session(r: aioredis.Redis, session_id: str):
+    """Add a session to the session index; never changes the score of an indexed session"""
+    score = session_score(session_id)
+    await r.zadd(SESSION_INDEX_KEY, {session_id: score if score is not None else time.time()}, nx=True)
+
+async def reconcile_session_index() -> int:
+    """
+    Index session lists that were written without going through this API
+    (e.g. directly by n8n). Uses SCAN, so Redis is never blocked.
+    """
+    r = get_redis_client()
+    added = 0
+    batch = {}
+    async for key in r.scan_iter(match="*", count=1000, _type="list"):
+        score = session_score(key)
+        if score is None:
+            continue
+        batch[key] = score
+        if len(batch) >= 500:
+            added += await r.zadd(SESSION_INDEX_KEY, batch, nx=True)
+            batch = {}
+    if batch:
+        added += await r.zadd(SESSION_INDEX_KEY, batch, nx=True)
+    if added:
+        logger.info(f"Added {added} chat sessions to the session index")
+    return added
+
+async def _reconcile_periodically():
+    while True:
+        try:
+            await reconcile_session_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to reconcile chat session index: {e}")
+        await asyncio.sleep(SESSION_INDEX_RECONCILE_SECONDS)
+
+def start_session_index_maintenance():
+    """Reconcile the session index now and then every CHAT_SESSION_INDEX_RECONCILE_SECONDS (0: once)"""
+    global _reconcile_task
+    if SESSION_INDEX_RECONCILE_SECONDS > 0:
+        _reconcile_task = asyncio.create_task(_reconcile_periodically())
+    else:
+        _reconcile_task = asyncio.create_task(reconcile_session_index())
+
+async def stop_session_index_maintenance():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
+
+def session_summary_key(session_id: str) -> str:
+    return f"chat_session_summary:{session_id}"
+
+def _truncate_preview(text: str) -> str:
+    return text[:100] + "..." if len(text) > 100 else text
+
+def message_preview(msg_raw: Optional[str]) -> str:
+    """Sidebar preview text of one raw n8n chat memory message"""
+    if not msg_raw:
+        return ""
+    try:
+        msg = json.loads(msg_raw)
+        if msg.get("type") == "ai":
+            # Parse AI message content
+            content_data = json.loads(msg["data"]["content"])
+            return _truncate_preview(content_data.get("direct_response_to_user", ""))
+        # Extract user input from human message
+        lines = msg["data"]["content"].split('\n')
+        user_line = next((line for line in lines if line.startswith("User's Most Recent Chat Input:")), "")
+        return _truncate_preview(user_line.replace("User's Most Recent Chat Input: ", ""))
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return "Unable to preview message"
+
+async def update_session_summary(r: aioredis.Redis, session_id: str, **fields):
+    """
+    Update fields of a session's summary hash
+    (messageCount, lastMessage, lastActivity, description).
+    """
+    if "lastMessage" in fields:
+        fields["lastMessage"] = _truncate_preview(fields["lastMessage"])
+    await r.hset(session_summary_key(session_id), mapping=fields)
+
+async def refresh_session_summaries(r: aioredis.Redis, session_ids: List[str],
+                                    previous: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """
+    Rebuild summaries from the message lists, for sessions that are new to the
+    summary store or that n8n appended to without going through this API.
+    Only the newest message is read (chat memory is LPUSHed, so it is index 0).
+    """
+    async with r.pipeline(transaction=False) as pipe:
+        for session_id in session_ids:
+            pipe.llen(session_id)
+            pipe.lindex(session_id, 0)
+        results = await pipe.execute()
+
+    now = datetime.now(timezone.utc).isoformat()
+    summaries = {}
+    async with r.pipeline(transaction=False) as pipe:
+        for i, session_id in enumerate(session_ids):
+            message_count, newest_raw = results[2 * i], results[2 * i + 1]
+            if message_count == 0:
+                continue
+            summary = dict(previous.get(session_id) or {})
+            summary.update({
+                "messageCount": str(message_count),
+                "lastMessage": message_preview(newest_raw),
+                # Without a previous summary the best estimate of activity is the session start
+                "lastActivity": now if summary else session_id,
+            })
+            summaries[session_id] = summary
+            pipe.hset(session_summary_key(session_id), mapping=summary)
+        await pipe.execute()
+    return summaries
+
+# Sessions idle for CHAT_ARCHIVE_IDLE_DAYS are moved out of Redis into the
+# chat_session_archive table and put back into Redis the first time they are used.
+# The index entry, summary and description stay in Redis, so the sessions list
+# does not need Postgres.
+CHAT_ARCHIVE_IDLE_DAYS = float(os.getenv("CHAT_ARCHIVE_IDLE_DAYS", "30"))
+CHAT_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("CHAT_ARCHIVE_INTERVAL_SECONDS", "86400"))
+# Every worker runs the archiver, and POST /chat/archive can overlap it; a
+# per-session lock lets one of them archive a given session at a time
+CHAT_ARCHIVE_LOCK_MS = 300_000
+
+_archive_task: Optional[asyncio.Task] = None
+last_archive_report: Optional[Dict[str, Any]] = None
+
+def _idle_seconds(summary: Dict[str, str], now: float) -> float:
+    """
+    Time since the session's last recorded activity. Redis' OBJECT IDLETIME
+    is no use here: it counts reads too, and the session listing and the
+    search sweep read every list.
+    """
+    last_activity = session_score(summary.get("lastActivity") or "")
+    return now - last_activity if last_activity is not None else 0.0
+
+async def _archive_session(r: aioredis.Redis, session_id: str, description: Optional[str],
+                           summary: Dict[str, str]) -> Optional[Dict[str, int]]:
+    """
+    Copy one session list into Postgres and drop it from Redis; None if it
+    changed meanwhile or another worker is archiving it
+    """
+    async with redis_lock(r, f"chat_archive_lock:{session_id}", CHAT_ARCHIVE_LOCK_MS) as locked:
+        if not locked:
+            return None
+        return await _archive_locked_session(r, session_id, description, summary)
+
+async def _archive_locked_session(r: aioredis.Redis, session_id: str, description: Optional[str],
+                                  summary: Dict[str, str]) -> Optional[Dict[str, int]]:
+    # Archived messages stay searchable
+    await index_session_messages(r, session_id)
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.lrange(session_id, 0, -1)
+        pipe.memory_usage(session_id)
+        messages, redis_bytes = await pipe.execute()
+    if not messages:
+        return None
+    
+    # A row left by a rehydration that lost to a list n8n created meanwhile
+    # holds the older history; it goes behind the current messages
+    rows = await asyncio.to_thread(
+        db.execute_query, "SELECT messages, archived_at FROM chat_session_archive WHERE session_id = %s", (session_id,)
+    )
+    earlier = json.loads(zlib.decompress(bytes(rows[0]["messages"]))) if rows else []
+    
+    compressed = zlib.compress(json.dumps(messages + earlier).encode(), 9)
+    last_activity = summary.get("lastActivity") or session_id
+    query = """
+    INSERT INTO chat_session_archive (session_id, description, message_count, messages, redis_bytes, last_activity)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (session_id) DO UPDATE SET
+        description = EXCLUDED.description, message_count = EXCLUDED.message_count,
+        messages = EXCLUDED.messages, redis_bytes = EXCLUDED.redis_bytes,
+        last_activity = EXCLUDED.last_activity, archived_at = CURRENT_TIMESTAMP
+    RETURNING archived_at
+    """
+    # archived_at identifies this write, so a failed archive only undoes its own row
+    written_at = (await asyncio.to_thread(
+        _write_archive_row, query,
+        (session_id, description, len(messages) + len(earlier), compressed, redis_bytes,
+         last_activity if session_score(last_activity) is not None else None)
+    ))["archived_at"]
+    
+    # Only drop the list if no message was added while it was being copied
+    async with r.pipeline(transaction=True) as pipe:
+        try:
+            await pipe.watch(session_id)
+            current_length = await pipe.llen(session_id)
+            if current_length == 0:
+                # Deleted or archived by someone else: the row may be the only copy
+                return None
+            if current_length != len(messages):
+                raise redis.WatchError(session_id)
+            pipe.multi()
+            pipe.delete(session_id)
+            pipe.hset(session_summary_key(session_id), mapping={
+                "archived": "1",
+                "messageCount": str(len(messages) + len(earlier)),
+                "lastMessage": summary.get("lastMessage") or message_preview(messages[0]),
+                "lastActivity": last_activity
+            })
+            await pipe.execute()
+        except redis.WatchError:
+            if earlier:
+                # Put the older history back the way it was
+                await asyncio.to_thread(
+                    db.execute_update,
+                    """
+                    UPDATE chat_session_archive SET messages = %s, message_count = %s, archived_at = %s
+                    WHERE session_id = %s AND archived_at = %s
+                    """,
+                    (bytes(rows[0]["messages"]), len(earlier), rows[0]["archived_at"], session_id, written_at)
+                )
+            else:
+                await asyncio.to_thread(
+                    db.execute_delete,
+                    "DELETE FROM chat_session_archive WHERE session_id = %s AND archived_at = %s",
+                    (session_id, written_at)
+                )
+            return None
+    return {"messages": len(messages), "redisBytes": redis_bytes or 0, "compressedBytes": len(compressed)}
+
+def _write_archive_row(query: str, params: tuple) -> Dict[str, Any]:
+    with db.transaction() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchone()
+
+async def archive_idle_sessions(idle_days: float = CHAT_ARCHIVE_IDLE_DAYS) -> Dict[str, Any]:
+    """Move every session idle for more than idle_days into Postgres and report the memory reclaimed"""
+    global last_archive_report
+    r = get_redis_client()
+    now = time.time()
+    cutoff = now - idle_days * 86400
+    report = {
+        "idleDays": idle_days,
+        "startedAt": datetime.now(timezone.utc).isoformat(),
+        "candidates": 0,
+        "archived": 0,
+        "skipped": 0,
+        "messages": 0,
+        "bytesReclaimed": 0,
+        "compressedBytes": 0,
+    }
+    
+    # A session that started after the cutoff cannot have been idle that long
+    candidates = await r.zrangebyscore(SESSION_INDEX_KEY, "-inf", cutoff)
+    for start in range(0, len(candidates), 100):
+        session_ids = candidates[start:start + 100]
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hmget("chat_descriptions", session_ids)
+            for session_id in session_ids:
+                pipe.hgetall(session_summary_key(session_id))
+                pipe.llen(session_id)
+            results = await pipe.execute()
+        descriptions = results[0]
+        summaries = {session_id: results[1 + 2 * i] for i, session_id in enumerate(session_ids)}
+        lengths = {session_id: results[2 + 2 * i] for i, session_id in enumerate(session_ids)}
+        
+        # A summary whose message count is behind the list missed messages n8n
+        # wrote directly; refreshing it records that activity as of now
+        stale = [
+            session_id for session_id in session_ids
+            if lengths[session_id] and (
+                not summaries[session_id].get("lastActivity")
+                or summaries[session_id].get("messageCount") != str(lengths[session_id])
+            )
+        ]
+        if stale:
+            summaries.update(await refresh_session_summaries(r, stale, summaries))
+        
+        for i, session_id in enumerate(session_ids):
+            if not lengths[session_id]:
+                continue  # already archived or deleted
+            report["candidates"] += 1
+            summary = summaries[session_id]
+            if _idle_seconds(summary, now) < idle_days * 86400:
+                continue
+            try:
+                archived = await _archive_session(r, session_id, descriptions[i], summary)
+            except Exception as e:
+                logger.error(f"Failed to archive chat session {session_id}: {e}")
+                archived = None
+            if archived is None:
+                report["skipped"] += 1
+                continue
+            report["archived"] += 1
+            report["messages"] += archived["messages"]
+            report["bytesReclaimed"] += archived["redisBytes"]
+            report["compressedBytes"] += archived["compressedBytes"]
+    
+    report["finishedAt"] = datetime.now(timezone.utc).isoformat()
+    if report["archived"]:
+        logger.info(
+            f"Archived {report['archived']} idle chat sessions ({report['messages']} messages), "
+            f"reclaimed {report['bytesReclaimed'] / 1_000_000:.1f} MB of Redis memory"
+        )
+    last_archive_report = report
+    return report
 
-def get_redis_client():
-    """Get a Redis client connection"""
-    return redis.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        password=REDIS_PASSWORD,
-        decode_responses=True
+async def rehydrate_session(r: aioredis.Redis, session_id: str) -> bool:
+    """Put an archived session back into Redis; False if it is not archived"""
+    if await r.exists(session_id):
+        return False
+    rows = await asyncio.to_thread(
+        db.execute_query, "SELECT messages FROM chat_session_archive WHERE session_id = %s", (session_id,)
     )
+    if not rows:
+        return False
+    messages = json.loads(zlib.decompress(bytes(rows[0]["messages"])))
+    
+    # Built under a temporary key and renamed, so a concurrent rehydration
+    # (or a list n8n created meanwhile) is never appended to
+    temp_key = f"chat_session_rehydrate:{session_id}:{uuid.uuid4().hex}"
+    async with r.pipeline(transaction=True) as pipe:
+        for start in range(0, len(messages), 1000):
+            pipe.rpush(temp_key, *messages[start:start + 1000])
+        pipe.renamenx(temp_key, session_id)
+        pipe.delete(temp_key)
+        pipe.hdel(session_summary_key(session_id), "archived")
+        results = await pipe.execute()
+    
+    if not results[-3]:
+        # The list was recreated meanwhile (by n8n, or by a concurrent
+        # rehydration that then deletes the row itself). Keep the archived
+        # history; archiving the session again merges it back in.
+        logger.warning(f"Chat session {session_id} was recreated before it could be rehydrated")
+        return False
+    await asyncio.to_thread(
+        db.execute_delete, "DELETE FROM chat_session_archive WHERE session_id = %s", (session_id,)
+    )
+    logger.info(f"Rehydrated archived chat session {session_id} ({len(messages)} messages)")
+    return True
+
+async def _ensure_session_in_redis(session_id: Optional[str]):
+    """Rehydrate an archived session before n8n reads its memory"""
+    if not session_id:
+        return
+    try:
+        await rehydrate_session(get_redis_client(), session_id)
+    except Exception as e:
+        logger.warning(f"Failed to rehydrate chat session {session_id}: {e}")
+
+async def _archive_periodically():
+    while True:
+        await asyncio.sleep(CHAT_ARCHIVE_INTERVAL_SECONDS)
+        try:
+            await archive_idle_sessions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to archive idle chat sessions: {e}")
+
+def start_chat_archiver():
+    """Archive idle sessions every CHAT_ARCHIVE_INTERVAL_SECONDS (0: only on demand)"""
+    global _archive_task
+    if CHAT_ARCHIVE_INTERVAL_SECONDS > 0:
+        _archive_task = asyncio.create_task(_archive_periodically())
+
+async def stop_chat_archiver():
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        await asyncio.gather(_archive_task, return_exceptions=True)
+        _archive_task = None
+
+# Full-text search over chat history. A background indexer copies the displayed
+# text of new messages (user input via parse_user_message, agent replies) into
+# the chat_message_search table; the summary field searchIndexed is how many
+# messages of the session have been indexed.
+CHAT_SEARCH_SYNC_SECONDS = int(os.getenv("CHAT_SEARCH_SYNC_SECONDS", "300"))
+CHAT_SEARCH_QUEUE_SIZE = int(os.getenv("CHAT_SEARCH_QUEUE_SIZE", "10000"))
+
+_search_queue: Optional[asyncio.Queue] = None
+_search_pending: set = set()
+_search_tasks: List[asyncio.Task] = []
+search_messages_indexed = 0
+
+def _store_search_rows(session_id: str, rows: List[tuple], reset: bool):
+    # db.transaction() opens a connection per call, so the indexer threads and
+    # archiving never share one mid-transaction
+    with db.transaction() as cursor:
+        if reset:
+            cursor.execute("DELETE FROM chat_message_search WHERE session_id = %s", (session_id,))
+        cursor.executemany(
+            """
+            INSERT INTO chat_message_search (session_id, message_offset, role, content)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (session_id, message_offset) DO NOTHING
+            """,
+            rows
+        )
+
+async def index_session_messages(r: aioredis.Redis, session_id: str) -> int:
+    """Add the messages of a session that are not searchable yet; returns how many were added"""
+    global search_messages_indexed
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.llen(session_id)
+        pipe.hget(session_summary_key(session_id), "searchIndexed")
+        total, indexed = await pipe.execute()
+    indexed = int(indexed or 0)
+    if total == 0 or total == indexed:
+        # Nothing new; an archived session keeps its rows
+        return 0
+    reset = total < indexed
+    if reset:
+        # The list was trimmed or replaced; index it again from the start
+        indexed = 0
+    
+    # Chronological offset p is list index -(p + 1), so offsets indexed.. are
+    # 0..-(indexed + 1) even if n8n pushes a message in between
+    raw = await r.lrange(session_id, 0, -(indexed + 1))
+    raw.reverse()
+    rows = []
+    for i, msg_raw in enumerate(raw):
+        message = _format_message(msg_raw, indexed + i, session_id)
+        if message and message["content"]:
+            rows.append((session_id, message["offset"], message["role"], message["content"]))
+    
+    await asyncio.to_thread(_store_search_rows, session_id, rows, reset)
+    await r.hset(session_summary_key(session_id), "searchIndexed", indexed + len(raw))
+    search_messages_indexed += len(rows)
+    return len(rows)
+
+def schedule_search_indexing(session_id: str):
+    """Queue a session for the search indexer; never blocks"""
+    if _search_queue is None or session_id in _search_pending:
+        return
+    try:
+        _search_queue.put_nowait(session_id)
+        _search_pending.add(session_id)
+    except asyncio.QueueFull:
+        pass  # the next sweep picks it up
+
+async def sweep_search_index() -> int:
+    """Queue every session with messages that are not indexed yet (covers n8n writing directly)"""
+    r = get_redis_client()
+    queued = 0
+    start = 0
+    while True:
+        session_ids = await r.zrange(SESSION_INDEX_KEY, start, start + 499)
+        if not session_ids:
+            break
+        async with r.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.llen(session_id)
+                pipe.hget(session_summary_key(session_id), "searchIndexed")
+            results = await pipe.execute()
+        for i, session_id in enumerate(session_ids):
+            total, indexed = results[2 * i], int(results[2 * i + 1] or 0)
+            if total and total != indexed:
+                schedule_search_indexing(session_id)
+                queued += 1
+        start += len(session_ids)
+    return queued
+
+async def _search_index_worker():
+    r = get_redis_client()
+    while True:
+        session_id = await _search_queue.get()
+        _search_pending.discard(session_id)
+        try:
+            await index_session_messages(r, session_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to index chat session {session_id} for search: {e}")
+        finally:
+            _search_queue.task_done()
+
+async def _sweep_search_index_periodically():
+    while True:
+        try:
+            queued = await sweep_search_index()
+            if queued:
+                logger.info(f"Queued {queued} chat sessions for search indexing")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to sweep chat search index: {e}")
+        if CHAT_SEARCH_SYNC_SECONDS <= 0:
+            return
+        await asyncio.sleep(CHAT_SEARCH_SYNC_SECONDS)
+
+def start_chat_search_indexer():
+    """Index new messages after every turn, and sweep all sessions now and every CHAT_SEARCH_SYNC_SECONDS (0: once)"""
+    global _search_queue, _search_tasks
+    _search_queue = asyncio.Queue(maxsize=CHAT_SEARCH_QUEUE_SIZE)
+    _search_tasks = [
+        asyncio.create_task(_search_index_worker()),
+        asyncio.create_task(_sweep_search_index_periodically())
+    ]
+
+async def stop_chat_search_indexer():
+    global _search_queue, _search_tasks
+    for task in _search_tasks:
+        task.cancel()
+    await asyncio.gather(*_search_tasks, return_exceptions=True)
+    _search_tasks = []
+    _search_queue = None
+    _search_pending.clear()
+
+# n8n human-message envelope. Markers are located with str.find, which scans in
+# C and stops at the first hit, so a message is never split into lines and the
+# common case (input on the first "User's Most Recent Chat Input:" line) only
+# looks at that line however much project context follows.
+USER_INPUT_PREFIX = "User's Most Recent Chat Input:"
+USER_INPUT_UNAVAILABLE = "(User input not available)"
+PLACEHOLDER_TEXT = "[object Object]"
+
+def _marker_lines(content: str, marker: str, start: int = 0):
+    """(line_start, line_end) of each line containing marker, from start on"""
+    pos = content.find(marker, start)
+    while pos != -1:
+        line_start = content.rfind("\n", 0, pos) + 1
+        line_end = content.find("\n", pos)
+        if line_end == -1:
+            line_end = len(content)
+        yield line_start, line_end
+        pos = content.find(marker, line_end)
+
+def _text_before(content: str, line_start: int) -> Optional[str]:
+    """Everything before the line starting at line_start, unless it is empty or a placeholder"""
+    text = content[:line_start - 1].strip()
+    return text if text and text != PLACEHOLDER_TEXT else None
 
 def parse_user_message(content: str) -> str:
     """
@@ -62,69 +672,64 @@ def parse_user_message(content: str) -> str:
     Returns the actual user input or a fallback message.
     """
     # Handle empty or null content
-    if not content or content.strip() == "":
-        return "(User input not available)"
+    if not content or content.isspace():
+        return USER_INPUT_UNAVAILABLE
     
-    lines = content.split('\n')
+    # Pattern 1: the first line starting with "User's Most Recent Chat Input:"
+    for line_start, line_end in _marker_lines(content, USER_INPUT_PREFIX):
+        if not content.startswith(USER_INPUT_PREFIX, line_start):
+            continue
+        user_input = content[line_start + len(USER_INPUT_PREFIX):line_end].replace(USER_INPUT_PREFIX, "").strip()
+        if user_input:
+            return user_input
+        
+        # Otherwise the lines between the prefix and the next "---" separator
+        for separator_start, separator_end in _marker_lines(content, "---", line_end):
+            if content[separator_start:separator_end].strip() == "---":
+                user_content = content[line_end + 1:separator_start - 1].strip()
+                return user_content if user_content else USER_INPUT_UNAVAILABLE
+        
+        # If no separator found, the next non-empty line if it exists
+        pos = line_end + 1
+        while pos < len(content):
+            next_end = content.find("\n", pos)
+            if next_end == -1:
+                next_end = len(content)
+            line = content[pos:next_end].strip()
+            if line:
+                return line
+            pos = next_end + 1
+        break
     
-    # Pattern 1: Look for "User's Most Recent Chat Input:" prefix
-    for i, line in enumerate(lines):
-        if line.startswith("User's Most Recent Chat Input:"):
-            # Extract everything after the prefix
-            user_input = line.replace("User's Most Recent Chat Input:", "").strip()
-            
-            # If there's content on the same line after the prefix, use it
-            if user_input:
-                return user_input
-            
-            # Otherwise, look for content between this line and the "---" separator
-            for j in range(i + 1, len(lines)):
-                if lines[j].strip() == "---":
-                    # Join the lines from after the prefix to before the separator
-                    user_content = '\n'.join(lines[i + 1:j]).strip()
-                    return user_content if user_content else "(User input not available)"
-            
-            # If no separator found, return the next non-empty line if it exists
-            for j in range(i + 1, len(lines)):
-                if lines[j].strip():
-                    return lines[j].strip()
-    
-    # Pattern 2: Look for content before "======" separator
-    for i, line in enumerate(lines):
-        if line.strip() == "======" and i > 0:
-            # The user input is everything before this separator
-            user_content = '\n'.join(lines[:i]).strip()
-            if user_content and user_content not in ["[object Object]"]:
+    # Pattern 2: content before a "======" separator (not on the first line)
+    for line_start, line_end in _marker_lines(content, "======"):
+        if line_start > 0 and content[line_start:line_end].strip() == "======":
+            user_content = _text_before(content, line_start)
+            if user_content:
                 return user_content
     
-    # Pattern 3: Check if content is just placeholder text
-    if content.strip() in ["[object Object]", "\n\nCurrent Project's Context Data: \n[object Object]\n\nCurrent Project's Goals Data:\n[object Object]"]:
-        return "(User input not available)"
-    
-    # Pattern 4: If content contains JSON-like structures, try to extract just the user part
-    # Check for patterns like "Current Project's Context Data:" and extract what comes before
-    for i, line in enumerate(lines):
-        if "Current Project's" in line and "Data:" in line and i > 0:
-            # User input is likely everything before this line
-            user_content = '\n'.join(lines[:i]).strip()
-            if user_content and user_content not in ["[object Object]"]:
+    # Pattern 3: content that is just placeholder text
+    stripped = content.strip()
+    if stripped == PLACEHOLDER_TEXT:
+        return USER_INPUT_UNAVAILABLE
+    
+    # Pattern 4: content before the "Current Project's ... Data:" context
+    for line_start, line_end in _marker_lines(content, "Current Project's"):
+        if line_start > 0 and "Data:" in content[line_start:line_end]:
+            user_content = _text_before(content, line_start)
+            if user_content:
                 return user_content
     
-    # Pattern 5: Handle the case where the content is just a simple user input
-    # without any special prefixes or separators
-    if content.strip() and len(content.strip()) < 200:  # Reasonable length for user input
-        # Check if it looks like a user message (not JSON or technical data)
-        if not any(char in content.strip() for char in ['{', '}', '[', ']']):
-            return content.strip()
+    # Pattern 5: a short plain message without JSON-like data
+    if len(stripped) < 200 and not any(char in stripped for char in "{}[]"):
+        return stripped
     
-    # If all else fails, return the content if it's not a placeholder
-    if content.strip() and content.strip() not in ["[object Object]"]:
-        # Return just the first line if it's a long message
-        first_line = lines[0].strip()
-        if first_line and len(first_line) < 100:  # Reasonable length for user input
-            return first_line
+    # If all else fails, the first line if it is short enough to be user input
+    first_line = content.partition("\n")[0].strip()
+    if first_line and len(first_line) < 100:
+        return first_line
     
-    return "(User input not available)"
+    return USER_INPUT_UNAVAILABLE
 
 class ChatRequest(BaseModel):
     """Request model for chat - can be used for both initial and resume requests"""
@@ -145,21 +750,327 @@ class ChatSession(BaseModel):
     lastMessage: str
     messageCount: int
     timestamp: str
+    lastActivity: Optional[str] = None
+    archived: bool = False  # messages moved to Postgres; restored on first use
 
 class RestoreConversationRequest(BaseModel):
     """Request model for restoring a conversation"""
     sessionId: str
+    limit: Optional[int] = Field(None, ge=1)  # newest N messages; all when omitted
 
 class RestoreConversationResponse(BaseModel):
     """Response model for restored conversation"""
     messages: List[Dict[str, Any]]
     sessionId: str
+    totalMessages: int
+    oldestOffset: int  # chronological offset of the oldest message in this window
+    hasMore: bool
 
 class AddDescriptionRequest(BaseModel):
     """Request model for adding a chat description"""
     sessionId: str
     description: str
 
+def _n8n_target(request: ChatRequest):
+    """Webhook URL and payload for a chat turn, based on the session state"""
+    # Determine which endpoint and payload to use based on session state
+    if request.sessionId is None:
+        # Case 1: New chat session (no sessionId)
+        print(f"[DEBUG] Starting new chat session")
+        webhook_url = f"{N8N_URL}/n8n/project-planner"
+        payload = {}  # Empty body for initial request
+        
+    elif request.resumeUrl:
+        # Case 2: Active session continuation (sessionId + resumeUrl)
+        # Use the webhook-waiting URL to continue the current workflow execution
+        print(f"[DEBUG] Continuing active session {request.sessionId} via resumeUrl")
+        webhook_url = translate_resume_url(request.resumeUrl)
+        payload = {
+            "sessionId": request.sessionId,
+            "chatInput": request.chatInput
+        }
+        
+    else:
+        # Case 3: Restored session (sessionId but no resumeUrl)
+        # Send to project-planner with sessionId to restore from Redis
+        print(f"[DEBUG] Restoring conversation for session {request.sessionId}")
+        webhook_url = f"{N8N_URL}/n8n/project-planner"
+        payload = {
+            "sessionId": request.sessionId,
+            "chatInput": request.chatInput
+        }
+    
+    return webhook_url, payload
+
+def _n8n_unavailable(e: CircuitOpenError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def _check_n8n_available():
+    """Fail fast with a 503 while the n8n circuit breaker is open"""
+    try:
+        n8n_client.breaker.check()
+    except CircuitOpenError as e:
+        raise _n8n_unavailable(e)
+
+# Admission control for chat turns: one turn per session reaches n8n at a time,
+# and at most CHAT_MAX_CONCURRENT_TURNS n8n calls run at once. Turns beyond
+# that wait in a bounded queue; when it is full the request gets a 429.
+# The state is kept in Redis so the limits hold across all backend workers.
+CHAT_MAX_CONCURRENT_TURNS = int(os.getenv("CHAT_MAX_CONCURRENT_TURNS", "32"))
+CHAT_MAX_WAITING_TURNS = int(os.getenv("CHAT_MAX_WAITING_TURNS", "64"))
+CHAT_MAX_WAITING_PER_SESSION = int(os.getenv("CHAT_MAX_WAITING_PER_SESSION", "2"))
+CHAT_RETRY_AFTER_SECONDS = int(os.getenv("CHAT_RETRY_AFTER_SECONDS", "5"))
+# Every slot, lock and queue entry is a lease renewed while its turn is alive,
+# so a crashed worker's entries expire instead of blocking the others forever
+CHAT_ADMISSION_LEASE_SECONDS = float(os.getenv("CHAT_ADMISSION_LEASE_SECONDS", "30"))
+CHAT_ADMISSION_POLL_SECONDS = float(os.getenv("CHAT_ADMISSION_POLL_SECONDS", "0.1"))
+
+ADMISSION_ACTIVE_KEY = "chat_admission:active"
+ADMISSION_WAITING_KEY = "chat_admission:waiting"
+
+def admission_turns_key(session_key: str) -> str:
+    """Running and waiting turns of one session, as leases scored by expiry"""
+    return f"chat_admission:turns:{session_key}"
+
+def admission_lock_key(session_key: str) -> str:
+    return f"chat_admission:lock:{session_key}"
+
+# Queues a turn as waiting (KEYS[2]) and under its session (optional KEYS[3]).
+# With ARGV[7] = 1 it first refuses: 1 if the global queue is full, 2 if the
+# session's queue is full. Checking and queueing in one script keeps a burst
+# of requests on several workers from all passing the check at once.
+ENQUEUE_TURN_SCRIPT = """
+for i = 1, #KEYS do
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', ARGV[1])
+end
+if ARGV[7] == '1' then
+    if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+        return 1
+    end
+    if KEYS[3] and redis.call('ZCARD', KEYS[3]) > tonumber(ARGV[5]) then
+        return 2
+    end
+end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[6])
+if KEYS[3] then
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[6])
+    redis.call('PEXPIRE', KEYS[3], ARGV[8])
+end
+return 0
+"""
+
+# Moves a turn from the waiting set (KEYS[2]) to the active set (KEYS[1]) if
+# fewer than the limit are active. Both hold leases scored by expiry; expired
+# ones are dropped first.
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    redis.call('ZREM', KEYS[2], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+# Extends a lock only if it still holds the caller's token
+RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+def _session_key(request: ChatRequest) -> Optional[str]:
+    """Turns with the same key are serialized; a new session has none yet"""
+    return request.sessionId or request.resumeUrl
+
+class ChatAdmission:
+    """Per-session Redis locks plus a shared slot count with a bounded wait queue"""
+
+    def __init__(self, max_concurrent: int, max_waiting: int, max_waiting_per_session: int,
+                 lease_seconds: float = CHAT_ADMISSION_LEASE_SECONDS,
+                 poll_seconds: float = CHAT_ADMISSION_POLL_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_waiting_per_session = max_waiting_per_session
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        # Turns of this worker; the shared counts are read from Redis
+        self.active = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+    async def _live_count(self, r: aioredis.Redis, key: str) -> int:
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, "-inf", time.time())
+            pipe.zcard(key)
+            return (await pipe.execute())[1]
+
+    def _reject(self, detail: str) -> HTTPException:
+        self.rejected_total += 1
+        return HTTPException(
+            status_code=429, detail=detail, headers={"Retry-After": str(CHAT_RETRY_AFTER_SECONDS)}
+        )
+
+    async def check(self, session_key: Optional[str]):
+        """Raise a 429 if a turn for this session could not be queued right now"""
+        r = get_redis_client()
+        if (await self._live_count(r, ADMISSION_WAITING_KEY) >= self.max_waiting
+                and await self._live_count(r, ADMISSION_ACTIVE_KEY) >= self.max_concurrent):
+            raise self._reject("Too many chat requests in progress, please retry shortly")
+        if session_key and await self._live_count(r, admission_turns_key(session_key)) > self.max_waiting_per_session:
+            raise self._reject("This conversation already has requests in progress")
+
+    async def _renew_leases(self, r: aioredis.Redis, token: str, session_key: Optional[str], held: Dict[str, bool]):
+        """Keep this turn's leases alive until it finishes"""
+        lease_ms = int(self.lease_seconds * 1000)
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            expires = time.time() + self.lease_seconds
+            try:
+                async with r.pipeline(transaction=False) as pipe:
+                    pipe.zadd(ADMISSION_ACTIVE_KEY if held["slot"] else ADMISSION_WAITING_KEY, {token: expires}, xx=True)
+                    if session_key:
+                        pipe.zadd(admission_turns_key(session_key), {token: expires}, xx=True)
+                        pipe.pexpire(admission_turns_key(session_key), lease_ms)
+                        if held["lock"]:
+                            pipe.eval(RENEW_LOCK_SCRIPT, 1, admission_lock_key(session_key), token, lease_ms)
+                    await pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Failed to renew chat admission leases: {e}")
+
+    @asynccontextmanager
+    async def admit(self, session_key: Optional[str], reject: bool = True):
+        """
+        Hold the session lock and a global slot for the duration of a turn.
+
+        With reject=False the turn always waits (used by the job workers,
+        whose queue is bounded already).
+        """
+        r = get_redis_client()
+        token = uuid.uuid4().hex
+        lease_ms = int(self.lease_seconds * 1000)
+        held = {"lock": False, "slot": False}
+        keys = [ADMISSION_ACTIVE_KEY, ADMISSION_WAITING_KEY] + ([admission_turns_key(session_key)] if session_key else [])
+        refused = await r.eval(
+            ENQUEUE_TURN_SCRIPT, len(keys), *keys,
+            time.time(), time.time() + self.lease_seconds, self.max_concurrent, self.max_waiting,
+            self.max_waiting_per_session, token, int(reject), lease_ms
+        )
+        if refused == 1:
+            raise self._reject("Too many chat requests in progress, please retry shortly")
+        if refused == 2:
+            raise self._reject("This conversation already has requests in progress")
+        self.waiting += 1
+        renewer = asyncio.create_task(self._renew_leases(r, token, session_key, held))
+        try:
+            while not held["slot"]:
+                # Session lock first, so a queued turn does not hold a global slot
+                if session_key and not held["lock"]:
+                    held["lock"] = bool(await r.set(admission_lock_key(session_key), token, nx=True, px=lease_ms))
+                if held["lock"] or not session_key:
+                    held["slot"] = bool(await r.eval(
+                        ACQUIRE_SLOT_SCRIPT, 2, ADMISSION_ACTIVE_KEY, ADMISSION_WAITING_KEY,
+                        time.time(), time.time() + self.lease_seconds, self.max_concurrent, token
+                    ))
+                if not held["slot"]:
+                    await asyncio.sleep(self.poll_seconds)
+            self.waiting -= 1
+            self.active += 1
+            self.admitted_total += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+        finally:
+            if not held["slot"]:
+                self.waiting -= 1
+            renewer.cancel()
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.zrem(ADMISSION_WAITING_KEY, token)
+                pipe.zrem(ADMISSION_ACTIVE_KEY, token)
+                if session_key:
+                    pipe.zrem(admission_turns_key(session_key), token)
+                    if held["lock"]:
+                        pipe.eval(RELEASE_LOCK_SCRIPT, 1, admission_lock_key(session_key), token)
+                await pipe.execute()
+
+    async def metrics(self) -> Dict[str, Any]:
+        r = get_redis_client()
+        return {
+            "active": await self._live_count(r, ADMISSION_ACTIVE_KEY),
+            "max_concurrent": self.max_concurrent,
+            "waiting": await self._live_count(r, ADMISSION_WAITING_KEY),
+            "max_waiting": self.max_waiting,
+            "worker_active": self.active,
+            "worker_waiting": self.waiting,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+        }
+
+chat_admission = ChatAdmission(CHAT_MAX_CONCURRENT_TURNS, CHAT_MAX_WAITING_TURNS, CHAT_MAX_WAITING_PER_SESSION)
+
+async def _call_n8n(request: ChatRequest) -> Dict[str, Any]:
+    """
+    Run one chat turn against n8n and return the validated WebhookResponse data.
+    
+    Shared by the synchronous chat endpoint and the chat job workers. Raises
+    HTTPException for n8n errors and httpx.RequestError when n8n is unreachable.
+    """
+    webhook_url, payload = _n8n_target(request)
+    await _ensure_session_in_redis(request.sessionId)
+    
+    print(f"[DEBUG] Sending request to {webhook_url} with payload: {payload}")
+    try:
+        response = await n8n_client.post(
+            webhook_url,
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        )
+    except CircuitOpenError as e:
+        raise _n8n_unavailable(e)
+    
+    if response.status_code != 200:
+        print(f"[DEBUG] n8n returned status {response.status_code}: {response.text}")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to process chat request: {response.text}"
+        )
+    
+    # Parse the response from n8n
+    response_data = _validate_n8n_response(response.json())
+    await _record_turn(response_data)
+    return response_data
+
+def _validate_n8n_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Map agentResponse to direct_message_to_user for consistency
+    if "agentResponse" in response_data and "direct_message_to_user" not in response_data:
+        response_data["direct_message_to_user"] = response_data.pop("agentResponse")
+    
+    # Validate the response has the expected fields
+    if not all(key in response_data for key in ["direct_message_to_user", "resumeUrl", "sessionId"]):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Invalid response from n8n webhook. Missing required fields. Response: {response_data}"
+        )
+    return response_data
+
+async def _record_turn(response_data: Dict[str, Any]):
+    """n8n has written the turn to Redis by now; keep the sessions list current"""
+    try:
+        r = get_redis_client()
+        await index_session(r, response_data["sessionId"])
+        schedule_search_indexing(response_data["sessionId"])
+        await update_session_summary(
+            r, response_data["sessionId"],
+            messageCount=await r.llen(response_data["sessionId"]),
+            lastMessage=response_data["direct_message_to_user"],
+            lastActivity=datetime.now(timezone.utc).isoformat()
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Failed to update chat session {response_data['sessionId']}: {e}")
+
 @router.post("/chat", response_model=WebhookResponse)
 async def chat(request: ChatRequest):
     """
@@ -169,64 +1080,11 @@ async def chat(request: ChatRequest):
     print(f"[DEBUG] Chat request received: sessionId={request.sessionId}, chatInput={request.chatInput}, resumeUrl={request.resumeUrl}")
     
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            # Determine which endpoint and payload to use based on session state
-            if request.sessionId is None:
-                # Case 1: New chat session (no sessionId)
-                print(f"[DEBUG] Starting new chat session")
-                webhook_url = f"{N8N_URL}/n8n/project-planner"
-                payload = {}  # Empty body for initial request
-                
-            elif request.resumeUrl:
-                # Case 2: Active session continuation (sessionId + resumeUrl)
-                # Use the webhook-waiting URL to continue the current workflow execution
-                print(f"[DEBUG] Continuing active session {request.sessionId} via resumeUrl")
-                webhook_url = translate_resume_url(request.resumeUrl)
-                payload = {
-                    "sessionId": request.sessionId,
-                    "chatInput": request.chatInput
-                }
-                
-            else:
-                # Case 3: Restored session (sessionId but no resumeUrl)
-                # Send to project-planner with sessionId to restore from Redis
-                print(f"[DEBUG] Restoring conversation for session {request.sessionId}")
-                webhook_url = f"{N8N_URL}/n8n/project-planner"
-                payload = {
-                    "sessionId": request.sessionId,
-                    "chatInput": request.chatInput
-                }
-            
-            print(f"[DEBUG] Sending request to {webhook_url} with payload: {payload}")
-            response = await client.post(
-                webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code != 200:
-                print(f"[DEBUG] n8n returned status {response.status_code}: {response.text}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to process chat request: {response.text}"
-                )
-            
-            # Parse the response from n8n
-            response_data = response.json()
-            
-            # Map agentResponse to direct_message_to_user for consistency
-            if "agentResponse" in response_data and "direct_message_to_user" not in response_data:
-                response_data["direct_message_to_user"] = response_data.pop("agentResponse")
-            
-            # Validate the response has the expected fields
-            if not all(key in response_data for key in ["direct_message_to_user", "resumeUrl", "sessionId"]):
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Invalid response from n8n webhook. Missing required fields. Response: {response_data}"
-                )
-            
-            return WebhookResponse(**response_data)
-            
+        _check_n8n_available()
+        async with chat_admission.admit(_session_key(request)):
+            return WebhookResponse(**await _call_n8n(request))
+    except HTTPException:
+        raise
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=503,
@@ -238,69 +1096,409 @@ async def chat(request: ChatRequest):
             detail=f"Unexpected error: {str(e)}"
         )
 
-@router.get("/sessions", response_model=List[ChatSession])
-async def get_chat_sessions():
+# Asynchronous chat turns: the POST returns a job id right away, a worker
+# performs the n8n call, and the result is kept in Redis for polling or SSE
+CHAT_JOB_WORKERS = int(os.getenv("CHAT_JOB_WORKERS", "8"))
+CHAT_JOB_QUEUE_SIZE = int(os.getenv("CHAT_JOB_QUEUE_SIZE", "500"))
+CHAT_JOB_TTL_SECONDS = int(os.getenv("CHAT_JOB_TTL_SECONDS", "3600"))
+CHAT_JOB_POLL_INTERVAL = float(os.getenv("CHAT_JOB_POLL_INTERVAL", "0.5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("CHAT_SSE_HEARTBEAT_SECONDS", "15"))
+
+_job_queue: Optional[asyncio.Queue] = None
+_job_workers: List[asyncio.Task] = []
+
+class ChatJobResponse(BaseModel):
+    """Status of an asynchronous chat turn"""
+    jobId: str
+    status: str  # queued, running, completed or failed
+    result: Optional[WebhookResponse] = None
+    error: Optional[str] = None
+    errorStatus: Optional[int] = None  # HTTP status the synchronous endpoint would have returned
+    createdAt: str
+    updatedAt: str
+
+def chat_job_key(job_id: str) -> str:
+    return f"chat_job:{job_id}"
+
+def _job_from_hash(job_id: str, data: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "jobId": job_id,
+        "status": data["status"],
+        "result": json.loads(data["result"]) if data.get("result") else None,
+        "error": data.get("error"),
+        "errorStatus": int(data["errorStatus"]) if data.get("errorStatus") else None,
+        "createdAt": data["createdAt"],
+        "updatedAt": data["updatedAt"]
+    }
+
+async def _save_job(r: aioredis.Redis, job_id: str, **fields):
+    fields["updatedAt"] = datetime.now(timezone.utc).isoformat()
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.hset(chat_job_key(job_id), mapping=fields)
+        pipe.expire(chat_job_key(job_id), CHAT_JOB_TTL_SECONDS)
+        await pipe.execute()
+
+async def _run_chat_job(job_id: str, request: ChatRequest):
+    r = get_redis_client()
+    try:
+        async with chat_admission.admit(_session_key(request), reject=False):
+            await _save_job(r, job_id, status="running")
+            result = await _call_n8n(request)
+        await _save_job(r, job_id, status="completed", result=json.dumps(result))
+    except HTTPException as e:
+        await _save_job(r, job_id, status="failed", error=str(e.detail), errorStatus=e.status_code)
+    except httpx.RequestError as e:
+        await _save_job(r, job_id, status="failed", error=f"Failed to connect to n8n service: {str(e)}", errorStatus=503)
+    except Exception as e:
+        await _save_job(r, job_id, status="failed", error=f"Unexpected error: {str(e)}", errorStatus=500)
+
+async def _chat_job_worker():
+    while True:
+        job_id, request = await _job_queue.get()
+        try:
+            await _run_chat_job(job_id, request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Only reachable when the job status itself cannot be written
+            logger.error(f"Chat job {job_id} could not be completed: {e}")
+        finally:
+            _job_queue.task_done()
+
+def start_chat_job_workers():
+    global _job_queue, _job_workers
+    _job_queue = asyncio.Queue(maxsize=CHAT_JOB_QUEUE_SIZE)
+    _job_workers = [asyncio.create_task(_chat_job_worker()) for _ in range(CHAT_JOB_WORKERS)]
+    logger.info(f"Chat job workers started ({CHAT_JOB_WORKERS} workers)")
+
+async def stop_chat_job_workers():
+    global _job_queue, _job_workers
+    for task in _job_workers:
+        task.cancel()
+    await asyncio.gather(*_job_workers, return_exceptions=True)
+    _job_workers = []
+    _job_queue = None
+
+@router.post("/jobs", response_model=ChatJobResponse, status_code=202)
+async def create_chat_job(request: ChatRequest):
     """
-    Get all chat sessions with their descriptions and metadata
+    Start a chat turn without waiting for n8n.
+    
+    Returns a job id at once; get the WebhookResponse from GET /chat/jobs/{jobId}
+    or the SSE stream GET /chat/jobs/{jobId}/events. Results are kept for
+    CHAT_JOB_TTL_SECONDS, so a dropped client can pick them up later.
     """
+    if _job_queue is None:
+        raise HTTPException(status_code=503, detail="Chat job workers are not running")
+    _check_n8n_available()
+    
     try:
         r = get_redis_client()
+        job_id = uuid.uuid4().hex
+        now = datetime.now(timezone.utc).isoformat()
+        await _save_job(r, job_id, status="queued", request=request.model_dump_json(), createdAt=now)
         
-        # Get all session keys (timestamps)
-        session_keys = r.keys("*")
-        
-        # Filter out non-session keys (like chat_descriptions)
-        session_keys = [key for key in session_keys if key != "chat_descriptions"]
+        try:
+            _job_queue.put_nowait((job_id, request))
+        except asyncio.QueueFull:
+            await r.delete(chat_job_key(job_id))
+            raise HTTPException(
+                status_code=503,
+                detail="Chat job queue is full",
+                headers={"Retry-After": "5"}
+            )
         
-        sessions = []
+        return _job_from_hash(job_id, await r.hgetall(chat_job_key(job_id)))
         
-        # Sort by timestamp (newest first)
-        session_keys.sort(reverse=True)
+    except HTTPException:
+        raise
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+
+@router.get("/jobs/{job_id}", response_model=ChatJobResponse)
+async def get_chat_job(job_id: str):
+    """Poll the status and result of an asynchronous chat turn"""
+    try:
+        data = await get_redis_client().hgetall(chat_job_key(job_id))
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+    if not data:
+        raise HTTPException(status_code=404, detail=f"Chat job {job_id} not found")
+    return _job_from_hash(job_id, data)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/jobs/{job_id}/events")
+async def stream_chat_job(job_id: str):
+    """
+    Server-sent events for an asynchronous chat turn: a "job" event on every
+    status change (the last one carries the result or error) and heartbeat
+    comments in between so proxies keep the connection open.
+    """
+    r = get_redis_client()
+    try:
+        exists = await r.exists(chat_job_key(job_id))
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+    if not exists:
+        raise HTTPException(status_code=404, detail=f"Chat job {job_id} not found")
+    
+    async def events():
+        last_status = None
+        last_sent = time.monotonic()
+        while True:
+            try:
+                data = await r.hgetall(chat_job_key(job_id))
+            except redis.RedisError as e:
+                yield _sse("error", {"error": f"Failed to connect to Redis: {str(e)}"})
+                return
+            if not data:
+                yield _sse("error", {"error": f"Chat job {job_id} expired"})
+                return
+            if data["status"] != last_status:
+                last_status = data["status"]
+                yield _sse("job", _job_from_hash(job_id, data))
+                if last_status in ("completed", "failed"):
+                    return
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+                yield ": heartbeat\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(CHAT_JOB_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# n8n's streaming webhook response is newline-delimited JSON chunks of these types
+N8N_STREAM_CHUNK_TYPES = {"begin", "item", "end", "error"}
+
+def _final_fields(content: str) -> Optional[Dict[str, Any]]:
+    """The structured response object if a streamed item carries one (resumeUrl/sessionId)"""
+    if not content.lstrip().startswith("{"):
+        return None
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and ("resumeUrl" in data or "sessionId" in data):
+        return data
+    return None
+
+async def _relay_n8n_stream(request: ChatRequest, queue: asyncio.Queue):
+    """
+    Run a chat turn and put ("delta", ...) events on the queue as n8n produces
+    output, then one ("done", WebhookResponse) event.
+    
+    Workflows that answer with a plain JSON body (no streaming) produce a
+    single delta with the whole reply, so the endpoint works with both.
+    """
+    webhook_url, payload = _n8n_target(request)
+    await _ensure_session_in_redis(request.sessionId)
+    logger.debug(f"Streaming chat turn for session {request.sessionId} to {webhook_url}")
+    
+    async with n8n_client.stream(
+        "POST", webhook_url, json=payload, headers={"Content-Type": "application/json"}
+    ) as response:
+        if response.status_code != 200:
+            body = (await response.aread()).decode(errors="replace")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to process chat request: {body}"
+            )
         
-        for session_id in session_keys:
-            # Get description from chat_descriptions hash
-            description = r.hget("chat_descriptions", session_id)
-            if not description:
-                description = "New Conversation"
-            
-            # Get message count and last message
-            message_count = r.llen(session_id)
-            last_message = ""
-            
-            if message_count > 0:
-                # Get the last message
-                last_msg_raw = r.lindex(session_id, -1)
-                if last_msg_raw:
-                    try:
-                        last_msg = json.loads(last_msg_raw)
-                        if last_msg.get("type") == "ai":
-                            # Parse AI message content
-                            content_data = json.loads(last_msg["data"]["content"])
-                            last_message = content_data.get("direct_response_to_user", "")
-                        else:
-                            # Extract user input from human message
-                            lines = last_msg["data"]["content"].split('\n')
-                            user_line = next((line for line in lines if line.startswith("User's Most Recent Chat Input:")), "")
-                            last_message = user_line.replace("User's Most Recent Chat Input: ", "")
-                    except (json.JSONDecodeError, KeyError):
-                        last_message = "Unable to preview message"
+        streaming = None
+        raw_lines = []
+        text_parts = []
+        final = {}
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            if streaming is None:
+                # The first line tells a streamed response from a plain JSON body
+                try:
+                    first = json.loads(line)
+                except ValueError:
+                    first = None
+                streaming = isinstance(first, dict) and first.get("type") in N8N_STREAM_CHUNK_TYPES
+            if not streaming:
+                raw_lines.append(line)
+                continue
             
-            # Parse session ID as timestamp
             try:
-                timestamp = session_id  # ISO 8601 format
-            except:
-                timestamp = session_id
-            
+                chunk = json.loads(line)
+            except ValueError:
+                continue
+            if chunk.get("type") == "error":
+                raise HTTPException(status_code=502, detail=f"n8n workflow error: {chunk.get('content', '')}")
+            if chunk.get("type") != "item":
+                continue
+            content = chunk.get("content") or ""
+            fields = _final_fields(content)
+            if fields is not None:
+                final.update(fields)
+                continue
+            text_parts.append(content)
+            await queue.put(("delta", {"content": content}))
+    
+    if streaming:
+        response_data = dict(final)
+        if "direct_message_to_user" not in response_data and "agentResponse" not in response_data:
+            response_data["direct_message_to_user"] = "".join(text_parts)
+        elif not text_parts:
+            # The reply only came in the final object; still show it
+            await queue.put(("delta", {"content": response_data.get("direct_message_to_user") or response_data.get("agentResponse", "")}))
+    else:
+        response_data = json.loads("\n".join(raw_lines))
+        await queue.put(("delta", {"content": response_data.get("direct_message_to_user") or response_data.get("agentResponse", "")}))
+    
+    response_data = _validate_n8n_response(response_data)
+    await _record_turn(response_data)
+    await queue.put(("done", WebhookResponse(**response_data).model_dump()))
+
+@router.post("/stream")
+async def stream_chat(request: ChatRequest):
+    """
+    Streaming variant of POST /chat as server-sent events.
+    
+    Events: "delta" ({"content"}) for each piece of agent output as n8n
+    produces it, heartbeat comments while the workflow is busy, then one
+    "done" event with the full WebhookResponse (direct_message_to_user,
+    resumeUrl, sessionId), or an "error" event ({"error", "status"}).
+    """
+    logger.debug(f"Stream request received: sessionId={request.sessionId}, resumeUrl={request.resumeUrl}")
+    # Reject before the 200 is sent; the turn itself is admitted once streaming starts
+    _check_n8n_available()
+    await chat_admission.check(_session_key(request))
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def produce():
+        try:
+            async with chat_admission.admit(_session_key(request)):
+                await _relay_n8n_stream(request, queue)
+        except HTTPException as e:
+            await queue.put(("error", {"error": str(e.detail), "status": e.status_code}))
+        except CircuitOpenError as e:
+            await queue.put(("error", {"error": str(e), "status": 503}))
+        except httpx.RequestError as e:
+            await queue.put(("error", {"error": f"Failed to connect to n8n service: {str(e)}", "status": 503}))
+        except Exception as e:
+            await queue.put(("error", {"error": f"Unexpected error: {str(e)}", "status": 500}))
+        finally:
+            await queue.put(None)
+    
+    async def events():
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield _sse(event, data)
+        finally:
+            # Stops the n8n call if the client went away
+            producer.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/sessions", response_model=List[ChatSession])
+async def get_chat_sessions(
+    limit: int = Query(SESSIONS_PAGE_SIZE, ge=1, le=500),
+    before: Optional[str] = None
+):
+    """
+    Get chat sessions with their descriptions and metadata, newest first.
+    
+    Pass the sessionId of the last session of a page as `before` to get the next page.
+    """
+    try:
+        r = get_redis_client()
+        
+        max_score = "+inf"
+        if before:
+            before_score = await r.zscore(SESSION_INDEX_KEY, before)
+            if before_score is None:
+                before_score = session_score(before)
+            if before_score is None:
+                raise HTTPException(status_code=400, detail=f"Unknown session {before}")
+            max_score = f"({before_score}"
+        
+        session_ids = await r.zrevrangebyscore(SESSION_INDEX_KEY, max_score, "-inf", start=0, num=limit)
+        if not session_ids:
+            return []
+        
+        # Precomputed summaries for the whole page in one round trip
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hmget("chat_descriptions", session_ids)
+            for session_id in session_ids:
+                pipe.hgetall(session_summary_key(session_id))
+                pipe.llen(session_id)
+            results = await pipe.execute()
+        descriptions = results[0]
+        summaries = {}
+        stale = []
+        deleted = []
+        for i, session_id in enumerate(session_ids):
+            summary, message_count = results[1 + 2 * i], results[2 + 2 * i]
+            if summary.get("archived"):
+                pass  # the messages are in Postgres; the summary is final
+            elif message_count == 0:
+                # The session list no longer exists (expired or deleted)
+                deleted.append(session_id)
+            elif summary.get("messageCount") != str(message_count):
+                stale.append(session_id)
+            summaries[session_id] = summary
+        if stale:
+            summaries.update(await refresh_session_summaries(r, stale, summaries))
+        
+        sessions = []
+        for i, session_id in enumerate(session_ids):
+            if session_id in deleted:
+                continue
+            summary = summaries[session_id]
             sessions.append({
                 "sessionId": session_id,
-                "description": description,
-                "lastMessage": last_message[:100] + "..." if len(last_message) > 100 else last_message,
-                "messageCount": message_count,
-                "timestamp": timestamp
+                # n8n may write chat_descriptions directly, so it stays the source of truth
+                "description": descriptions[i] or summary.get("description") or "New Conversation",
+                "lastMessage": summary.get("lastMessage", ""),
+                "messageCount": int(summary["messageCount"]),
+                "timestamp": session_id,  # ISO 8601 format
+                "lastActivity": summary.get("lastActivity"),
+                "archived": bool(summary.get("archived"))
             })
         
+        if deleted:
+            await r.zrem(SESSION_INDEX_KEY, *deleted)
+            await r.delete(*[session_summary_key(session_id) for session_id in deleted])
+            await asyncio.to_thread(
+                db.execute_delete, "DELETE FROM chat_message_search WHERE session_id = ANY(%s)", (deleted,)
+            )
+        
         return sessions
         
+    except HTTPException:
+        raise
     except redis.RedisError as e:
         raise HTTPException(
             status_code=503,
@@ -312,92 +1510,202 @@ async def get_chat_sessions():
             detail=f"Unexpected error: {str(e)}"
         )
 
+# Role, text and timestamp of raw chat memory messages by BLAKE2b digest of the
+# raw JSON. Restores, "load older" pages and the search indexer decode the same
+# messages again and again; the digest keeps large contexts out of the cache.
+MESSAGE_CACHE_SIZE = int(os.getenv("CHAT_MESSAGE_CACHE_SIZE", "4096"))
+_message_cache: "OrderedDict[bytes, Optional[tuple]]" = OrderedDict()
+
+def _decode_message(msg_raw: str) -> Optional[tuple]:
+    """(role, content, timestamp) of a raw message, or None for placeholders and malformed messages"""
+    try:
+        # Parse the message wrapper
+        msg_wrapper = json.loads(msg_raw)
+        msg_type = msg_wrapper['type']
+        
+        if msg_type == 'ai':
+            # Parse AI message content
+            content_data = json.loads(msg_wrapper['data']['content'])
+            content = content_data.get('direct_response_to_user', '')
+            role = 'agent'
+        else:
+            # Skip user messages that contain placeholder context data
+            if "Current Project's Context Data:" in msg_wrapper['data']['content'] and "[object Object]" in msg_wrapper['data']['content']:
+                return None
+            
+            # Extract user input from human message
+            content = parse_user_message(msg_wrapper['data']['content'])
+            role = 'user'
+    except (json.JSONDecodeError, KeyError, TypeError):
+        # Skip malformed messages but continue processing
+        return None
+    
+    return role, content, msg_wrapper.get('timestamp', '')
+
+def _cached_decode_message(msg_raw: str) -> Optional[tuple]:
+    key = hashlib.blake2b(msg_raw.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    try:
+        decoded = _message_cache[key]
+        _message_cache.move_to_end(key)
+        return decoded
+    except KeyError:
+        pass
+    decoded = _decode_message(msg_raw)
+    _message_cache[key] = decoded
+    if len(_message_cache) > MESSAGE_CACHE_SIZE:
+        _message_cache.popitem(last=False)
+    return decoded
+
+def _format_message(msg_raw: str, offset: int, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Convert one raw n8n chat memory message into a frontend chat message, or
+    None for messages that are not shown (starting prompt, placeholders, malformed).
+    
+    offset is the message's position in the conversation (0 = oldest); it is
+    stable while the conversation grows, so it doubles as a message id.
+    """
+    decoded = _cached_decode_message(msg_raw)
+    if decoded is None:
+        return None
+    role, content, timestamp = decoded
+    
+    # Always skip the first message (starting prompt)
+    if role == 'user' and offset == 0:
+        return None
+    
+    # Use the sessionId as a base for timestamp if not available
+    timestamp = timestamp or session_id
+    
+    return {
+        "id": f"{session_id}:{offset}",
+        "role": role,
+        "content": content,
+        "timestamp": timestamp,
+        "created_at": timestamp,
+        "offset": offset
+    }
+
+async def _load_message_window(r: aioredis.Redis, session_id: str, limit: Optional[int],
+                               before: Optional[int]) -> Dict[str, Any]:
+    """
+    Load up to `limit` messages older than chronological offset `before`
+    (default: the newest messages) with a single LRANGE slice.
+    
+    n8n chat memory LPUSHes, so the list is newest first and only grows at
+    the head. Counting from the tail, chronological offset p is list index
+    -(p + 1), which keeps a window stable even while new messages arrive.
+    """
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.llen(session_id)
+        if before is None:
+            pipe.lrange(session_id, 0, limit - 1 if limit else -1)
+        else:
+            start = max(0, before - limit) if limit else 0
+            if before > start:
+                pipe.lrange(session_id, -before, -(start + 1))
+            else:
+                pipe.echo("")
+        total, window = await pipe.execute()
+    
+    window = window or []
+    if before is None:
+        end = total
+    elif before > total:
+        raise ValueError(f"before={before} is past the end of the conversation ({total} messages)")
+    else:
+        end = before
+    start = end - len(window)
+    # Chronological order: oldest of the window first
+    window.reverse()
+    
+    messages = []
+    for i, msg_raw in enumerate(window):
+        message = _format_message(msg_raw, start + i, session_id)
+        if message is not None:
+            messages.append(message)
+    
+    return {
+        "messages": messages,
+        "sessionId": session_id,
+        "totalMessages": total,
+        "oldestOffset": start,
+        "hasMore": start > 0,
+        "newestRaw": window[-1] if window and before is None else None
+    }
+
 @router.post("/restore", response_model=RestoreConversationResponse)
 async def restore_conversation(request: RestoreConversationRequest):
     """
-    Restore a conversation by fetching all messages for a session
+    Restore a conversation: its newest `limit` messages (all when limit is omitted).
+    
+    When hasMore is true, older messages are loaded with
+    GET /chat/messages/{sessionId}?before={oldestOffset}.
     """
     try:
         r = get_redis_client()
+        await rehydrate_session(r, request.sessionId)
         
         # Check if session exists
-        if not r.exists(request.sessionId):
+        if not await r.exists(request.sessionId):
             raise HTTPException(
                 status_code=404,
                 detail=f"Session {request.sessionId} not found"
             )
+        await index_session(r, request.sessionId)
         
-        # Get all messages for the session
-        messages_raw = r.lrange(request.sessionId, 0, -1)
-        if messages_raw:
-            messages_raw.reverse()
+        result = await _load_message_window(r, request.sessionId, request.limit, None)
         
-        formatted_messages = []
+        # The newest message is in hand, so bring the sidebar summary up to date for free
+        await update_session_summary(
+            r, request.sessionId,
+            messageCount=result["totalMessages"],
+            lastMessage=message_preview(result.pop("newestRaw"))
+        )
+        await r.hsetnx(session_summary_key(request.sessionId), "lastActivity", request.sessionId)
         
-        for msg_raw in messages_raw:
-            try:
-                # Parse the message wrapper
-                msg_wrapper = json.loads(msg_raw)
-                msg_type = msg_wrapper['type']
-                
-                if msg_type == 'ai':
-                    # Parse AI message content
-                    content_data = json.loads(msg_wrapper['data']['content'])
-                    content = content_data.get('direct_response_to_user', '')
-                    
-                    # Generate a unique ID for the message
-                    message_id = str(uuid.uuid4())
-                    
-                    # Use the sessionId as a base for timestamp if not available
-                    timestamp = msg_wrapper.get('timestamp', '')
-                    if not timestamp and request.sessionId:
-                        timestamp = request.sessionId
-                    
-                    formatted_messages.append({
-                        "id": message_id,
-                        "role": 'agent',
-                        "content": content,
-                        "timestamp": timestamp,
-                        "created_at": timestamp
-                    })
-                else:
-                    # Extract user input from human message
-                    content = parse_user_message(msg_wrapper['data']['content'])
-                    
-                    # Skip user messages that contain placeholder context data
-                    if "Current Project's Context Data:" in msg_wrapper['data']['content'] and "[object Object]" in msg_wrapper['data']['content']:
-                        continue
-                    
-                    # Generate a unique ID for the message
-                    message_id = str(uuid.uuid4())
-                    
-                    # Use the sessionId as a base for timestamp if not available
-                    timestamp = msg_wrapper.get('timestamp', '')
-                    if not timestamp and request.sessionId:
-                        timestamp = request.sessionId
-                    
-                    user_message = {
-                        "id": message_id,
-                        "role": 'user',
-                        "content": content,
-                        "timestamp": timestamp,
-                        "created_at": timestamp
-                    }
-                    
-                    # Always skip the first message (starting prompt)
-                    if len(formatted_messages) > 0 or messages_raw.index(msg_raw) > 0:
-                        formatted_messages.append(user_message)
-            except (json.JSONDecodeError, KeyError) as e:
-                # Skip malformed messages but continue processing
-                continue
+        return result
         
-        return {
-            "messages": formatted_messages,
-            "sessionId": request.sessionId
-        }
+    except HTTPException:
+        raise
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected error: {str(e)}"
+        )
+
+@router.get("/messages/{session_id}", response_model=RestoreConversationResponse)
+async def get_older_messages(
+    session_id: str,
+    before: int = Query(..., ge=0),
+    limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=1000)
+):
+    """
+    Load older messages of a conversation: up to `limit` messages before
+    chronological offset `before` (the oldestOffset of the previous page).
+    """
+    try:
+        r = get_redis_client()
+        await rehydrate_session(r, session_id)
+        
+        if not await r.exists(session_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Session {session_id} not found"
+            )
+        
+        result = await _load_message_window(r, session_id, limit, before)
+        result.pop("newestRaw")
+        return result
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except redis.RedisError as e:
         raise HTTPException(
             status_code=503,
@@ -411,22 +1719,116 @@ async def restore_conversation(request: RestoreConversationRequest):
 
 @router.get("/health")
 async def health_check():
-    """Check if the chat service is healthy and can connect to n8n"""
+    """
+    Check if the chat service is healthy and can connect to n8n.
+    
+    Serves the result of the background n8n health monitor, so probing this
+    endpoint never adds load on n8n; only the first call checks live if the
+    monitor has not run yet.
+    """
     try:
-        # Simple health check to n8n
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{N8N_URL}/healthz")
-            
-            if response.status_code == 200:
-                return {"status": "healthy", "n8n_connection": "ok"}
-            else:
-                return {"status": "degraded", "n8n_connection": "error", "error": response.text}
-                
-    except httpx.RequestError as e:
-        return {"status": "unhealthy", "n8n_connection": "failed", "error": str(e)}
+        health = n8n_client.health or await n8n_client.check_health()
+        return {**health, "circuit": n8n_client.breaker.state}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
+class ChatSearchResult(BaseModel):
+    """A message matching a chat history search"""
+    sessionId: str
+    description: str
+    offset: int  # chronological position in the conversation, as in /chat/restore
+    role: str
+    snippet: str  # matching words wrapped in <b>...</b>
+    rank: float
+
+@router.get("/search", response_model=List[ChatSearchResult])
+async def search_chat_history(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    session_id: Optional[str] = None
+):
+    """
+    Full-text search over all chat messages (user input and agent replies),
+    best matches first. Open a hit with POST /chat/restore and page back with
+    GET /chat/messages/{sessionId} until its offset is loaded.
+    """
+    # Snippets are only built for the rows that are returned
+    query = """
+    SELECT session_id, message_offset, role, rank,
+           ts_headline('english', content, query, 'MaxWords=30, MinWords=10, MaxFragments=2') AS snippet
+    FROM (
+        SELECT s.session_id, s.message_offset, s.role, s.content, query, ts_rank(s.content_tsv, query) AS rank
+        FROM chat_message_search s, plainto_tsquery('english', %s) query
+        WHERE s.content_tsv @@ query AND (%s::text IS NULL OR s.session_id = %s)
+        ORDER BY rank DESC, s.session_id DESC, s.message_offset DESC
+        LIMIT %s
+    ) hits
+    ORDER BY rank DESC, session_id DESC, message_offset DESC
+    """
+    try:
+        rows = await asyncio.to_thread(db.execute_query, query, (q, session_id, session_id, limit))
+        if not rows:
+            return []
+        session_ids = list(dict.fromkeys(row["session_id"] for row in rows))
+        descriptions = dict(zip(session_ids, await get_redis_client().hmget("chat_descriptions", session_ids)))
+        return [
+            {
+                "sessionId": row["session_id"],
+                "description": descriptions.get(row["session_id"]) or "New Conversation",
+                "offset": row["message_offset"],
+                "role": row["role"],
+                "snippet": row["snippet"],
+                "rank": row["rank"]
+            }
+            for row in rows
+        ]
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Error searching chat history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/archive")
+async def archive_sessions(idle_days: float = Query(CHAT_ARCHIVE_IDLE_DAYS, ge=0)):
+    """
+    Move sessions idle for more than idle_days out of Redis into Postgres now
+    (it also runs every CHAT_ARCHIVE_INTERVAL_SECONDS). Returns how many
+    sessions were archived and the Redis memory reclaimed.
+    """
+    try:
+        return await archive_idle_sessions(idle_days)
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to Redis: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected error: {str(e)}"
+        )
+
+@router.get("/metrics")
+async def chat_metrics():
+    """Usage of the shared n8n connection pool, chat turn admission and the chat job queue"""
+    return {
+        "n8n_client": n8n_client.metrics(),
+        "admission": await chat_admission.metrics(),
+        "last_archive": last_archive_report,
+        "search_index": {
+            "queued": _search_queue.qsize() if _search_queue else 0,
+            "messages_indexed": search_messages_indexed
+        },
+        "chat_jobs": {
+            "queued": _job_queue.qsize() if _job_queue else 0,
+            "queue_size": CHAT_JOB_QUEUE_SIZE,
+            "workers": len(_job_workers)
+        }
+    }
+
 @router.post("/addDescription")
 async def add_description(request: AddDescriptionRequest):
     """
@@ -445,7 +1847,9 @@ async def add_description(request: AddDescriptionRequest):
         
         # Set the description in the chat_descriptions hash
         # HSET chat_descriptions {sessionId} {description}
-        r.hset("chat_descriptions", request.sessionId, request.description)
+        await r.hset("chat_descriptions", request.sessionId, request.description)
+        await index_session(r, request.sessionId)
+        await update_session_summary(r, request.sessionId, description=request.description)
         
         return {
             "success": True,
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.responses import JSONResponse, Response
 from typing import List, Optional, Dict, Any
-from models import KnowledgeBase, KnowledgeBaseCreate, KnowledgeBaseUpdate
+from models import KnowledgeBase, KnowledgeBaseCreate, KnowledgeBaseUpdate, KnowledgeBaseReferencesUpdate
 from database import db
+from attachment_extraction import extraction_worker
+from api.chat import get_redis_client
+from similarity_index import similarity_index
+import near_duplicates
+import knowledge_ingest
+import asyncio
 import json
 import logging
+import os
+import shutil
+import tempfile
+import time
 import uuid
 
 # Set up logging
@@ -13,6 +23,59 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
+def _reference_arrays(related_projects, related_goals, related_tasks):
+    """
+    Flatten related project/goal/task ids into parallel (entity_type, entity_id)
+    arrays so all references can be written with a single INSERT ... SELECT unnest(...)
+    """
+    entity_types = []
+    entity_ids = []
+    for entity_type, entity_list in (
+        ('project', related_projects),
+        ('goal', related_goals),
+        ('task', related_tasks),
+    ):
+        for entity_id in entity_list or []:
+            entity_types.append(entity_type)
+            entity_ids.append(entity_id)
+    return entity_types, entity_ids
+
+def _index_document(knowledge_id, content, ai_summary, updated_at):
+    """Keep the similarity index in step with a committed write; never fails the request"""
+    try:
+        similarity_index.upsert(knowledge_id, content, ai_summary, updated_at.isoformat())
+    except Exception as e:
+        logger.error(f"Error updating similarity index for {knowledge_id}: {str(e)}")
+
+def _unindex_document(knowledge_id):
+    try:
+        similarity_index.remove(knowledge_id)
+    except Exception as e:
+        logger.error(f"Error removing {knowledge_id} from similarity index: {str(e)}")
+
+def _similar_items_response(matches):
+    """Attach document names and summaries to (id, score) matches, preserving rank order"""
+    if not matches:
+        return JSONResponse(content=[])
+    query = """
+    SELECT id, document_name, ai_summary, updated_at
+    FROM knowledge_base
+    WHERE id = ANY(%s::uuid[])
+    """
+    rows = {row["id"]: row for row in db.execute_query(query, ([m["id"] for m in matches],))}
+    items = []
+    for match in matches:
+        row = rows.get(match["id"])
+        if row:
+            items.append({
+                "id": row["id"],
+                "document_name": row["document_name"],
+                "ai_summary": row["ai_summary"],
+                "updated_at": row["updated_at"].isoformat(),
+                "score": match["score"]
+            })
+    return JSONResponse(content=items)
+
 @router.get("/")
 def get_knowledge_items():
     """Get all knowledge base items"""
@@ -41,9 +104,190 @@ def get_knowledge_items():
         logger.error(f"Error getting knowledge items: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{knowledge_id}")
-def get_knowledge_item(knowledge_id: str):
-    """Get a specific knowledge base item by ID"""
+@router.get("/search")
+def search_knowledge_items(q: str, limit: int = 20):
+    """Full-text search over document text and text extracted from attachments"""
+    query = """
+    SELECT kb.id, kb.document_name, kb.ai_summary, kb.filename, kb.content_type,
+           kb.created_at, kb.updated_at,
+           kb.attachment_text_tsv @@ query AS matched_attachment,
+           ts_rank(to_tsvector('english', kb.document_name || ' ' || COALESCE(kb.content, '') || ' ' || COALESCE(kb.ai_summary, '')), query)
+               + ts_rank(kb.attachment_text_tsv, query) AS relevance_score
+    FROM knowledge_base kb, plainto_tsquery('english', %s) query
+    WHERE to_tsvector('english', kb.document_name || ' ' || COALESCE(kb.content, '') || ' ' || COALESCE(kb.ai_summary, '')) @@ query
+       OR kb.attachment_text_tsv @@ query
+    ORDER BY relevance_score DESC
+    LIMIT %s
+    """
+    try:
+        items = db.execute_query(query, (q, limit))
+        # Convert datetime objects to ISO strings
+        for item in items:
+            for key, value in item.items():
+                if hasattr(value, 'isoformat'):
+                    item[key] = value.isoformat()
+        return JSONResponse(content=items)
+    except Exception as e:
+        logger.error(f"Error searching knowledge items: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/similar")
+def get_similar_to_text(q: str, k: int = Query(10, ge=1, le=100)):
+    """Find the knowledge base items most similar to a free-text query"""
+    try:
+        return _similar_items_response(similarity_index.similar_to_text(q, k))
+    except Exception as e:
+        logger.error(f"Error finding similar knowledge items: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{knowledge_id}/similar")
+def get_similar_to_item(knowledge_id: str, k: int = Query(10, ge=1, le=100)):
+    """Find the knowledge base items most similar to an existing one"""
+    matches = similarity_index.similar_to_document(knowledge_id, k)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Knowledge base item not found in similarity index")
+    try:
+        return _similar_items_response(matches)
+    except Exception as e:
+        logger.error(f"Error finding similar knowledge items: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/duplicates")
+def get_duplicate_report(threshold: float = near_duplicates.DUPLICATE_THRESHOLD):
+    """Report clusters of near-duplicate knowledge base items found through the LSH index"""
+    try:
+        return near_duplicates.duplicate_report(threshold)
+    except Exception as e:
+        logger.error(f"Error building duplicate report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+_ingestion_tasks = set()
+
+# Job progress lives in Redis so that any backend worker can answer a poll,
+# not just the one that runs the job
+INGEST_JOB_INDEX_KEY = "knowledge_ingest_jobs"
+INGEST_JOB_TTL_SECONDS = 7 * 86400
+INGEST_JOBS_LISTED = 100
+
+def _ingest_job_key(job_id: str) -> str:
+    return f"knowledge_ingest_job:{job_id}"
+
+async def _save_ingestion_job(job):
+    r = get_redis_client()
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.set(_ingest_job_key(job.id), json.dumps(job.to_dict()), ex=INGEST_JOB_TTL_SECONDS)
+        pipe.zadd(INGEST_JOB_INDEX_KEY, {job.id: job.started_at or time.time()})
+        await pipe.execute()
+
+async def _run_ingestion_job(job, references, cleanup_dir=None):
+    loop = asyncio.get_running_loop()
+
+    def publish_progress(job):
+        # Called from the ingestion thread after every batch
+        try:
+            asyncio.run_coroutine_threadsafe(_save_ingestion_job(job), loop).result()
+        except Exception as e:
+            logger.error(f"Error saving progress of ingestion job {job.id}: {str(e)}")
+
+    try:
+        await asyncio.to_thread(knowledge_ingest.run_ingestion, job, *references, on_progress=publish_progress)
+    finally:
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+        try:
+            await _save_ingestion_job(job)
+        except Exception as e:
+            logger.error(f"Error saving result of ingestion job {job.id}: {str(e)}")
+
+@router.post("/ingest", status_code=202)
+async def start_ingestion(
+    archive: Optional[UploadFile] = File(None),
+    path: Optional[str] = Form(None),
+    related_projects: List[str] = Form([]),
+    related_goals: List[str] = Form([]),
+    related_tasks: List[str] = Form([])
+):
+    """
+    Bulk-ingest Markdown, text and PDF files in the background.
+
+    Send either an uploaded tar archive (or single document) as "archive", or
+    a "path" relative to KNOWLEDGE_INGEST_ROOT on the server. Poll
+    GET /knowledge/ingest/{job_id} for progress.
+    """
+    if (archive is None) == (path is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'archive' or 'path'")
+    try:
+        for entity_id in related_projects + related_goals + related_tasks:
+            uuid.UUID(entity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Related ids must be UUIDs")
+
+    cleanup_dir = None
+    try:
+        if archive is not None:
+            # Spool the upload to disk; archives are read member by member, never extracted
+            cleanup_dir = tempfile.mkdtemp(prefix="knowledge-ingest-")
+            source = os.path.join(cleanup_dir, os.path.basename(archive.filename or "upload"))
+            with open(source, "wb") as f:
+                await asyncio.to_thread(shutil.copyfileobj, archive.file, f)
+        else:
+            source = knowledge_ingest.resolve_ingest_path(path)
+            if not os.path.exists(source):
+                raise HTTPException(status_code=404, detail="Ingestion path not found")
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+        logger.error(f"Error starting knowledge ingestion: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job = knowledge_ingest.IngestionJob(source, archive.filename if archive is not None else path)
+    try:
+        await _save_ingestion_job(job)
+    except Exception as e:
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+        logger.error(f"Error registering knowledge ingestion job: {str(e)}")
+        raise HTTPException(status_code=503, detail="Ingestion job registry unavailable")
+    task = asyncio.create_task(
+        _run_ingestion_job(job, (related_projects, related_goals, related_tasks), cleanup_dir)
+    )
+    # The event loop only keeps weak references to tasks
+    _ingestion_tasks.add(task)
+    task.add_done_callback(_ingestion_tasks.discard)
+    return job.to_dict()
+
+@router.get("/ingest")
+async def list_ingestion_jobs():
+    """List the most recent ingestion jobs of every backend worker, newest first"""
+    r = get_redis_client()
+    try:
+        job_ids = await r.zrevrange(INGEST_JOB_INDEX_KEY, 0, INGEST_JOBS_LISTED - 1)
+        stored = await r.mget([_ingest_job_key(job_id) for job_id in job_ids]) if job_ids else []
+        expired = [job_id for job_id, value in zip(job_ids, stored) if value is None]
+        if expired:
+            await r.zrem(INGEST_JOB_INDEX_KEY, *expired)
+    except Exception as e:
+        logger.error(f"Error listing ingestion jobs: {str(e)}")
+        raise HTTPException(status_code=503, detail="Ingestion job registry unavailable")
+    return [json.loads(value) for value in stored if value is not None]
+
+@router.get("/ingest/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Get progress and throughput of an ingestion job"""
+    try:
+        stored = await get_redis_client().get(_ingest_job_key(job_id))
+    except Exception as e:
+        logger.error(f"Error reading ingestion job {job_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Ingestion job registry unavailable")
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return json.loads(stored)
+
+def _fetch_knowledge_item(knowledge_id: str) -> Dict[str, Any]:
     query = """
     SELECT kb.id, kb.document_name, kb.ai_summary, kb.date_added,
            kb.link_citations, kb.related_entities, kb.related_entity_ids,
@@ -51,73 +295,103 @@ def get_knowledge_item(knowledge_id: str):
     FROM knowledge_base_with_references kb
     WHERE kb.id = %s
     """
+    items = db.execute_query(query, (knowledge_id,))
+    if not items:
+        raise HTTPException(status_code=404, detail="Knowledge base item not found")
+    # Convert datetime objects to ISO strings and UUIDs to strings
+    item = items[0]
+    for key, value in item.items():
+        if hasattr(value, 'isoformat'):
+            item[key] = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            item[key] = str(value)
+        elif isinstance(value, list):
+            # Handle UUIDs in arrays
+            item[key] = [str(v) if isinstance(v, uuid.UUID) else v for v in value]
+    return item
+
+@router.get("/{knowledge_id}")
+def get_knowledge_item(knowledge_id: str):
+    """Get a specific knowledge base item by ID"""
     try:
-        items = db.execute_query(query, (knowledge_id,))
-        if not items:
-            raise HTTPException(status_code=404, detail="Knowledge base item not found")
-        # Convert datetime objects to ISO strings and UUIDs to strings
-        item = items[0]
-        for key, value in item.items():
-            if hasattr(value, 'isoformat'):
-                item[key] = value.isoformat()
-            elif isinstance(value, uuid.UUID):
-                item[key] = str(value)
-            elif isinstance(value, list):
-                # Handle UUIDs in arrays
-                item[key] = [str(v) if isinstance(v, uuid.UUID) else v for v in value]
+        item = _fetch_knowledge_item(knowledge_id)
         logger.info(f"Returning knowledge item: {json.dumps(item)}")
         return JSONResponse(content=item)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting knowledge item: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-def create_knowledge_item(item: KnowledgeBaseCreate):
-    """Create a new knowledge base item"""
-    # First insert the knowledge base item
-    kb_query = """
-    INSERT INTO knowledge_base (document_name, content, ai_summary, link_citations)
-    VALUES (%s, %s, %s, %s)
-    RETURNING id
+def create_knowledge_item(item: KnowledgeBaseCreate, reject_duplicates: bool = False):
+    """
+    Create a new knowledge base item.
+    
+    The response lists likely near-duplicates under "possible_duplicates";
+    with reject_duplicates=true the item is not created if any exist (409).
+    """
+    # Insert the document and all of its references in one statement and one
+    # commit, so a failure can never leave a document with partial references
+    query = """
+    WITH new_kb AS (
+        INSERT INTO knowledge_base (document_name, content, ai_summary, link_citations)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id, updated_at
+    ), new_refs AS (
+        INSERT INTO knowledge_base_references (knowledge_base_id, entity_type, entity_id)
+        SELECT new_kb.id, refs.entity_type, refs.entity_id
+        FROM new_kb, unnest(%s::varchar[], %s::uuid[]) AS refs(entity_type, entity_id)
+        ON CONFLICT (knowledge_base_id, entity_type, entity_id) DO NOTHING
+    ), new_minhash AS (
+        INSERT INTO knowledge_base_minhash (knowledge_base_id, signature)
+        SELECT new_kb.id, sig.signature
+        FROM new_kb, unnest(%s::bytea[]) AS sig(signature)
+    ), new_buckets AS (
+        INSERT INTO knowledge_base_lsh_buckets (knowledge_base_id, band, bucket)
+        SELECT new_kb.id, lsh.band, lsh.bucket
+        FROM new_kb, unnest(%s::smallint[], %s::bigint[]) AS lsh(band, bucket)
+    )
+    SELECT id, updated_at FROM new_kb
     """
     
     try:
         # Convert list to array for PostgreSQL
         citations = item.link_citations if item.link_citations else []
+        entity_types, entity_ids = _reference_arrays(
+            item.related_projects, item.related_goals, item.related_tasks
+        )
         
-        kb_id = db.execute_insert(kb_query, (
-            item.document_name, item.content, item.ai_summary, citations
-        ))
-        
-        # Now insert references if provided
-        if item.related_projects:
-            for project_id in item.related_projects:
-                ref_query = """
-                INSERT INTO knowledge_base_references (knowledge_base_id, entity_type, entity_id)
-                VALUES (%s, 'project', %s)
-                RETURNING id
-                """
-                db.execute_insert(ref_query, (kb_id, project_id))
-        
-        if item.related_goals:
-            for goal_id in item.related_goals:
-                ref_query = """
-                INSERT INTO knowledge_base_references (knowledge_base_id, entity_type, entity_id)
-                VALUES (%s, 'goal', %s)
-                RETURNING id
-                """
-                db.execute_insert(ref_query, (kb_id, goal_id))
+        # Look for near-duplicates through the LSH buckets before inserting
+        signature = near_duplicates.compute_signature(
+            near_duplicates.signature_text(item.content, item.ai_summary)
+        )
+        duplicates = near_duplicates.find_duplicates(signature)
+        if duplicates and reject_duplicates:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Likely duplicate of existing knowledge", "possible_duplicates": duplicates}
+            )
+        if signature is not None:
+            signatures = [near_duplicates.signature_to_bytes(signature)]
+            bands, buckets = near_duplicates.band_buckets(signature)
+        else:
+            signatures, bands, buckets = [], [], []
         
-        if item.related_tasks:
-            for task_id in item.related_tasks:
-                ref_query = """
-                INSERT INTO knowledge_base_references (knowledge_base_id, entity_type, entity_id)
-                VALUES (%s, 'task', %s)
-                RETURNING id
-                """
-                db.execute_insert(ref_query, (kb_id, task_id))
+        with db.transaction() as cursor:
+            cursor.execute(query, (
+                item.document_name, item.content, item.ai_summary, citations,
+                entity_types, entity_ids, signatures, bands, buckets
+            ))
+            created = cursor.fetchone()
+            kb_id = str(created["id"])
         
-        return get_knowledge_item(kb_id)
+        _index_document(kb_id, item.content, item.ai_summary, created["updated_at"])
+        created_item = _fetch_knowledge_item(kb_id)
+        created_item["possible_duplicates"] = duplicates
+        return JSONResponse(content=created_item)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating knowledge item: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,15 +426,66 @@ def update_knowledge_item(knowledge_id: str, item: KnowledgeBaseUpdate):
     UPDATE knowledge_base
     SET {', '.join(update_fields)}
     WHERE id = %s
+    RETURNING content, ai_summary, updated_at
     """
     
     try:
-        db.execute_update(query, values)
+        with db.transaction() as cursor:
+            cursor.execute(query, values)
+            updated = cursor.fetchone()
+            if updated:
+                signature = near_duplicates.compute_signature(
+                    near_duplicates.signature_text(updated["content"], updated["ai_summary"])
+                )
+                near_duplicates.store_signatures(cursor, {knowledge_id: signature})
+        if updated:
+            _index_document(knowledge_id, updated["content"], updated["ai_summary"], updated["updated_at"])
         return get_knowledge_item(knowledge_id)
     except Exception as e:
         logger.error(f"Error updating knowledge item: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/{knowledge_id}/references")
+def replace_knowledge_references(knowledge_id: str, references: KnowledgeBaseReferencesUpdate):
+    """Replace all project/goal/task references of a knowledge base item in one transaction"""
+    # First check if item exists
+    get_knowledge_item(knowledge_id)
+    
+    entity_types, entity_ids = _reference_arrays(
+        references.related_projects, references.related_goals, references.related_tasks
+    )
+    
+    # Drop references that are no longer wanted, then add the missing ones
+    delete_query = """
+    DELETE FROM knowledge_base_references kbr
+    WHERE kbr.knowledge_base_id = %s
+      AND NOT EXISTS (
+          SELECT 1
+          FROM unnest(%s::varchar[], %s::uuid[]) AS refs(entity_type, entity_id)
+          WHERE refs.entity_type = kbr.entity_type AND refs.entity_id = kbr.entity_id
+      )
+    """
+    insert_query = """
+    INSERT INTO knowledge_base_references (knowledge_base_id, entity_type, entity_id)
+    SELECT %s, refs.entity_type, refs.entity_id
+    FROM unnest(%s::varchar[], %s::uuid[]) AS refs(entity_type, entity_id)
+    ON CONFLICT (knowledge_base_id, entity_type, entity_id) DO NOTHING
+    """
+    
+    try:
+        with db.transaction() as cursor:
+            cursor.execute(delete_query, (knowledge_id, entity_types, entity_ids))
+            cursor.execute(insert_query, (knowledge_id, entity_types, entity_ids))
+            # Touch the document so listings ordered by updated_at reflect the change
+            cursor.execute(
+                "UPDATE knowledge_base SET updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (knowledge_id,)
+            )
+        return get_knowledge_item(knowledge_id)
+    except Exception as e:
+        logger.error(f"Error replacing knowledge references: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{knowledge_id}")
 def delete_knowledge_item(knowledge_id: str):
     """Delete a knowledge base item"""
@@ -171,6 +496,7 @@ def delete_knowledge_item(knowledge_id: str):
     query = "DELETE FROM knowledge_base WHERE id = %s"
     try:
         db.execute_delete(query, (knowledge_id,))
+        _unindex_document(knowledge_id)
         return {"message": "Knowledge base item deleted successfully"}
     except Exception as e:
         logger.error(f"Error deleting knowledge item: {str(e)}")
@@ -274,19 +600,24 @@ async def upload_attachment(knowledge_id: str, file: UploadFile = File(...)):
         content = await file.read()
         
         # Update the knowledge base item with file data
+        # Text extraction happens in the background; reset any previous result
         query = """
         UPDATE knowledge_base
-        SET file_attachment = %s, filename = %s, content_type = %s, updated_at = CURRENT_TIMESTAMP
+        SET file_attachment = %s, filename = %s, content_type = %s,
+            attachment_text = NULL, attachment_extracted_at = NULL, attachment_extraction_claimed_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
         WHERE id = %s
         """
         
         db.execute_update(query, (content, file.filename, file.content_type, knowledge_id))
+        extraction_queued = extraction_worker.enqueue(knowledge_id)
         
         return {
             "id": knowledge_id,
             "filename": file.filename,
             "content_type": file.content_type,
-            "size": len(content)
+            "size": len(content),
+            "text_extraction_queued": extraction_queued
         }
     except Exception as e:
         logger.error(f"Error uploading attachment: {str(e)}")
@@ -338,7 +669,9 @@ async def delete_attachment(knowledge_id: str):
     
     query = """
     UPDATE knowledge_base
-    SET file_attachment = NULL, filename = NULL, content_type = NULL, updated_at = CURRENT_TIMESTAMP
+    SET file_attachment = NULL, filename = NULL, content_type = NULL,
+        attachment_text = NULL, attachment_extracted_at = NULL, attachment_extraction_claimed_at = NULL,
+        updated_at = CURRENT_TIMESTAMP
     WHERE id = %s
     """
     
@@ -0,0 +1,277 @@
+"""
+Background text extraction for knowledge base attachments.
+
+Uploading an attachment only enqueues the knowledge base id. An in-process
+asyncio worker loads the blob, parses it in a process pool (PDF parsing is
+CPU-bound) and stores the result in knowledge_base.attachment_text, which
+feeds the indexed attachment_text_tsv column.
+
+Every backend worker sweeps periodically for attachments that are still
+pending (queue overflow, restarts). A worker claims an attachment in
+Postgres before parsing it, so it is extracted once however many workers
+queued it.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Set
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.getenv("ATTACHMENT_EXTRACTION_WORKERS", "2"))
+EXTRACTION_QUEUE_SIZE = int(os.getenv("ATTACHMENT_EXTRACTION_QUEUE_SIZE", "1000"))
+EXTRACTION_SWEEP_SECONDS = float(os.getenv("ATTACHMENT_EXTRACTION_SWEEP_SECONDS", "60"))
+# Longer than parsing the largest attachment should take; a crashed worker's claim expires after it
+EXTRACTION_CLAIM_SECONDS = int(os.getenv("ATTACHMENT_EXTRACTION_CLAIM_SECONDS", "600"))
+# PostgreSQL rejects tsvectors larger than 1MB, so keep the extracted text well below that
+MAX_EXTRACTED_CHARS = int(os.getenv("ATTACHMENT_MAX_EXTRACTED_CHARS", "250000"))
+
+PDF_CONTENT_TYPES = {"application/pdf"}
+MARKDOWN_CONTENT_TYPES = {"text/markdown", "text/x-markdown"}
+PDF_EXTENSIONS = {".pdf"}
+MARKDOWN_EXTENSIONS = {".md", ".markdown"}
+TEXT_EXTENSIONS = {".txt", ".text", ".log", ".csv", ".json", ".rst"}
+
+# Markdown syntax that carries no searchable meaning
+_MD_IMAGE_OR_LINK = re.compile(r"!?\[([^\]]*)\]\(([^)]*)\)")
+_MD_HEADING = re.compile(r"^\s{0,3}#{1,6}\s*", re.MULTILINE)
+_MD_FENCE = re.compile(r"^\s*(```|~~~).*$", re.MULTILINE)
+_MD_EMPHASIS = re.compile(r"(\*\*|__|\*|_|~~|`)")
+_MD_BLOCKQUOTE = re.compile(r"^\s*>\s?", re.MULTILINE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def detect_document_kind(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Return 'pdf', 'markdown' or 'text' for supported attachments, otherwise None"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    extension = os.path.splitext(filename or "")[1].lower()
+
+    if content_type in PDF_CONTENT_TYPES or extension in PDF_EXTENSIONS:
+        return "pdf"
+    if content_type in MARKDOWN_CONTENT_TYPES or extension in MARKDOWN_EXTENSIONS:
+        return "markdown"
+    if content_type.startswith("text/") or extension in TEXT_EXTENSIONS:
+        return "text"
+    return None
+
+
+def decode_text(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def _strip_markdown(text: str) -> str:
+    text = _MD_FENCE.sub("", text)
+    text = _MD_IMAGE_OR_LINK.sub(r"\1 \2", text)
+    text = _MD_HEADING.sub("", text)
+    text = _MD_BLOCKQUOTE.sub("", text)
+    text = _HTML_TAG.sub(" ", text)
+    return _MD_EMPHASIS.sub("", text)
+
+
+def _extract_pdf(data: bytes) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    total = 0
+    for page in reader.pages:
+        page_text = page.extract_text() or ""
+        pages.append(page_text)
+        total += len(page_text)
+        if total >= MAX_EXTRACTED_CHARS:
+            break
+    return "\n".join(pages)
+
+
+def _normalize(text: str) -> str:
+    # PostgreSQL TEXT cannot store NUL characters
+    text = text.replace("\x00", " ")
+    text = _WHITESPACE.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()[:MAX_EXTRACTED_CHARS]
+
+
+def extract_text(data: bytes, filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """
+    Extract searchable plain text from an attachment.
+
+    Runs inside a worker process. Returns None for unsupported file types.
+    """
+    kind = detect_document_kind(filename, content_type)
+    if kind is None:
+        return None
+
+    if kind == "pdf":
+        text = _extract_pdf(data)
+    elif kind == "markdown":
+        text = _strip_markdown(decode_text(data))
+    else:
+        text = decode_text(data)
+
+    return _normalize(text)
+
+
+class AttachmentExtractionWorker:
+    """Queue of knowledge base ids whose attachments still need text extraction"""
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS, queue_size: int = EXTRACTION_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        # Ids queued or being processed here, so the sweep does not queue them twice
+        self._queued: Set[str] = set()
+
+    async def start(self):
+        """Start the worker tasks and the sweep that queues attachments still pending"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pool = self._create_pool()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_periodically()))
+        logger.info(f"Attachment extraction worker started ({self.workers} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+        self._queued.clear()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # spawn avoids forking a process that already runs threads and an event loop
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def enqueue(self, knowledge_id: str) -> bool:
+        """
+        Schedule extraction for a knowledge base item. Never blocks; if the queue
+        is full the item stays pending and is picked up by a later sweep.
+        """
+        if self._queue is None:
+            return False
+        if knowledge_id in self._queued:
+            return True
+        try:
+            self._queue.put_nowait(knowledge_id)
+            self._queued.add(knowledge_id)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Attachment extraction queue full, deferring {knowledge_id}")
+            return False
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _sweep_periodically(self):
+        while True:
+            try:
+                pending = await asyncio.to_thread(self._pending_ids)
+                queued = 0
+                for knowledge_id in pending:
+                    # Whatever does not fit waits for the next sweep
+                    if self._queue.full():
+                        break
+                    if knowledge_id not in self._queued:
+                        queued += self.enqueue(knowledge_id)
+                if queued:
+                    logger.info(f"Queued {queued} pending attachment extractions")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to load pending attachment extractions: {e}")
+            await asyncio.sleep(EXTRACTION_SWEEP_SECONDS)
+
+    async def _run(self):
+        while True:
+            knowledge_id = await self._queue.get()
+            try:
+                await self._process(knowledge_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error extracting attachment text for {knowledge_id}: {e}")
+            finally:
+                self._queued.discard(knowledge_id)
+                self._queue.task_done()
+
+    def _claim(self, knowledge_id: str) -> Optional[dict]:
+        """Claim a pending attachment and load it; None if it is done or another worker holds it"""
+        query = """
+        UPDATE knowledge_base
+        SET attachment_extraction_claimed_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND file_attachment IS NOT NULL AND attachment_extracted_at IS NULL
+          AND (attachment_extraction_claimed_at IS NULL
+               OR attachment_extraction_claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+        RETURNING file_attachment, filename, content_type
+        """
+        with db.transaction() as cursor:
+            cursor.execute(query, (knowledge_id, EXTRACTION_CLAIM_SECONDS))
+            return cursor.fetchone()
+
+    async def _process(self, knowledge_id: str):
+        attachment = await asyncio.to_thread(self._claim, knowledge_id)
+        if attachment is None:
+            return
+
+        data = bytes(attachment["file_attachment"])
+
+        loop = asyncio.get_running_loop()
+        try:
+            text = await loop.run_in_executor(
+                self._pool, extract_text, data, attachment["filename"], attachment["content_type"]
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory on a huge PDF); the pool is unusable until replaced
+            logger.error(f"Extraction worker crashed on {attachment['filename']} for {knowledge_id}, restarting pool")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._create_pool()
+            text = None
+        except Exception as e:
+            # Mark it as processed anyway so a broken file is not retried on every sweep
+            logger.error(f"Failed to parse attachment {attachment['filename']} for {knowledge_id}: {e}")
+            text = None
+
+        # Only store the text if the attachment was not replaced in the meantime
+        query = """
+        UPDATE knowledge_base
+        SET attachment_text = %s, attachment_extracted_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND md5(file_attachment) = %s
+        """
+        await asyncio.to_thread(
+            db.execute_update, query, (text, knowledge_id, hashlib.md5(data).hexdigest())
+        )
+
+    def _pending_ids(self) -> List[str]:
+        query = """
+        SELECT id FROM knowledge_base
+        WHERE file_attachment IS NOT NULL AND attachment_extracted_at IS NULL
+          AND (attachment_extraction_claimed_at IS NULL
+               OR attachment_extraction_claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+        ORDER BY updated_at DESC
+        LIMIT %s
+        """
+        return [row["id"] for row in db.execute_query(query, (EXTRACTION_CLAIM_SECONDS, self.queue_size))]
+
+
+# Create a singleton instance
+extraction_worker = AttachmentExtractionWorker()
@@ -5,6 +5,7 @@ from psycopg.rows import dict_row
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import logging
+from contextlib import contextmanager
 
 load_dotenv()
 
@@ -28,25 +29,30 @@ class Database:
                 masked_url = DATABASE_URL.replace(DATABASE_URL.split(':')[2].split('@')[0], '***')
                 logger.info(f"Attempting to connect to database with URL: {masked_url}")
                 
-                self.conn = psycopg.connect(DATABASE_URL)
+                self.conn = self._open_connection()
                 logger.info(f"Connected to database: {DATABASE_URL.split('@')[1]}")
-                
-                # Register the UUID loader for this connection
-                from psycopg.adapt import Loader
-                
-                class UuidTextLoader(Loader):
-                    def load(self, data):
-                        if isinstance(data, memoryview):
-                            return bytes(data).decode('utf-8')
-                        return data.decode('utf-8')
-                
-                # Register the loader for the UUID type by name
-                self.conn.adapters.register_loader("uuid", UuidTextLoader)
             except Exception as e:
                 logger.error(f"Failed to connect to database: {e}")
                 raise
         return self.conn
     
+    @staticmethod
+    def _open_connection() -> psycopg.Connection:
+        conn = psycopg.connect(DATABASE_URL)
+        
+        # Register the UUID loader for this connection
+        from psycopg.adapt import Loader
+        
+        class UuidTextLoader(Loader):
+            def load(self, data):
+                if isinstance(data, memoryview):
+                    return bytes(data).decode('utf-8')
+                return data.decode('utf-8')
+        
+        # Register the loader for the UUID type by name
+        conn.adapters.register_loader("uuid", UuidTextLoader)
+        return conn
+    
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         conn = self.connect()
         with conn.cursor(row_factory=dict_row) as cursor:
@@ -115,5 +121,31 @@ class Database:
             conn.commit()
             return cursor.rowcount > 0
 
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: yields a dict_row cursor and commits once when the block
+        exits, or rolls back everything if any statement inside it fails.
+
+        The unit of work gets a connection of its own: the shared one is also
+        used by request threads and background jobs, whose commits and
+        rollbacks would otherwise land in the middle of it.
+
+        Usage:
+            with db.transaction() as cursor:
+                cursor.execute(...)
+                cursor.execute(...)
+        """
+        conn = self._open_connection()
+        try:
+            with conn.cursor(row_factory=dict_row) as cursor:
+                yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
 # Create a singleton instance
 db = Database()
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""
+Bulk ingestion of Markdown, plain text and PDF files into the knowledge base.
+
+A source can be a directory, a tar archive (optionally compressed) or a single
+file. Files are read and hashed in batches, files whose SHA-256 is already in
+knowledge_base.content_hash are skipped (so an interrupted run can simply be
+re-run), the remaining files are parsed in parallel in a process pool, and each
+batch is loaded with COPY into knowledge_base, knowledge_base_minhash,
+knowledge_base_lsh_buckets and knowledge_base_references in one transaction.
+
+Used by both scripts/ingest_knowledge.py and POST /api/knowledge/ingest.
+"""
+import hashlib
+import logging
+import mimetypes
+import multiprocessing
+import os
+import re
+import tarfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from attachment_extraction import detect_document_kind, extract_text, decode_text
+from database import Database
+import near_duplicates
+from similarity_index import similarity_index
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = int(os.getenv("KNOWLEDGE_INGEST_BATCH_SIZE", "200"))
+INGEST_WORKERS = int(os.getenv("KNOWLEDGE_INGEST_WORKERS", str(os.cpu_count() or 2)))
+# Server-side directory that POST /api/knowledge/ingest may read from; unset disables path ingestion
+INGEST_ROOT = os.getenv("KNOWLEDGE_INGEST_ROOT")
+MAX_ERRORS_KEPT = 50
+
+_MARKDOWN_TITLE = re.compile(r"^\s{0,3}#\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+class IngestionJob:
+    """Progress and throughput of one ingestion run"""
+
+    def __init__(self, source: str, name: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.name = name or source
+        self.status = "pending"
+        self.files_total = 0
+        self.files_processed = 0
+        self.documents_created = 0
+        self.files_skipped = 0
+        self.files_unsupported = 0
+        self.files_failed = 0
+        self.bytes_processed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def record_error(self, name: str, error: Exception):
+        self.files_failed += 1
+        if len(self.errors) < MAX_ERRORS_KEPT:
+            self.errors.append({"file": name, "error": str(error)})
+
+    def to_dict(self) -> Dict:
+        elapsed = self.elapsed_seconds
+        return {
+            "id": self.id,
+            "source": self.name,
+            "status": self.status,
+            "files_total": self.files_total,
+            "files_processed": self.files_processed,
+            "documents_created": self.documents_created,
+            "files_skipped": self.files_skipped,
+            "files_unsupported": self.files_unsupported,
+            "files_failed": self.files_failed,
+            "bytes_processed": self.bytes_processed,
+            "progress": round(self.files_processed / self.files_total, 4) if self.files_total else 0.0,
+            "elapsed_seconds": round(elapsed, 2),
+            "files_per_second": round(self.files_processed / elapsed, 2) if elapsed else 0.0,
+            "megabytes_per_second": round(self.bytes_processed / elapsed / 1_000_000, 3) if elapsed else 0.0,
+            "errors": self.errors,
+        }
+
+    def progress_line(self) -> str:
+        stats = self.to_dict()
+        return (
+            f"[{self.files_processed}/{self.files_total}] {stats['progress'] * 100:5.1f}% "
+            f"{stats['files_per_second']:.1f} files/s {stats['megabytes_per_second']:.2f} MB/s "
+            f"created={self.documents_created} skipped={self.files_skipped} failed={self.files_failed}"
+        )
+
+
+def resolve_ingest_path(path: str) -> str:
+    """Resolve a client-supplied path inside INGEST_ROOT, refusing anything outside it"""
+    if not INGEST_ROOT:
+        raise PermissionError("Server-side ingestion is disabled (KNOWLEDGE_INGEST_ROOT is not set)")
+    root = os.path.realpath(INGEST_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if resolved != root and not resolved.startswith(root + os.sep):
+        raise PermissionError("Path is outside KNOWLEDGE_INGEST_ROOT")
+    return resolved
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_member(archive: tarfile.TarFile, member: tarfile.TarInfo) -> bytes:
+    return archive.extractfile(member).read()
+
+
+def _is_hidden(name: str) -> bool:
+    return any(part.startswith(".") for part in name.split("/") if part)
+
+
+@contextmanager
+def open_source(source: str):
+    """Yield (name, reader) pairs for every file in a directory, tar archive or single file"""
+    if os.path.isdir(source):
+        entries = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, source)
+                if not _is_hidden(relative):
+                    entries.append((relative, partial(_read_file, path)))
+        yield entries
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, "r:*") as archive:
+            yield [
+                (member.name, partial(_read_member, archive, member))
+                for member in archive.getmembers()
+                if member.isfile() and not _is_hidden(member.name)
+            ]
+    elif os.path.isfile(source):
+        yield [(os.path.basename(source), partial(_read_file, source))]
+    else:
+        raise FileNotFoundError(f"Ingestion source not found: {source}")
+
+
+def _document_title(name: str, data: bytes, kind: str) -> str:
+    if kind == "markdown":
+        match = _MARKDOWN_TITLE.search(decode_text(data[:8192]))
+        if match:
+            return match.group(1)[:255]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return (stem.replace("_", " ").replace("-", " ").strip() or os.path.basename(name))[:255]
+
+
+def parse_document(name: str, data: bytes) -> Optional[Dict]:
+    """Turn one source file into a knowledge base row (runs inside a worker process)"""
+    content_type = mimetypes.guess_type(name)[0]
+    kind = detect_document_kind(name, content_type)
+    # Extracted text is normalised and truncated, so it only feeds the signature and the
+    # similarity index; Markdown and text files keep their original text as content
+    text = extract_text(data, name, content_type)
+    if not text:
+        return None
+
+    signature = near_duplicates.compute_signature(near_duplicates.signature_text(text, None))
+    bands, buckets = near_duplicates.band_buckets(signature) if signature is not None else ([], [])
+    return {
+        "document_name": _document_title(name, data, kind),
+        "content": text if kind == "pdf" else decode_text(data),
+        "index_text": text,
+        "filename": os.path.basename(name)[:255],
+        "content_type": content_type or ("text/markdown" if kind == "markdown" else "text/plain"),
+        "signature": near_duplicates.signature_to_bytes(signature) if signature is not None else None,
+        "bands": bands,
+        "buckets": buckets,
+    }
+
+
+def _existing_hashes(database: Database, hashes: List[str]) -> set:
+    rows = database.execute_query(
+        "SELECT content_hash FROM knowledge_base WHERE content_hash = ANY(%s)",
+        (hashes,)
+    )
+    return {row["content_hash"] for row in rows}
+
+
+def _copy_batch(database: Database, documents: List[Dict], references: List[tuple]):
+    """Load one batch of parsed documents and their references with COPY in a single transaction"""
+    with database.transaction() as cursor:
+        with cursor.copy(
+            "COPY knowledge_base (id, document_name, content, filename, content_type, content_hash) FROM STDIN"
+        ) as copy:
+            for doc in documents:
+                copy.write_row((
+                    doc["id"], doc["document_name"], doc["content"],
+                    doc["filename"], doc["content_type"], doc["content_hash"]
+                ))
+        with cursor.copy("COPY knowledge_base_minhash (knowledge_base_id, signature) FROM STDIN") as copy:
+            for doc in documents:
+                if doc["signature"] is not None:
+                    copy.write_row((doc["id"], doc["signature"]))
+        with cursor.copy("COPY knowledge_base_lsh_buckets (knowledge_base_id, band, bucket) FROM STDIN") as copy:
+            for doc in documents:
+                for band, bucket in zip(doc["bands"], doc["buckets"]):
+                    copy.write_row((doc["id"], band, bucket))
+        if references:
+            with cursor.copy(
+                "COPY knowledge_base_references (knowledge_base_id, entity_type, entity_id) FROM STDIN"
+            ) as copy:
+                for doc in documents:
+                    for entity_type, entity_id in references:
+                        copy.write_row((doc["id"], entity_type, entity_id))
+
+
+def _index_batch(database: Database, documents: List[Dict]):
+    rows = database.execute_query(
+        "SELECT id, updated_at FROM knowledge_base WHERE id = ANY(%s::uuid[])",
+        ([doc["id"] for doc in documents],)
+    )
+    versions = {row["id"]: row["updated_at"].isoformat() for row in rows}
+    similarity_index.upsert_many(
+        (doc["id"], doc["index_text"], None, versions.get(doc["id"]))
+        for doc in documents
+    )
+
+
+def run_ingestion(job: IngestionJob, related_projects: Optional[List[str]] = None,
+                  related_goals: Optional[List[str]] = None, related_tasks: Optional[List[str]] = None,
+                  batch_size: int = INGEST_BATCH_SIZE, workers: int = INGEST_WORKERS,
+                  on_progress: Optional[Callable[[IngestionJob], None]] = None) -> IngestionJob:
+    """Ingest every supported file of job.source; blocking, so run it in a thread from async code"""
+    # Deduplicated after normalising, since the same id may be passed in different spellings
+    references = list(dict.fromkeys(
+        (entity_type, str(uuid.UUID(entity_id)))
+        for entity_type, entity_ids in (
+            ("project", related_projects), ("goal", related_goals), ("task", related_tasks)
+        )
+        for entity_id in entity_ids or []
+    ))
+
+    # Own connection, so batch transactions never interleave with API requests on the shared one
+    database = Database()
+    job.status = "running"
+    job.started_at = time.time()
+    seen_hashes = set()
+    try:
+        with open_source(job.source) as entries, ProcessPoolExecutor(
+            max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            supported = [
+                (name, reader) for name, reader in entries
+                if detect_document_kind(name, mimetypes.guess_type(name)[0])
+            ]
+            job.files_unsupported = len(entries) - len(supported)
+            job.files_total = len(supported)
+
+            for start in range(0, len(supported), batch_size):
+                batch = []
+                for name, reader in supported[start:start + batch_size]:
+                    try:
+                        data = reader()
+                    except Exception as e:
+                        job.record_error(name, e)
+                        continue
+                    job.bytes_processed += len(data)
+                    batch.append((name, data, hashlib.sha256(data).hexdigest()))
+
+                # Resume support: skip files that were ingested before or appear twice in this run
+                existing = _existing_hashes(database, [content_hash for _, _, content_hash in batch]) if batch else set()
+                pending = []
+                for name, data, content_hash in batch:
+                    if content_hash in existing or content_hash in seen_hashes:
+                        job.files_skipped += 1
+                    else:
+                        seen_hashes.add(content_hash)
+                        pending.append((name, data, content_hash))
+
+                futures = [
+                    (name, content_hash, pool.submit(parse_document, name, data))
+                    for name, data, content_hash in pending
+                ]
+                documents = []
+                for name, content_hash, future in futures:
+                    try:
+                        parsed = future.result()
+                    except Exception as e:
+                        job.record_error(name, e)
+                        continue
+                    if parsed is None:
+                        job.files_skipped += 1
+                        continue
+                    parsed["id"] = str(uuid.uuid4())
+                    parsed["content_hash"] = content_hash
+                    documents.append(parsed)
+
+                if documents:
+                    _copy_batch(database, documents, references)
+                    job.documents_created += len(documents)
+                    try:
+                        _index_batch(database, documents)
+                    except Exception as e:
+                        logger.error(f"Error updating similarity index during ingestion: {e}")
+
+                job.files_processed = min(start + batch_size, job.files_total)
+                if on_progress:
+                    on_progress(job)
+
+        job.status = "completed"
+    except Exception as e:
+        logger.error(f"Knowledge ingestion of {job.name} failed: {e}")
+        job.status = "failed"
+        job.errors.append({"file": job.name, "error": str(e)})
+    finally:
+        job.finished_at = time.time()
+        if database.conn:
+            database.conn.close()
+    return job
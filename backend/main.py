@@ -2,6 +2,18 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import api_router
+from api.chat import (
+    init_redis_pool, close_redis_pool,
+    start_session_index_maintenance, stop_session_index_maintenance,
+    start_chat_job_workers, stop_chat_job_workers,
+    start_chat_archiver, stop_chat_archiver,
+    start_chat_search_indexer, stop_chat_search_indexer
+)
+from attachment_extraction import extraction_worker
+from n8n_client import n8n_client
+from similarity_index import similarity_index
+from near_duplicates import backfill_signatures
+import asyncio
 import logging
 import json
 
@@ -70,6 +82,22 @@ def health_check():
 
 @app.on_event("startup")
 async def startup_event():
+    init_redis_pool()
+    n8n_client.start()
+    n8n_client.start_health_monitor()
+    start_chat_job_workers()
+    start_session_index_maintenance()
+    start_chat_archiver()
+    start_chat_search_indexer()
+    await extraction_worker.start()
+    try:
+        await asyncio.to_thread(similarity_index.sync_with_database)
+    except Exception as e:
+        logger.error(f"Failed to build knowledge similarity index: {e}")
+    try:
+        await asyncio.to_thread(backfill_signatures)
+    except Exception as e:
+        logger.error(f"Failed to backfill knowledge MinHash signatures: {e}")
     logger.info(f"Application started in {APP_ENV} mode")
     if DEBUG:
         logger.debug("Debug mode is enabled")
@@ -77,4 +105,11 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down")
+    await extraction_worker.stop()
+    await stop_chat_job_workers()
+    await stop_session_index_maintenance()
+    await stop_chat_archiver()
+    await stop_chat_search_indexer()
+    await close_redis_pool()
+    await n8n_client.stop()
 
@@ -184,6 +184,11 @@ class KnowledgeBaseUpdate(BaseModel):
     ai_summary: Optional[str] = None
     link_citations: Optional[List[str]] = None
 
+class KnowledgeBaseReferencesUpdate(BaseModel):
+    related_projects: List[str] = []
+    related_goals: List[str] = []
+    related_tasks: List[str] = []
+
 class KnowledgeBase(KnowledgeBaseBase):
     id: str
     date_added: date
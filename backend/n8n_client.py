@@ -0,0 +1,284 @@
+"""
+Shared HTTP client for calls from the backend to n8n.
+
+One AsyncClient lives for the whole application, so chat turns reuse
+keep-alive connections instead of paying TCP setup and a cold pool on every
+request. In-flight counters show how close the pool is to saturation.
+
+A circuit breaker stops calls to n8n while it is known to be down, and a
+background health monitor keeps a cached result of n8n's /healthz.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Get n8n URL from environment or use default
+N8N_URL = os.getenv("N8N_URL", "http://n8n:5678")
+
+N8N_MAX_CONNECTIONS = int(os.getenv("N8N_MAX_CONNECTIONS", "100"))
+N8N_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("N8N_MAX_KEEPALIVE_CONNECTIONS", "20"))
+N8N_KEEPALIVE_EXPIRY = float(os.getenv("N8N_KEEPALIVE_EXPIRY", "30"))
+N8N_CONNECT_TIMEOUT = float(os.getenv("N8N_CONNECT_TIMEOUT", "5"))
+# Agent workflows can run for minutes before n8n answers
+N8N_READ_TIMEOUT = float(os.getenv("N8N_READ_TIMEOUT", "300"))
+N8N_WRITE_TIMEOUT = float(os.getenv("N8N_WRITE_TIMEOUT", "30"))
+# How long a request may wait for a free pooled connection
+N8N_POOL_TIMEOUT = float(os.getenv("N8N_POOL_TIMEOUT", "10"))
+
+# Consecutive failures that open the circuit, and how long it stays open
+# before one trial request is let through (half-open)
+N8N_BREAKER_FAILURE_THRESHOLD = int(os.getenv("N8N_BREAKER_FAILURE_THRESHOLD", "5"))
+N8N_BREAKER_RESET_SECONDS = float(os.getenv("N8N_BREAKER_RESET_SECONDS", "30"))
+N8N_HEALTH_CHECK_INTERVAL = float(os.getenv("N8N_HEALTH_CHECK_INTERVAL", "15"))
+N8N_HEALTH_CHECK_TIMEOUT = float(os.getenv("N8N_HEALTH_CHECK_TIMEOUT", "5"))
+
+# Responses that mean n8n (or the proxy in front of it) is down, not that one turn failed
+N8N_UNAVAILABLE_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling n8n while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"n8n service is unavailable, retry in {self.retry_after}s")
+
+
+class CircuitBreaker:
+    """
+    closed: requests pass; N8N_BREAKER_FAILURE_THRESHOLD consecutive failures open it.
+    open: requests fail at once for N8N_BREAKER_RESET_SECONDS.
+    half_open: one trial request passes; success closes the circuit, failure reopens it.
+    A passing health check closes the circuit from either state, so recovery
+    never waits on a trial chat turn that may run for minutes.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened_total = 0
+        self.rejected_total = 0
+        self._trial_in_flight = False
+
+    def _retry_after(self) -> float:
+        return self.reset_timeout - (time.monotonic() - self.opened_at)
+
+    def check(self):
+        """Raise CircuitOpenError if a request would be rejected right now (does not take the trial)"""
+        if self.state == "open" and self._retry_after() > 0:
+            self.rejected_total += 1
+            raise CircuitOpenError(self._retry_after())
+        if self.state == "half_open" and self._trial_in_flight:
+            self.rejected_total += 1
+            raise CircuitOpenError(1)
+
+    def before_request(self) -> bool:
+        """Admit a request or raise CircuitOpenError; True if it is the half-open trial"""
+        self.check()
+        if self.state == "open":
+            self.state = "half_open"
+            logger.info("n8n circuit half-open, sending a trial request")
+        if self.state == "half_open":
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def end_trial(self):
+        # The trial may end without an outcome (e.g. cancelled); let the next one through
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != "closed":
+            logger.info("n8n circuit closed")
+        self.state = "closed"
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.trip(f"{self.failures} consecutive failures")
+
+    def trip(self, reason: str):
+        if self.state != "open":
+            self.opened_total += 1
+            logger.warning(f"n8n circuit opened: {reason}")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def probe_succeeded(self):
+        """A health check passed; close the circuit without waiting for a trial request"""
+        self.failures = 0
+        if self.state != "closed":
+            logger.info("n8n health check passed, circuit closed")
+        self.state = "closed"
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": max(0, round(self._retry_after(), 1)) if self.state == "open" else 0,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+class N8nClient:
+    """App-lifetime httpx.AsyncClient with pool usage metrics"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+        self.request_errors = 0
+        self.pool_timeouts = 0
+        self.breaker = CircuitBreaker(N8N_BREAKER_FAILURE_THRESHOLD, N8N_BREAKER_RESET_SECONDS)
+        # Last /healthz result, refreshed by the health monitor
+        self.health: Optional[Dict[str, Any]] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=N8N_MAX_CONNECTIONS,
+                    max_keepalive_connections=N8N_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=N8N_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(
+                    connect=N8N_CONNECT_TIMEOUT,
+                    read=N8N_READ_TIMEOUT,
+                    write=N8N_WRITE_TIMEOUT,
+                    pool=N8N_POOL_TIMEOUT
+                )
+            )
+            logger.info(f"n8n HTTP client started (max {N8N_MAX_CONNECTIONS} connections)")
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazily started, e.g. when the router is used without the app lifecycle
+        self.start()
+        return self._client
+
+    @asynccontextmanager
+    async def _tracked(self):
+        trial = self.breaker.before_request()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.requests_total += 1
+        try:
+            yield
+        except httpx.PoolTimeout:
+            # Our own pool is saturated; says nothing about n8n's health
+            self.pool_timeouts += 1
+            logger.warning(f"n8n connection pool saturated ({self.in_flight} requests in flight)")
+            raise
+        except httpx.RequestError:
+            self.request_errors += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.in_flight -= 1
+            if trial:
+                self.breaker.end_trial()
+
+    def _record_response(self, response: httpx.Response):
+        if response.status_code in N8N_UNAVAILABLE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the circuit breaker; raises CircuitOpenError while it is open"""
+        async with self._tracked():
+            response = await self.client.request(method, url, **kwargs)
+            self._record_response(response)
+            return response
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Like httpx.AsyncClient.stream; the request counts as in flight until the body is consumed"""
+        async with self._tracked():
+            async with self.client.stream(method, url, **kwargs) as response:
+                self._record_response(response)
+                yield response
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def check_health(self) -> Dict[str, Any]:
+        """Probe n8n's /healthz (bypassing the breaker) and update the cached health and the breaker"""
+        started = time.monotonic()
+        try:
+            response = await self.client.get(f"{N8N_URL}/healthz", timeout=N8N_HEALTH_CHECK_TIMEOUT)
+            if response.status_code == 200:
+                health = {"status": "healthy", "n8n_connection": "ok"}
+                self.breaker.probe_succeeded()
+            else:
+                health = {"status": "degraded", "n8n_connection": "error", "error": response.text}
+                self.breaker.trip(f"health check returned {response.status_code}")
+        except httpx.RequestError as e:
+            health = {"status": "unhealthy", "n8n_connection": "failed", "error": str(e) or type(e).__name__}
+            self.breaker.trip(f"health check failed: {health['error']}")
+        health["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        health["checked_at"] = datetime.now(timezone.utc).isoformat()
+        self.health = health
+        return health
+
+    async def _monitor_health(self):
+        while True:
+            try:
+                await self.check_health()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"n8n health check failed: {e}")
+            await asyncio.sleep(N8N_HEALTH_CHECK_INTERVAL)
+
+    def start_health_monitor(self):
+        """Check n8n's health now and then every N8N_HEALTH_CHECK_INTERVAL seconds"""
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._monitor_health())
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": N8N_MAX_CONNECTIONS,
+            "max_keepalive_connections": N8N_MAX_KEEPALIVE_CONNECTIONS,
+            # Requests beyond max_connections wait for a pooled connection
+            "waiting_for_connection": max(0, self.in_flight - N8N_MAX_CONNECTIONS),
+            "pool_saturation": round(min(1.0, self.in_flight / N8N_MAX_CONNECTIONS), 3),
+            "requests_total": self.requests_total,
+            "request_errors": self.request_errors,
+            "pool_timeouts": self.pool_timeouts,
+            "circuit": self.breaker.metrics(),
+        }
+
+
+# Create a singleton instance
+n8n_client = N8nClient()
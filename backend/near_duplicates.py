@@ -0,0 +1,281 @@
+"""
+Near-duplicate detection for knowledge base documents using MinHash and LSH.
+
+Every document gets a 128-value MinHash signature over its word 3-gram
+shingles (stored as 512 bytes in knowledge_base_minhash). The signature is
+cut into 16 bands of 8 rows, and each band is hashed into a bucket stored in
+knowledge_base_lsh_buckets. Documents that share a bucket in any band are
+candidates, so a duplicate check is one indexed lookup instead of a scan over
+every row. Candidates are then confirmed by comparing signatures.
+"""
+import hashlib
+import logging
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity above which two documents are reported as duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("KNOWLEDGE_DUPLICATE_THRESHOLD", "0.8"))
+
+# Universal hashing (a * x + b) mod p with p < 2**32, so a * x + b never overflows uint64
+_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20251015)  # fixed seed: signatures must be stable across processes
+_A = _rng.integers(1, int(_PRIME), size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), size=NUM_PERMUTATIONS, dtype=np.uint64)
+_SHINGLE_CHUNK = 4096
+
+_WORD = re.compile(r"\w+")
+
+
+def signature_text(content: Optional[str], ai_summary: Optional[str]) -> str:
+    """The text a document is deduplicated on: its content, or its summary if it has none"""
+    if content and content.strip():
+        return content
+    return ai_summary or ""
+
+
+def shingles(text: str) -> np.ndarray:
+    """Hashes of the distinct word 3-grams in a text"""
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def compute_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature as a uint32 array, or None if the text has no words"""
+    hashes = shingles(text)
+    if len(hashes) == 0:
+        return None
+    signature = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), _SHINGLE_CHUNK):
+        chunk = hashes[start:start + _SHINGLE_CHUNK, None]
+        permuted = (chunk * _A + _B) % _PRIME
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4")
+
+
+def band_buckets(signature: np.ndarray) -> Tuple[List[int], List[int]]:
+    """Parallel (band, bucket) arrays for the LSH index"""
+    raw = signature_to_bytes(signature)
+    band_size = ROWS_PER_BAND * 4
+    bands = list(range(LSH_BANDS))
+    buckets = [
+        int.from_bytes(
+            hashlib.blake2b(raw[band * band_size:(band + 1) * band_size], digest_size=8).digest(),
+            "big", signed=True
+        )
+        for band in bands
+    ]
+    return bands, buckets
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERMUTATIONS
+
+
+def store_signatures(cursor, documents: Dict[str, Optional[np.ndarray]]):
+    """
+    Upsert signatures and LSH buckets for several documents using the caller's
+    transaction cursor. Documents whose signature is None are removed from the index.
+    """
+    present = {knowledge_id: sig for knowledge_id, sig in documents.items() if sig is not None}
+    missing = [knowledge_id for knowledge_id, sig in documents.items() if sig is None]
+
+    if missing:
+        cursor.execute("DELETE FROM knowledge_base_lsh_buckets WHERE knowledge_base_id = ANY(%s::uuid[])", (missing,))
+        cursor.execute("DELETE FROM knowledge_base_minhash WHERE knowledge_base_id = ANY(%s::uuid[])", (missing,))
+    if not present:
+        return
+
+    ids = list(present)
+    cursor.execute(
+        """
+        INSERT INTO knowledge_base_minhash (knowledge_base_id, signature)
+        SELECT * FROM unnest(%s::uuid[], %s::bytea[])
+        ON CONFLICT (knowledge_base_id) DO UPDATE SET signature = EXCLUDED.signature
+        """,
+        (ids, [signature_to_bytes(present[knowledge_id]) for knowledge_id in ids])
+    )
+
+    # Every signature has exactly LSH_BANDS bands, so an upsert replaces the old buckets
+    bucket_ids, bands, buckets = [], [], []
+    for knowledge_id in ids:
+        doc_bands, doc_buckets = band_buckets(present[knowledge_id])
+        bucket_ids.extend([knowledge_id] * len(doc_bands))
+        bands.extend(doc_bands)
+        buckets.extend(doc_buckets)
+    cursor.execute(
+        """
+        INSERT INTO knowledge_base_lsh_buckets (knowledge_base_id, band, bucket)
+        SELECT * FROM unnest(%s::uuid[], %s::smallint[], %s::bigint[])
+        ON CONFLICT (knowledge_base_id, band) DO UPDATE SET bucket = EXCLUDED.bucket
+        """,
+        (bucket_ids, bands, buckets)
+    )
+
+
+def find_duplicates(signature: Optional[np.ndarray], threshold: float = DUPLICATE_THRESHOLD,
+                    exclude_id: Optional[str] = None) -> List[Dict]:
+    """Existing documents whose estimated similarity to a signature is at least threshold"""
+    if signature is None:
+        return []
+    bands, buckets = band_buckets(signature)
+    query = """
+    SELECT kb.id, kb.document_name, m.signature
+    FROM knowledge_base kb
+    JOIN knowledge_base_minhash m ON m.knowledge_base_id = kb.id
+    WHERE kb.id IN (
+        SELECT b.knowledge_base_id
+        FROM knowledge_base_lsh_buckets b
+        JOIN unnest(%s::smallint[], %s::bigint[]) AS q(band, bucket)
+          ON b.band = q.band AND b.bucket = q.bucket
+    )
+    """
+    duplicates = []
+    for row in db.execute_query(query, (bands, buckets)):
+        if row["id"] == exclude_id:
+            continue
+        similarity = estimate_similarity(signature, signature_from_bytes(row["signature"]))
+        if similarity >= threshold:
+            duplicates.append({
+                "id": row["id"],
+                "document_name": row["document_name"],
+                "similarity": round(similarity, 3)
+            })
+    duplicates.sort(key=lambda d: d["similarity"], reverse=True)
+    return duplicates
+
+
+def duplicate_report(threshold: float = DUPLICATE_THRESHOLD) -> Dict:
+    """Group every indexed document into clusters of likely duplicates"""
+    groups = db.execute_query("""
+    SELECT array_agg(knowledge_base_id::text ORDER BY knowledge_base_id) AS ids
+    FROM knowledge_base_lsh_buckets
+    GROUP BY band, bucket
+    HAVING count(*) > 1
+    """)
+    pairs = set()
+    for group in groups:
+        ids = group["ids"]
+        for i in range(len(ids)):
+            for j in range(i + 1, len(ids)):
+                pairs.add((ids[i], ids[j]))
+
+    candidate_ids = sorted({knowledge_id for pair in pairs for knowledge_id in pair})
+    rows = db.execute_query(
+        """
+        SELECT kb.id, kb.document_name, kb.updated_at, m.signature
+        FROM knowledge_base kb
+        JOIN knowledge_base_minhash m ON m.knowledge_base_id = kb.id
+        WHERE kb.id = ANY(%s::uuid[])
+        """,
+        (candidate_ids,)
+    ) if candidate_ids else []
+    documents = {row["id"]: row for row in rows}
+    signatures = {knowledge_id: signature_from_bytes(row["signature"]) for knowledge_id, row in documents.items()}
+
+    # Union-find over confirmed pairs
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    cluster_similarity = {}
+    for a, b in pairs:
+        if a not in signatures or b not in signatures:
+            continue
+        similarity = estimate_similarity(signatures[a], signatures[b])
+        if similarity < threshold:
+            continue
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+        root = find(a)
+        cluster_similarity[root] = min(
+            similarity,
+            cluster_similarity.pop(root_a, 1.0),
+            cluster_similarity.pop(root_b, 1.0)
+        )
+
+    clusters: Dict[str, List[str]] = {}
+    for knowledge_id in parent:
+        clusters.setdefault(find(knowledge_id), []).append(knowledge_id)
+
+    report = []
+    for root, members in clusters.items():
+        members.sort(key=lambda knowledge_id: documents[knowledge_id]["updated_at"], reverse=True)
+        report.append({
+            "min_similarity": round(cluster_similarity.get(root, 1.0), 3),
+            "documents": [
+                {
+                    "id": knowledge_id,
+                    "document_name": documents[knowledge_id]["document_name"],
+                    "updated_at": documents[knowledge_id]["updated_at"].isoformat()
+                }
+                for knowledge_id in members
+            ]
+        })
+    report.sort(key=lambda cluster: len(cluster["documents"]), reverse=True)
+
+    return {
+        "threshold": threshold,
+        "clusters": report,
+        "duplicate_documents": sum(len(cluster["documents"]) - 1 for cluster in report)
+    }
+
+
+def backfill_signatures(batch_size: int = 500):
+    """Compute signatures for documents that do not have one yet (e.g. rows written directly by n8n)"""
+    last_id = "00000000-0000-0000-0000-000000000000"
+    total = 0
+    while True:
+        rows = db.execute_query(
+            """
+            SELECT kb.id, kb.content, kb.ai_summary
+            FROM knowledge_base kb
+            LEFT JOIN knowledge_base_minhash m ON m.knowledge_base_id = kb.id
+            WHERE m.knowledge_base_id IS NULL AND kb.id > %s::uuid
+            ORDER BY kb.id
+            LIMIT %s
+            """,
+            (last_id, batch_size)
+        )
+        if not rows:
+            break
+        signatures = {
+            row["id"]: compute_signature(signature_text(row["content"], row["ai_summary"]))
+            for row in rows
+        }
+        with db.transaction() as cursor:
+            store_signatures(cursor, signatures)
+        total += len(rows)
+        last_id = rows[-1]["id"]
+    if total:
+        logger.info(f"Computed MinHash signatures for {total} knowledge base items")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Chat Restore Benchmark for Event Horizon
+
+Writes a synthetic n8n chat session (default 5,000 messages) to Redis and
+compares the old full restore (LRANGE 0 -1, parse everything, list.index per
+message) with the windowed restore and "load older" pages.
+
+Usage:
+    REDIS_HOST=localhost python scripts/benchmark_chat_restore.py --messages 5000 --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add the parent directory to Python path to import backend modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import chat
+
+
+def make_message(i: int) -> str:
+    """A message shaped like n8n's LangChain chat memory entries"""
+    if i % 2:
+        content = json.dumps({
+            "direct_response_to_user": f"Agent reply {i}: " + "lorem ipsum dolor sit amet " * 12,
+            "agent_to_route_to": "Project Planner",
+            "forwarded_message": "",
+            "project_data": None
+        })
+        return json.dumps({"type": "ai", "data": {"content": content, "tool_calls": [], "additional_kwargs": {}}})
+    content = (
+        f"User's Most Recent Chat Input: question number {i}\n---\n"
+        "List of Projects from Database:\n" + json.dumps([{"id": str(uuid.UUID(int=i)), "name": "Demo"}] * 5)
+    )
+    return json.dumps({"type": "human", "data": {"content": content, "additional_kwargs": {}}})
+
+
+async def legacy_restore(r, session_id: str):
+    """The pre-windowing implementation, kept here as the baseline"""
+    messages_raw = await r.lrange(session_id, 0, -1)
+    messages_raw.reverse()
+    formatted = []
+    for msg_raw in messages_raw:
+        msg_wrapper = json.loads(msg_raw)
+        if msg_wrapper["type"] == "ai":
+            content = json.loads(msg_wrapper["data"]["content"]).get("direct_response_to_user", "")
+            formatted.append({"role": "agent", "content": content})
+        else:
+            content = chat.parse_user_message(msg_wrapper["data"]["content"])
+            if len(formatted) > 0 or messages_raw.index(msg_raw) > 0:
+                formatted.append({"role": "user", "content": content})
+    return formatted
+
+
+async def measure(label: str, runs: int, func):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<34} median {statistics.median(timings):8.2f} ms   p95 {sorted(timings)[int(0.95 * (len(timings) - 1))]:8.2f} ms")
+
+
+async def run(message_count: int, runs: int, page_size: int):
+    r = chat.get_redis_client()
+    session_id = f"2000-01-01T00:00:00.{message_count:03d}Z"  # never collides with a real session
+    await r.delete(session_id)
+
+    async with r.pipeline(transaction=False) as pipe:
+        for i in range(message_count):
+            pipe.lpush(session_id, make_message(i))
+        await pipe.execute()
+    print(f"Session {session_id}: {message_count} messages, {await r.memory_usage(session_id) / 1_000_000:.1f} MB")
+    print("=" * 70)
+
+    try:
+        await measure("legacy full restore", runs, lambda: legacy_restore(r, session_id))
+        await measure("windowed restore, all messages", runs, lambda: chat._load_message_window(r, session_id, None, None))
+        await measure(f"windowed restore, newest {page_size}", runs, lambda: chat._load_message_window(r, session_id, page_size, None))
+        await measure(f"load older, {page_size} from the middle", runs,
+                      lambda: chat._load_message_window(r, session_id, page_size, message_count // 2))
+        await measure(f"load older, {page_size} oldest", runs,
+                      lambda: chat._load_message_window(r, session_id, page_size, page_size))
+    finally:
+        await r.delete(session_id)
+        await chat.close_redis_pool()
+
+
+def main():
+    """Main function to run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark full vs windowed chat restore")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages in the synthetic session")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per scenario")
+    parser.add_argument("--page-size", type=int, default=50, help="Window size")
+    args = parser.parse_args()
+
+    print("Event Horizon Chat Restore Benchmark")
+    print("=" * 70)
+    asyncio.run(run(args.messages, args.runs, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Fake n8n Server for Event Horizon
+
+A local stand-in for the n8n project-planner workflow, so the chat endpoints
+can be exercised without n8n. It answers the same webhooks the backend calls:
+
+    POST /n8n/project-planner        start or restore a session
+    POST /webhook-waiting/{id}       continue a session (resumeUrl)
+    GET  /healthz
+
+With --stream it answers like an n8n webhook in streaming response mode:
+newline-delimited JSON chunks ({"type": "begin" | "item" | "end", ...}),
+with the final resumeUrl/sessionId object sent as the last item.
+
+For load tests, the latency can follow a log-normal distribution
+(--latency is the median, --latency-sigma the spread), a fraction of turns
+can fail (--error-rate), and replies and stored contexts can be made large
+(--reply-words, --context-kb). With --redis every turn is written to Redis
+chat memory the way n8n's agent does it, so the sessions list, restore and
+search see the conversations (REDIS_HOST/REDIS_PORT/REDIS_PASSWORD as for
+the backend).
+
+Usage:
+    python scripts/fake_n8n.py --port 5679 --stream --chunk-delay 0.05
+    python scripts/fake_n8n.py --port 5679 --redis --latency 0.8 --latency-sigma 0.5 --error-rate 0.01
+    N8N_URL=http://localhost:5679 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import redis.asyncio as aioredis
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake n8n")
+
+# Set from the command line in main()
+settings = argparse.Namespace(
+    stream=False, chunk_delay=0.05, latency=0.0, latency_sigma=0.0, error_rate=0.0, error_status=500,
+    reply_words=0, context_kb=4, redis=False, public_url="http://localhost:5679"
+)
+redis_client: Optional[aioredis.Redis] = None
+last_session_start: Optional[datetime] = None
+
+FILLER = ("goal task milestone deadline budget review scope risk owner estimate "
+          "dependency sprint backlog release feedback").split()
+
+STARTING_PROMPT = "Start a new project planning conversation with the user."
+
+
+def new_session_id() -> str:
+    """Millisecond ISO timestamp like n8n's, moved forward on collisions so concurrent starts get separate sessions"""
+    global last_session_start
+    now = datetime.now(timezone.utc)
+    started = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    if last_session_start is not None and started <= last_session_start:
+        started = last_session_start + timedelta(milliseconds=1)
+    last_session_start = started
+    return started.isoformat(timespec="milliseconds")
+
+
+def agent_reply(chat_input: str) -> str:
+    if not chat_input:
+        reply = "Welcome to the Project Planning Assistant! What would you like to plan today?"
+    else:
+        reply = f"You said: {chat_input}. Let's break that down into goals and tasks for your project."
+    if settings.reply_words:
+        reply += " " + " ".join(random.choice(FILLER) for _ in range(settings.reply_words))
+    return reply
+
+
+def project_context(size: int) -> str:
+    """A "List of Projects from Database" blob of about `size` bytes"""
+    projects = []
+    length = 2
+    while length < size:
+        project = {
+            "id": str(uuid.uuid4()),
+            "name": " ".join(random.choices(FILLER, k=3)).title(),
+            "description": " ".join(random.choices(FILLER, k=20)),
+            "status": random.choice(["Active", "Planning", "Completed"]),
+        }
+        projects.append(project)
+        length += len(json.dumps(project)) + 2
+    return json.dumps(projects)
+
+
+def human_message(chat_input: str, session_id: str, context: str) -> str:
+    """A human chat memory message as n8n's agent stores it: the input plus the project context"""
+    content = (
+        f"User's Most Recent Chat Input: {chat_input}\n---\n"
+        f"List of Projects from Database:\n{context}\n"
+        f"sessionId: {session_id}\n"
+        f"resumeUrl: {settings.public_url}/webhook-waiting/{uuid.uuid4().hex[:12]}"
+    )
+    return json.dumps({"type": "human", "data": {"content": content, "additional_kwargs": {}, "response_metadata": {}}})
+
+
+def ai_message(reply: str) -> str:
+    """An AI chat memory message; the content is the agent's structured output"""
+    content = json.dumps({
+        "direct_response_to_user": reply,
+        "agent_to_route_to": "Project Planner",
+        "forwarded_message": "",
+        "project_data": None,
+    })
+    return json.dumps({"type": "ai", "data": {
+        "content": content, "tool_calls": [], "invalid_tool_calls": [], "additional_kwargs": {}, "response_metadata": {}
+    }})
+
+
+async def remember_turn(session_id: str, chat_input: str, reply: str):
+    """LPUSH the turn onto the session's chat memory list, like n8n's Redis chat memory node"""
+    human = human_message(chat_input or STARTING_PROMPT, session_id, project_context(settings.context_kb * 1024))
+    await redis_client.lpush(session_id, human, ai_message(reply))
+
+
+def response_latency() -> float:
+    if not settings.latency:
+        return 0.0
+    if not settings.latency_sigma:
+        return settings.latency
+    return settings.latency * random.lognormvariate(0, settings.latency_sigma)
+
+
+def final_fields(session_id: str) -> dict:
+    return {
+        "resumeUrl": f"{settings.public_url}/webhook-waiting/{uuid.uuid4().hex[:12]}",
+        "sessionId": session_id,
+    }
+
+
+async def stream_chunks(reply: str, session_id: str):
+    node = {"nodeId": "agent", "nodeName": "Project Planner Agent"}
+    yield json.dumps({"type": "begin", "metadata": node}) + "\n"
+    for i, word in enumerate(reply.split(" ")):
+        await asyncio.sleep(settings.chunk_delay)
+        yield json.dumps({"type": "item", "content": word if i == 0 else " " + word, "metadata": node}) + "\n"
+    yield json.dumps({"type": "item", "content": json.dumps(final_fields(session_id)), "metadata": node}) + "\n"
+    yield json.dumps({"type": "end", "metadata": node}) + "\n"
+
+
+async def handle_turn(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    session_id = body.get("sessionId") or new_session_id()
+    chat_input = body.get("chatInput") or ""
+    reply = agent_reply(chat_input)
+
+    latency = response_latency()
+    if latency:
+        await asyncio.sleep(latency)
+
+    if random.random() < settings.error_rate:
+        return JSONResponse({"code": 0, "message": "Error in workflow"}, status_code=settings.error_status)
+
+    if redis_client is not None:
+        await remember_turn(session_id, chat_input, reply)
+
+    if settings.stream:
+        return StreamingResponse(stream_chunks(reply, session_id), media_type="application/json")
+    return JSONResponse({"agentResponse": reply, **final_fields(session_id)})
+
+
+@app.on_event("startup")
+async def startup_event():
+    global redis_client
+    if settings.redis:
+        redis_client = aioredis.Redis(
+            host=os.getenv("REDIS_HOST", "redis"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            password=os.getenv("REDIS_PASSWORD", "n8n_password"),
+            decode_responses=True
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if redis_client is not None:
+        await redis_client.aclose()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.post("/n8n/project-planner")
+async def project_planner(request: Request):
+    return await handle_turn(request)
+
+
+@app.post("/webhook-waiting/{execution_id}")
+async def webhook_waiting(execution_id: str, request: Request):
+    return await handle_turn(request)
+
+
+def main():
+    """Main function to run the fake n8n server"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the n8n chat webhooks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5679)
+    parser.add_argument("--stream", action="store_true", help="Answer with n8n's streaming (NDJSON) response format")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="Seconds between streamed chunks")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before answering (median with --latency-sigma)")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="Spread of a log-normal latency distribution (0: always --latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of turns that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of failed turns")
+    parser.add_argument("--reply-words", type=int, default=0, help="Extra words appended to every agent reply")
+    parser.add_argument("--context-kb", type=int, default=4, help="Size of the project context stored with each human message")
+    parser.add_argument("--redis", action="store_true", help="Write every turn to Redis chat memory like n8n")
+    parser.add_argument("--public-url", default=None, help="Base URL used in resumeUrl (default: http://host:port)")
+    args = parser.parse_args()
+
+    settings.stream = args.stream
+    settings.chunk_delay = args.chunk_delay
+    settings.latency = args.latency
+    settings.latency_sigma = args.latency_sigma
+    settings.error_rate = args.error_rate
+    settings.error_status = args.error_status
+    settings.reply_words = args.reply_words
+    settings.context_kb = args.context_kb
+    settings.redis = args.redis
+    settings.public_url = args.public_url or f"http://{args.host}:{args.port}"
+
+    print(f"Fake n8n listening on http://{args.host}:{args.port} ({'streaming' if args.stream else 'JSON'} responses"
+          f"{', writing chat memory to Redis' if args.redis else ''})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
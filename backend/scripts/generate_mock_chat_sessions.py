@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Mock Chat Session Generator for Event Horizon
+
+Writes synthetic chat sessions to Redis in the format n8n's chat memory
+uses: one list per session, keyed by the ISO 8601 session start, holding
+human messages (user input plus the project context blob) and ai messages
+(the agent's structured output), newest first. Most sessions also get a
+chat_descriptions entry, and all of them are added to the session index.
+
+Session lengths follow a configurable distribution (log-normal by default,
+so most conversations are short and a few are very long), as do the sizes
+of the project contexts. Writes are pipelined, so 10,000 sessions take
+seconds.
+
+Usage:
+    REDIS_HOST=localhost python scripts/generate_mock_chat_sessions.py --sessions 10000
+    REDIS_HOST=localhost python scripts/generate_mock_chat_sessions.py --sessions 0 --clear
+
+Generated session ids are remembered in the mock_chat_sessions set, so
+--clear removes them again without touching real sessions.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# Add the parent directory to Python path to import backend modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import chat
+from fake_n8n import STARTING_PROMPT, ai_message, human_message, project_context
+
+MOCK_SESSIONS_KEY = "mock_chat_sessions"
+
+TURN_DISTRIBUTIONS = ["lognormal", "uniform", "fixed"]
+
+
+async def delete_sessions(session_ids: List[str]):
+    """Remove sessions with their index entries, summaries, descriptions and search rows"""
+    r = chat.get_redis_client()
+    for start in range(0, len(session_ids), 500):
+        batch = session_ids[start:start + 500]
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.delete(*batch)
+            pipe.delete(*[chat.session_summary_key(session_id) for session_id in batch])
+            pipe.zrem(chat.SESSION_INDEX_KEY, *batch)
+            pipe.hdel("chat_descriptions", *batch)
+            pipe.srem(MOCK_SESSIONS_KEY, *batch)
+            await pipe.execute()
+    if not session_ids:
+        return
+    try:
+        chat.db.execute_delete("DELETE FROM chat_message_search WHERE session_id = ANY(%s)", (session_ids,))
+    except Exception as e:
+        print(f"Could not delete search index rows: {e}")
+
+
+class MockChatSessionGenerator:
+    """Generate n8n-format chat sessions in Redis"""
+
+    def __init__(self, seed: Optional[int] = None, turns_distribution: str = "lognormal", turns: float = 8,
+                 turns_sigma: float = 1.0, max_turns: int = 400, context_kb: float = 8,
+                 context_kb_sigma: float = 0.5, context_variants: int = 64, description_rate: float = 0.9):
+        self.rng = random.Random(seed)
+        self.turns_distribution = turns_distribution
+        self.turns = turns
+        self.turns_sigma = turns_sigma
+        self.max_turns = max_turns
+        self.description_rate = description_rate
+
+        # Sample data for realistic content
+        self.topics = [
+            "the website relaunch", "the database migration", "our Q3 marketing campaign",
+            "the mobile app MVP", "the office move", "the security audit", "onboarding for new hires",
+            "the n8n workflow cleanup", "the API documentation", "the customer feedback portal"
+        ]
+        self.user_inputs = [
+            "I want to plan {topic}",
+            "Can you break {topic} into goals?",
+            "Add a task to review the budget for {topic}",
+            "What should we do first for {topic}?",
+            "Move the deadline for {topic} to next Friday",
+            "Who should own the testing for {topic}?",
+            "Summarize the open tasks for {topic}",
+            "Mark the kickoff meeting for {topic} as done",
+            "Let's add a milestone for the beta of {topic}"
+        ]
+        self.agent_replies = [
+            "Great, let's plan {topic}. What is the main outcome you want?",
+            "I've broken {topic} into three goals: discovery, implementation and launch.",
+            "I added a budget review task for {topic}. Should it block any other task?",
+            "For {topic}, I'd start by agreeing on scope and owners.",
+            "Done, the deadline for {topic} is now next Friday.",
+            "Here are the open tasks for {topic}: scope review, estimates and the test plan.",
+            "I've created a beta milestone for {topic} and linked the related tasks."
+        ]
+        self.descriptions = [
+            "Planning {topic}", "Goals for {topic}", "{topic} follow-up", "Tasks for {topic}", "Kickoff: {topic}"
+        ]
+
+        # n8n stores the full project list with every human message; a pool of
+        # contexts keeps generation fast while sizes still vary
+        self.contexts = [
+            project_context(int(1024 * context_kb * (self.rng.lognormvariate(0, context_kb_sigma) if context_kb_sigma else 1)))
+            for _ in range(max(1, context_variants))
+        ]
+
+    def session_turns(self) -> int:
+        """Number of turns (user message + agent reply) of one session"""
+        if self.turns_distribution == "fixed":
+            turns = self.turns
+        elif self.turns_distribution == "uniform":
+            turns = self.rng.uniform(1, 2 * self.turns)
+        else:
+            # Median self.turns, long tail
+            turns = self.turns * self.rng.lognormvariate(0, self.turns_sigma)
+        return max(1, min(self.max_turns, round(turns)))
+
+    def session_ids(self, count: int, end: datetime, days: float) -> List[str]:
+        """`count` distinct millisecond ISO timestamps within `days` before `end`, like n8n's session ids"""
+        window_ms = max(count, int(days * 86_400_000))
+        offsets = self.rng.sample(range(window_ms), count)
+        start = end - timedelta(milliseconds=window_ms)
+        return [(start + timedelta(milliseconds=offset)).isoformat(timespec="milliseconds") for offset in offsets]
+
+    def session_messages(self, session_id: str, topic: str) -> List[str]:
+        """Messages of one session in chronological order (the first is the hidden starting prompt)"""
+        context = self.rng.choice(self.contexts)
+        messages = []
+        for turn in range(self.session_turns()):
+            chat_input = self.rng.choice(self.user_inputs).format(topic=topic) if turn else STARTING_PROMPT
+            messages.append(human_message(chat_input, session_id, context))
+            messages.append(ai_message(self.rng.choice(self.agent_replies).format(topic=topic)))
+        return messages
+
+    async def write_sessions(self, session_ids: List[str], batch_size: int = 200, index: bool = True) -> Dict[str, Any]:
+        """Write the sessions with pipelined commands, `batch_size` sessions per round trip"""
+        r = chat.get_redis_client()
+        lengths = []
+        total_bytes = 0
+        for start in range(0, len(session_ids), batch_size):
+            batch = session_ids[start:start + batch_size]
+            descriptions = {}
+            async with r.pipeline(transaction=False) as pipe:
+                for session_id in batch:
+                    topic = self.rng.choice(self.topics)
+                    messages = self.session_messages(session_id, topic)
+                    lengths.append(len(messages))
+                    total_bytes += sum(len(message) for message in messages)
+                    pipe.delete(session_id)
+                    # LPUSH in chronological order leaves the newest message at index 0, as n8n does
+                    pipe.lpush(session_id, *messages)
+                    if self.rng.random() < self.description_rate:
+                        descriptions[session_id] = self.rng.choice(self.descriptions).format(topic=topic)
+                if descriptions:
+                    pipe.hset("chat_descriptions", mapping=descriptions)
+                if index:
+                    pipe.zadd(chat.SESSION_INDEX_KEY, {session_id: chat.session_score(session_id) for session_id in batch})
+                pipe.sadd(MOCK_SESSIONS_KEY, *batch)
+                await pipe.execute()
+        return {"sessions": len(session_ids), "lengths": lengths, "bytes": total_bytes}
+
+    async def clear_sessions(self) -> int:
+        """Delete every session written by this generator"""
+        r = chat.get_redis_client()
+        session_ids = list(await r.smembers(MOCK_SESSIONS_KEY))
+        await delete_sessions(session_ids)
+        return len(session_ids)
+
+
+async def run(args):
+    generator = MockChatSessionGenerator(
+        seed=args.seed, turns_distribution=args.turns_distribution, turns=args.turns, turns_sigma=args.turns_sigma,
+        max_turns=args.max_turns, context_kb=args.context_kb, context_kb_sigma=args.context_kb_sigma,
+        context_variants=args.context_variants, description_rate=args.description_rate
+    )
+    try:
+        if args.clear:
+            print(f"Deleted {await generator.clear_sessions()} previously generated sessions")
+        if not args.sessions:
+            return
+
+        started = time.perf_counter()
+        session_ids = generator.session_ids(args.sessions, datetime.now(timezone.utc).astimezone(), args.days)
+        result = await generator.write_sessions(session_ids, args.batch_size, index=not args.no_index)
+        elapsed = time.perf_counter() - started
+
+        lengths = sorted(result["lengths"])
+        print(f"Wrote {result['sessions']} sessions, {sum(lengths)} messages, "
+              f"{result['bytes'] / 1_000_000:.1f} MB in {elapsed:.1f}s ({result['sessions'] / elapsed:.0f} sessions/s)")
+        print(f"Messages per session: min {lengths[0]}, median {statistics.median(lengths):.0f}, "
+              f"p95 {lengths[int(0.95 * (len(lengths) - 1))]}, max {lengths[-1]}")
+    finally:
+        await chat.close_redis_pool()
+
+
+def main():
+    """Main function to run the mock chat session generator"""
+    parser = argparse.ArgumentParser(description="Write synthetic n8n chat sessions to Redis")
+    parser.add_argument("--sessions", type=int, default=1000, help="Number of sessions to write")
+    parser.add_argument("--days", type=float, default=365, help="Session starts are spread over this many past days")
+    parser.add_argument("--turns-distribution", choices=TURN_DISTRIBUTIONS, default="lognormal",
+                        help="Distribution of turns per session")
+    parser.add_argument("--turns", type=float, default=8,
+                        help="Turns per session: median (lognormal), mean (uniform) or exact (fixed)")
+    parser.add_argument("--turns-sigma", type=float, default=1.0, help="Spread of the log-normal turn distribution")
+    parser.add_argument("--max-turns", type=int, default=400, help="Upper bound on turns per session")
+    parser.add_argument("--context-kb", type=float, default=8, help="Median project context size per human message")
+    parser.add_argument("--context-kb-sigma", type=float, default=0.5, help="Log-normal spread of context sizes (0: fixed)")
+    parser.add_argument("--context-variants", type=int, default=64, help="Distinct project contexts to draw from")
+    parser.add_argument("--description-rate", type=float, default=0.9, help="Fraction of sessions with a description")
+    parser.add_argument("--batch-size", type=int, default=200, help="Sessions per pipelined round trip")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Leave the session index to the backend's reconciliation, as for sessions written by n8n")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for session times, lengths and messages")
+    parser.add_argument("--clear", action="store_true", help="Delete previously generated sessions first")
+    args = parser.parse_args()
+
+    print("Event Horizon Mock Chat Session Generator")
+    print("=" * 50)
+
+    try:
+        asyncio.run(run(args))
+        if args.sessions:
+            print("\n✅ Mock chat sessions generated successfully!")
+    except Exception as e:
+        print(f"\n❌ Error during mock chat session generation: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
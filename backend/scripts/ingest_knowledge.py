@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Bulk Knowledge Ingestion for Event Horizon
+
+Loads a directory or tar archive of Markdown, text and PDF files into the
+knowledge base. Files that were ingested before (same SHA-256) are skipped, so
+an interrupted run can be resumed by running the same command again.
+
+Usage:
+    python scripts/ingest_knowledge.py ~/notes
+    python scripts/ingest_knowledge.py notes.tar.gz --project <project-id> --workers 8
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to Python path to import backend modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_ingest import IngestionJob, run_ingestion, INGEST_BATCH_SIZE, INGEST_WORKERS
+
+
+def main():
+    """Main function to run the knowledge ingestion"""
+    parser = argparse.ArgumentParser(description="Ingest a directory or tar archive of documents into the knowledge base")
+    parser.add_argument("source", help="Directory, tar archive (.tar, .tar.gz, ...) or single file")
+    parser.add_argument("--project", action="append", default=[], help="Project id to reference (repeatable)")
+    parser.add_argument("--goal", action="append", default=[], help="Goal id to reference (repeatable)")
+    parser.add_argument("--task", action="append", default=[], help="Task id to reference (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Documents per COPY batch")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Parser processes")
+    args = parser.parse_args()
+
+    print("Event Horizon Knowledge Ingestion")
+    print("=" * 50)
+
+    job = IngestionJob(os.path.abspath(args.source))
+    run_ingestion(
+        job,
+        related_projects=args.project,
+        related_goals=args.goal,
+        related_tasks=args.task,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        on_progress=lambda j: print(j.progress_line(), flush=True),
+    )
+
+    stats = job.to_dict()
+    print("=" * 50)
+    print(f"Files:      {stats['files_total']} supported, {stats['files_unsupported']} unsupported")
+    print(f"Created:    {stats['documents_created']}")
+    print(f"Skipped:    {stats['files_skipped']} (already ingested or empty)")
+    print(f"Failed:     {stats['files_failed']}")
+    print(f"Throughput: {stats['files_per_second']} files/s, {stats['megabytes_per_second']} MB/s "
+          f"over {stats['elapsed_seconds']}s")
+    for error in stats["errors"]:
+        print(f"  ! {error['file']}: {error['error']}")
+
+    if job.status != "completed":
+        print("\n❌ Ingestion failed.")
+        sys.exit(1)
+    print("\n✅ Ingestion completed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Chat API Load Test for Event Horizon
+
+Seeds Redis with synthetic n8n chat sessions, then runs concurrent virtual
+users against a running backend for a fixed time. Each user picks one of
+POST /api/chat/chat, GET /api/chat/sessions and POST /api/chat/restore
+according to --mix. Chat users continue their own conversation (sessionId +
+resumeUrl) for --turns-per-session turns before starting a new one. The
+report shows throughput and p50/p95/p99 latency per endpoint.
+
+Run the backend against the fake n8n, with chat memory written to Redis:
+    python scripts/fake_n8n.py --port 5679 --redis --latency 0.5 --latency-sigma 0.4
+    N8N_URL=http://localhost:5679 uvicorn main:app
+    REDIS_HOST=localhost python scripts/load_test_chat.py --concurrency 50 --duration 60
+
+Seeded sessions and the sessions created by chat turns are deleted at the
+end unless --keep is given.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+# Add the parent directory to Python path to import backend modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import chat
+from generate_mock_chat_sessions import MockChatSessionGenerator, delete_sessions
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+ENDPOINTS = ["chat", "sessions", "restore"]
+
+# Seeded sessions start on this day, so they never collide with real sessions
+FIXTURE_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+async def seed_sessions(count: int, messages: int, context_kb: int) -> List[str]:
+    """Write `count` sessions of `messages` messages each to Redis, indexed and described"""
+    generator = MockChatSessionGenerator(seed=44, turns_distribution="fixed", turns=max(1, messages // 2),
+                                         context_kb=context_kb, context_kb_sigma=0, description_rate=1)
+    session_ids = generator.session_ids(count, FIXTURE_EPOCH + timedelta(days=1), days=1)
+    await generator.write_sessions(session_ids)
+    return session_ids
+
+
+class LoadStats:
+    """Latencies of successful requests and error counts, per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, started: float, status):
+        if status == 200:
+            self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        else:
+            self.errors[endpoint][status] += 1
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, stats: LoadStats, args, fixture_ids: List[str],
+                 created: set, rng: random.Random):
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.fixture_ids = fixture_ids
+        self.created = created
+        self.rng = rng
+        self.session_id: Optional[str] = None
+        self.resume_url: Optional[str] = None
+        self.turns = 0
+
+    async def request(self, endpoint: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(endpoint, started, type(e).__name__)
+            return None
+        self.stats.record(endpoint, started, response.status_code)
+        return response
+
+    async def chat_turn(self):
+        if self.session_id is None or self.turns >= self.args.turns_per_session:
+            self.session_id, self.resume_url, self.turns = None, None, 0
+            payload = {}
+        else:
+            payload = {
+                "sessionId": self.session_id,
+                "resumeUrl": self.resume_url,
+                "chatInput": f"Load test message {self.turns}: add a task to the current goal",
+            }
+        response = await self.request("chat", "POST", "/api/chat/chat", json=payload)
+        if response is None or response.status_code != 200:
+            # Start over with a new conversation next time
+            self.session_id = None
+            return
+        data = response.json()
+        self.session_id, self.resume_url = data["sessionId"], data["resumeUrl"]
+        self.created.add(self.session_id)
+        self.turns += 1
+
+    async def load_sessions(self):
+        await self.request("sessions", "GET", "/api/chat/sessions", params={"limit": self.args.sessions_limit})
+
+    async def restore(self):
+        candidates = self.fixture_ids or list(self.created)
+        if not candidates:
+            return await self.load_sessions()
+        await self.request("restore", "POST", "/api/chat/restore",
+                           json={"sessionId": self.rng.choice(candidates), "limit": self.args.restore_limit})
+
+    async def run(self, deadline: float, weights: List[float]):
+        actions = {"chat": self.chat_turn, "sessions": self.load_sessions, "restore": self.restore}
+        while time.perf_counter() < deadline:
+            endpoint = self.rng.choices(ENDPOINTS, weights)[0]
+            await actions[endpoint]()
+
+
+def parse_mix(mix: str) -> List[float]:
+    """"chat=1,sessions=2,restore=2" -> weights in ENDPOINTS order"""
+    weights = dict.fromkeys(ENDPOINTS, 0.0)
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r} in --mix (use {', '.join(ENDPOINTS)})")
+        weights[name.strip()] = float(weight or 1)
+    return [weights[name] for name in ENDPOINTS]
+
+
+def report(stats: LoadStats, elapsed: float):
+    print(f"{'endpoint':<10} {'ok':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    all_latencies = []
+    all_errors = Counter()
+    for endpoint in ENDPOINTS + ["total"]:
+        if endpoint == "total":
+            latencies, errors = sorted(all_latencies), all_errors
+        else:
+            latencies, errors = sorted(stats.latencies[endpoint]), stats.errors[endpoint]
+            all_latencies.extend(latencies)
+            all_errors.update(errors)
+        if not latencies and not errors:
+            continue
+        print(f"{endpoint:<10} {len(latencies):>7} {sum(errors.values()):>7} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} {percentile(latencies, 99):>9.1f} "
+              f"{(latencies[-1] if latencies else 0):>9.1f}")
+    for endpoint in ENDPOINTS:
+        if stats.errors[endpoint]:
+            print(f"  {endpoint} errors: " + ", ".join(f"{status} x{n}" for status, n in stats.errors[endpoint].most_common()))
+
+
+async def run(args):
+    weights = args.mix
+    fixture_ids = []
+    if args.seed_sessions:
+        started = time.perf_counter()
+        fixture_ids = await seed_sessions(args.seed_sessions, args.seed_messages, args.context_kb)
+        print(f"Seeded {len(fixture_ids)} sessions of {args.seed_messages} messages "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    stats = LoadStats()
+    created = set()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=args.backend_url, timeout=args.timeout, limits=limits) as client:
+            print(f"Running {args.concurrency} virtual users for {args.duration:.0f}s against {args.backend_url}")
+            print("=" * 74)
+            rng = random.Random(args.seed)
+            users = [VirtualUser(client, stats, args, fixture_ids, created, random.Random(rng.random()))
+                     for _ in range(args.concurrency)]
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(user.run(deadline, weights) for user in users))
+            report(stats, time.perf_counter() - started)
+    finally:
+        if not args.keep:
+            await delete_sessions(fixture_ids + sorted(created))
+        await chat.close_redis_pool()
+
+
+def main():
+    """Main function to run the load test"""
+    parser = argparse.ArgumentParser(description="Load test the chat API endpoints")
+    parser.add_argument("--backend-url", default=BACKEND_URL)
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--mix", type=parse_mix, default="chat=1,sessions=2,restore=2", help="Relative weights of the endpoints")
+    parser.add_argument("--turns-per-session", type=int, default=5, help="Chat turns before a user starts a new session")
+    parser.add_argument("--seed-sessions", type=int, default=200, help="Synthetic sessions written to Redis first")
+    parser.add_argument("--seed-messages", type=int, default=40, help="Messages per synthetic session")
+    parser.add_argument("--context-kb", type=int, default=4, help="Project context size in synthetic human messages")
+    parser.add_argument("--sessions-limit", type=int, default=50, help="Page size of /sessions requests")
+    parser.add_argument("--restore-limit", type=int, default=50, help="Messages per /restore request")
+    parser.add_argument("--timeout", type=float, default=60, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=44, help="Random seed for the request mix")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded and created sessions")
+    args = parser.parse_args()
+
+    # One log line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("Event Horizon Chat API Load Test")
+    print("=" * 74)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
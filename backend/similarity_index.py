@@ -0,0 +1,423 @@
+"""
+Local similarity index over knowledge_base content and ai_summary.
+
+Each document becomes a hashed term-frequency vector (sublinear TF, feature
+hashing into a fixed number of buckets) stored as one row of a float32 matrix
+in a memory-mapped file. IDF weights are derived from the per-bucket document
+frequencies, so a top-k lookup is a single matrix-vector product.
+
+The files are shared by all backend worker processes, and writes take an
+exclusive file lock. Besides the vectors, a write updates the per-bucket
+document frequencies (df.i64, also memory-mapped) and appends one
+[row, id, version] record per changed row to rows.log. Readers apply only
+the records past their last read offset, so a write costs each process
+work proportional to the rows it changed, not to the corpus. The log is
+compacted once it holds LOG_COMPACT_RATIO records per row; a compaction
+replaces the file, which makes every process reload from scratch.
+"""
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_INDEX_DIR = os.getenv(
+    "KNOWLEDGE_SIMILARITY_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "similarity_index")
+)
+# Number of hash buckets; must be a power of two
+SIMILARITY_DIMENSIONS = int(os.getenv("KNOWLEDGE_SIMILARITY_DIMENSIONS", "4096"))
+# Recompute IDF weights (and every row norm) once the corpus size drifts this much
+IDF_REFRESH_RATIO = 0.1
+INITIAL_CAPACITY = 1024
+LOG_COMPACT_RATIO = 4
+
+_TOKEN = re.compile(r"[a-z0-9]{2,}")
+_STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was
+were will with not but can into than then there these they their which who what when
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOP_WORDS]
+
+
+def document_text(content: Optional[str], ai_summary: Optional[str]) -> str:
+    return f"{content or ''}\n{ai_summary or ''}"
+
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors for every knowledge base item"""
+
+    def __init__(self, directory: str = SIMILARITY_INDEX_DIR, dimensions: int = SIMILARITY_DIMENSIONS):
+        if dimensions & (dimensions - 1):
+            raise ValueError("Similarity index dimensions must be a power of two")
+        self.directory = directory
+        self.dimensions = dimensions
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._df_path = os.path.join(directory, "df.i64")
+        self._log_path = os.path.join(directory, "rows.log")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, ".lock")
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._ids: List[Optional[str]] = []
+        self._versions: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: Set[int] = set()
+        # Identity of rows.log and how far this process has applied it
+        self._log_inode = None
+        self._log_offset = 0
+        self._log_records = 0
+
+        # Shared with the other processes through df.i64; only written under the exclusive lock
+        self._df: Optional[np.memmap] = None
+        self._idf = np.ones(dimensions, dtype=np.float32)
+        self._idf_doc_count = 0
+        self._norms = np.zeros(0, dtype=np.float32)
+
+    # ------------------------------------------------------------------
+    # Vectorisation
+    # ------------------------------------------------------------------
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """Sublinear term frequencies hashed into a dense float32 vector"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        mask = self.dimensions - 1
+        buckets = Counter(zlib.crc32(token.encode()) & mask for token in tokenize(text))
+        for bucket, count in buckets.items():
+            vector[bucket] = 1.0 + math.log(count)
+        return vector
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_matrix(self, capacity: int):
+        size = capacity * self.dimensions * 4
+        mode = "r+b" if os.path.exists(self._vectors_path) else "w+b"
+        with open(self._vectors_path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < size:
+                # Growing the file in place zero-fills the new rows without copying
+                f.truncate(size)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+        self._capacity = capacity
+        if len(self._norms) < capacity:
+            self._norms = np.concatenate([self._norms, np.zeros(capacity - len(self._norms), dtype=np.float32)])
+
+    def _file_capacity(self) -> int:
+        return os.path.getsize(self._vectors_path) // (self.dimensions * 4)
+
+    def _read_log(self, f) -> List[int]:
+        """Apply the row records from the log's current position on; returns the rows they touched"""
+        data = f.read()
+        self._log_offset += len(data)
+        changed = []
+        for line in data.splitlines():
+            row, knowledge_id, version = json.loads(line)
+            while len(self._ids) <= row:
+                self._free.add(len(self._ids))
+                self._ids.append(None)
+                self._versions.append(None)
+            previous = self._ids[row]
+            if previous is not None and self._rows.get(previous) == row:
+                del self._rows[previous]
+            self._ids[row] = knowledge_id
+            self._versions[row] = version
+            if knowledge_id is None:
+                self._free.add(row)
+            else:
+                self._rows[knowledge_id] = row
+                self._free.discard(row)
+            changed.append(row)
+        self._log_records += len(changed)
+        return changed
+
+    def _load_from_disk(self) -> bool:
+        """(Re)load the shared files; returns False if there is no usable index on disk"""
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if meta.get("dimensions") != self.dimensions or not all(
+            os.path.exists(path) for path in (self._vectors_path, self._df_path, self._log_path)
+        ):
+            return False
+
+        self._ids, self._versions, self._rows, self._free = [], [], {}, set()
+        self._log_offset = self._log_records = 0
+        with open(self._log_path, "rb") as f:
+            self._log_inode = os.fstat(f.fileno()).st_ino
+            self._read_log(f)
+        self._df = np.memmap(self._df_path, dtype=np.int64, mode="r+", shape=(self.dimensions,))
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._open_matrix(max(self._file_capacity(), len(self._ids)))
+        self._refresh_idf()
+        return True
+
+    def _read_new_rows(self):
+        """Apply the rows other processes wrote since this one last looked"""
+        with open(self._log_path, "rb") as f:
+            f.seek(self._log_offset)
+            changed = self._read_log(f)
+        if not changed:
+            return
+        if max(changed) >= self._capacity:
+            self._open_matrix(self._file_capacity())
+        if not self._maybe_refresh_idf():
+            for row in set(changed):
+                self._norms[row] = self._row_norm(self._matrix[row])
+
+    def _append_log(self, records: List[list]):
+        with open(self._log_path, "ab") as f:
+            f.write(b"".join(json.dumps(record).encode() + b"\n" for record in records))
+            self._log_offset = f.tell()
+        self._log_records += len(records)
+        if self._log_records > LOG_COMPACT_RATIO * max(len(self._ids), INITIAL_CAPACITY):
+            self._compact_log()
+
+    def _compact_log(self):
+        """Rewrite rows.log with one record per row"""
+        tmp_path = f"{self._log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for row, (knowledge_id, version) in enumerate(zip(self._ids, self._versions)):
+                f.write(json.dumps([row, knowledge_id, version]).encode() + b"\n")
+            self._log_offset = f.tell()
+        os.replace(tmp_path, self._log_path)
+        self._log_inode = os.stat(self._log_path).st_ino
+        self._log_records = len(self._ids)
+
+    def _sync_with_disk(self, create: bool = False) -> bool:
+        """Make sure this process sees every written row; returns False if there is no index yet"""
+        try:
+            stat = os.stat(self._log_path)
+        except FileNotFoundError:
+            stat = None
+        if self._matrix is None or stat is None or stat.st_ino != self._log_inode:
+            if not self._load_from_disk():
+                if not create:
+                    self._matrix = None
+                    return False
+                self._reset()
+        elif stat.st_size > self._log_offset:
+            self._read_new_rows()
+        return True
+
+    def _reset(self):
+        for path in (self._vectors_path, self._log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        np.zeros(self.dimensions, dtype=np.int64).tofile(self._df_path)
+        self._df = np.memmap(self._df_path, dtype=np.int64, mode="r+", shape=(self.dimensions,))
+        self._ids, self._versions, self._rows, self._free = [], [], {}, set()
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._open_matrix(INITIAL_CAPACITY)
+        self._refresh_idf()
+        open(self._log_path, "wb").close()
+        self._log_inode = os.stat(self._log_path).st_ino
+        self._log_offset = self._log_records = 0
+        tmp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dimensions": self.dimensions}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    # ------------------------------------------------------------------
+    # IDF bookkeeping
+    # ------------------------------------------------------------------
+
+    def _refresh_idf(self):
+        n = len(self._rows)
+        self._idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        self._idf_doc_count = n
+        squared_idf = self._idf ** 2
+        used = len(self._ids)
+        self._norms = np.zeros(max(self._capacity, len(self._norms)), dtype=np.float32)
+        for start in range(0, used, 4096):
+            block = self._matrix[start:min(start + 4096, used)]
+            self._norms[start:start + len(block)] = np.sqrt((block ** 2) @ squared_idf)
+
+    def _maybe_refresh_idf(self) -> bool:
+        drift = abs(len(self._rows) - self._idf_doc_count)
+        if drift > max(1, IDF_REFRESH_RATIO * self._idf_doc_count):
+            self._refresh_idf()
+            return True
+        return False
+
+    def _row_norm(self, vector: np.ndarray) -> float:
+        return float(np.sqrt((vector ** 2) @ (self._idf ** 2)))
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _allocate_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._ids)
+        if row >= self._capacity:
+            self._open_matrix(max(INITIAL_CAPACITY, self._capacity * 2))
+        self._ids.append(None)
+        self._versions.append(None)
+        return row
+
+    def _set_row(self, knowledge_id: str, vector: np.ndarray, version: Optional[str]) -> list:
+        row = self._rows.get(knowledge_id)
+        if row is None:
+            row = self._allocate_row()
+            self._rows[knowledge_id] = row
+            self._ids[row] = knowledge_id
+        else:
+            self._df -= self._matrix[row] != 0
+        self._df += vector != 0
+        self._matrix[row] = vector
+        self._versions[row] = version
+        self._norms[row] = self._row_norm(vector)
+        return [row, knowledge_id, version]
+
+    def _clear_row(self, knowledge_id: str) -> list:
+        row = self._rows.pop(knowledge_id)
+        self._df -= self._matrix[row] != 0
+        self._matrix[row] = 0
+        self._norms[row] = 0
+        self._ids[row] = None
+        self._versions[row] = None
+        self._free.add(row)
+        return [row, None, None]
+
+    def upsert_many(self, documents: Iterable[Tuple[str, Optional[str], Optional[str], Optional[str]]]):
+        """Add or replace documents given as (id, content, ai_summary, version) tuples"""
+        vectors = [
+            (str(knowledge_id), self.vectorize(document_text(content, ai_summary)), version)
+            for knowledge_id, content, ai_summary, version in documents
+        ]
+        if not vectors:
+            return
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync_with_disk(create=True)
+            records = [self._set_row(knowledge_id, vector, version) for knowledge_id, vector, version in vectors]
+            self._matrix.flush()
+            self._df.flush()
+            self._append_log(records)
+            self._maybe_refresh_idf()
+
+    def upsert(self, knowledge_id: str, content: Optional[str], ai_summary: Optional[str], version: Optional[str] = None):
+        self.upsert_many([(knowledge_id, content, ai_summary, version)])
+
+    def remove(self, knowledge_id: str):
+        with self._lock, self._file_lock(exclusive=True):
+            if not self._sync_with_disk() or knowledge_id not in self._rows:
+                return
+            record = self._clear_row(knowledge_id)
+            self._matrix.flush()
+            self._df.flush()
+            self._append_log([record])
+            self._maybe_refresh_idf()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _top_k(self, query: np.ndarray, k: int, exclude_row: Optional[int] = None) -> List[Dict[str, float]]:
+        used = len(self._ids)
+        weighted = query * self._idf
+        query_norm = float(np.linalg.norm(weighted))
+        if used == 0 or query_norm == 0:
+            return []
+
+        norms = self._norms[:used]
+        scores = (self._matrix[:used] @ (weighted * self._idf)) / query_norm
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(norms > 0, scores / norms, -1.0)
+        if exclude_row is not None:
+            scores[exclude_row] = -1.0
+
+        k = min(k, used)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [
+            {"id": self._ids[row], "score": round(float(scores[row]), 4)}
+            for row in ranked
+            if scores[row] > 0
+        ]
+
+    def similar_to_text(self, text: str, k: int = 10) -> List[Dict[str, float]]:
+        query = self.vectorize(text)
+        with self._lock, self._file_lock(exclusive=False):
+            if not self._sync_with_disk():
+                return []
+            return self._top_k(query, k)
+
+    def similar_to_document(self, knowledge_id: str, k: int = 10) -> Optional[List[Dict[str, float]]]:
+        """Documents most similar to an indexed one, or None if it is not indexed"""
+        with self._lock, self._file_lock(exclusive=False):
+            row = self._rows.get(knowledge_id) if self._sync_with_disk() else None
+            if row is None:
+                return None
+            return self._top_k(np.array(self._matrix[row]), k, exclude_row=row)
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def sync_with_database(self):
+        """
+        Load the on-disk index and bring it up to date with knowledge_base,
+        re-vectorising only rows whose updated_at changed since they were indexed.
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync_with_disk(create=True)
+            indexed = {knowledge_id: self._versions[row] for knowledge_id, row in self._rows.items()}
+
+        current = {
+            row["id"]: row["updated_at"].isoformat()
+            for row in db.execute_query("SELECT id, updated_at FROM knowledge_base")
+        }
+        stale = [knowledge_id for knowledge_id, version in current.items() if indexed.get(knowledge_id) != version]
+        removed = [knowledge_id for knowledge_id in indexed if knowledge_id not in current]
+
+        for knowledge_id in removed:
+            self.remove(knowledge_id)
+        for start in range(0, len(stale), 500):
+            rows = db.execute_query(
+                "SELECT id, content, ai_summary, updated_at FROM knowledge_base WHERE id = ANY(%s::uuid[])",
+                (stale[start:start + 500],)
+            )
+            self.upsert_many(
+                (row["id"], row["content"], row["ai_summary"], row["updated_at"].isoformat())
+                for row in rows
+            )
+        logger.info(
+            f"Similarity index ready: {len(current)} documents "
+            f"({len(stale)} re-indexed, {len(removed)} removed)"
+        )
+
+
+# Create a singleton instance
+similarity_index = SimilarityIndex()
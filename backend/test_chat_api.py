@@ -1,5 +1,8 @@
 """
 Test script for the chat API endpoints
+
+Runs against a live backend (BACKEND_URL). Without n8n, point the backend at
+the local stand-in: python scripts/fake_n8n.py --port 5679 --redis
 """
 import asyncio
 import httpx
@@ -14,7 +17,8 @@ async def test_chat_init():
     print("Testing chat initialization...")
     
     async with httpx.AsyncClient(timeout=300.0) as client:
-        response = await client.post(f"{BACKEND_URL}/api/chat/init")
+        # A chat request without sessionId starts a new session
+        response = await client.post(f"{BACKEND_URL}/api/chat/chat", json={})
         
         if response.status_code == 200:
             data = response.json()
@@ -35,9 +39,10 @@ async def test_chat_resume(session_id: str, resume_url: str):
     
     async with httpx.AsyncClient(timeout=300.0) as client:
         response = await client.post(
-            f"{BACKEND_URL}/api/chat/resume",
+            f"{BACKEND_URL}/api/chat/chat",
             json={
                 "sessionId": session_id,
+                "resumeUrl": resume_url,
                 "chatInput": "Hello, this is a test message"
             }
         )
@@ -55,6 +60,45 @@ async def test_chat_resume(session_id: str, resume_url: str):
             return None
 
 
+async def test_sessions(session_id: str):
+    """Test that the session shows up in the sessions list"""
+    print("\nTesting sessions list...")
+    
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.get(f"{BACKEND_URL}/api/chat/sessions")
+        
+        if response.status_code == 200:
+            sessions = response.json()
+            listed = any(s["sessionId"] == session_id for s in sessions)
+            print(f"{'✓' if listed else '✗'} {len(sessions)} sessions listed, test session {'included' if listed else 'missing'}")
+            return listed
+        else:
+            print(f"✗ Failed to list sessions: {response.status_code}")
+            print(f"  Error: {response.text}")
+            return False
+
+
+async def test_restore(session_id: str):
+    """Test restoring the conversation"""
+    print(f"\nTesting conversation restore for session ID: {session_id}")
+    
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{BACKEND_URL}/api/chat/restore",
+            json={"sessionId": session_id, "limit": 50}
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✓ Conversation restored")
+            print(f"  Messages: {len(data['messages'])} of {data['totalMessages']}")
+            return data
+        else:
+            print(f"✗ Failed to restore conversation: {response.status_code}")
+            print(f"  Error: {response.text}")
+            return None
+
+
 async def test_health_check():
     """Test the health check endpoint"""
     print("\nTesting health check...")
@@ -91,10 +135,14 @@ async def main():
     
     if init_result:
         # Test chat resume if initialization was successful
-        await test_chat_resume(
+        resume_result = await test_chat_resume(
             init_result.get('sessionId'),
             init_result.get('resumeUrl')
         )
+        
+        if resume_result:
+            await test_sessions(resume_result.get('sessionId'))
+            await test_restore(resume_result.get('sessionId'))
     
     print("\n" + "=" * 50)
     print("Test suite completed")
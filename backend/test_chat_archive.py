@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for archiving idle chat sessions
+
+Writes a few sessions that started in 1999 to Redis, archives them with an
+idle cutoff in early 2000 (so no real session is a candidate), checks which
+ones moved to chat_session_archive, and removes everything again.
+
+Needs Redis and Postgres:
+    REDIS_HOST=localhost python test_chat_archive.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory and scripts to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from api import chat
+from generate_mock_chat_sessions import delete_sessions
+
+CUTOFF = datetime(2000, 1, 15, tzinfo=timezone.utc)
+OLD_ACTIVITY = datetime(1999, 12, 31, tzinfo=timezone.utc).isoformat()
+
+def session_id(day: int) -> str:
+    return datetime(1999, 12, day, 12, tzinfo=timezone.utc).isoformat(timespec="milliseconds")
+
+def messages(count: int):
+    return [
+        json.dumps({"type": "ai" if i % 2 else "human", "data": {"content": f"archive test message {i}"}})
+        for i in range(count)
+    ]
+
+async def write_session(r, sid: str, count: int, summary: dict):
+    await r.delete(sid, chat.session_summary_key(sid))
+    await r.lpush(sid, *messages(count))
+    await chat.index_session(r, sid)
+    if summary:
+        await r.hset(chat.session_summary_key(sid), mapping=summary)
+
+async def archived_ids(session_ids):
+    rows = await asyncio.to_thread(
+        chat.db.execute_query,
+        "SELECT session_id FROM chat_session_archive WHERE session_id = ANY(%s)", (session_ids,)
+    )
+    return {row["session_id"] for row in rows}
+
+async def cleanup(session_ids):
+    await delete_sessions(session_ids)
+    await asyncio.to_thread(
+        chat.db.execute_delete, "DELETE FROM chat_session_archive WHERE session_id = ANY(%s)", (session_ids,)
+    )
+
+async def check_idle_sessions():
+    """Idleness comes from lastActivity, not from when the list was last read"""
+    r = chat.get_redis_client()
+    old_read, recent, behind = session_id(1), session_id(2), session_id(3)
+    session_ids = [old_read, recent, behind]
+    try:
+        # Idle since 1999, but the listing and the search sweep just read it
+        await write_session(r, old_read, 4, {"messageCount": "4", "lastActivity": OLD_ACTIVITY})
+        await r.llen(old_read)
+        await r.lrange(old_read, 0, -1)
+        # Used yesterday
+        await write_session(r, recent, 4, {
+            "messageCount": "4", "lastActivity": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        })
+        # n8n added two messages the summary has not seen
+        await write_session(r, behind, 4, {"messageCount": "2", "lastActivity": OLD_ACTIVITY})
+
+        idle_days = (time.time() - CUTOFF.timestamp()) / 86400
+        report = await chat.archive_idle_sessions(idle_days)
+        archived = await archived_ids(session_ids)
+        refreshed = chat.session_score(await r.hget(chat.session_summary_key(behind), "lastActivity"))
+
+        checks = {
+            "idle session archived although recently read": old_read in archived and not await r.exists(old_read),
+            "recently used session kept": recent not in archived and await r.exists(recent),
+            "session with unseen messages kept": behind not in archived and await r.exists(behind),
+            "its lastActivity refreshed": refreshed is not None and time.time() - refreshed < 60,
+        }
+        for name, ok in checks.items():
+            print(f"{'✓' if ok else '✗'} {name}")
+        print(f"Report: {report['candidates']} candidates, {report['archived']} archived")
+        return all(checks.values())
+    finally:
+        await cleanup(session_ids)
+
+async def check_rehydrate_conflict():
+    """An archived history survives a rehydration that loses to a list n8n recreated"""
+    r = chat.get_redis_client()
+    sid = session_id(4)
+    idle_days = (time.time() - CUTOFF.timestamp()) / 86400
+    try:
+        await write_session(r, sid, 4, {"messageCount": "4", "lastActivity": OLD_ACTIVITY})
+        await chat.archive_idle_sessions(idle_days)
+        # n8n starts writing to the session before the backend rehydrates it
+        await r.lpush(sid, *messages(2))
+        rehydrated = await chat.rehydrate_session(r, sid)
+        kept = sid in await archived_ids([sid]) and await r.llen(sid) == 2
+
+        # Archiving it again merges the older history back in
+        await r.hset(chat.session_summary_key(sid), mapping={"messageCount": "2", "lastActivity": OLD_ACTIVITY})
+        await chat.archive_idle_sessions(idle_days)
+        merged = await chat.rehydrate_session(r, sid)
+        restored = await r.lrange(sid, 0, -1)
+
+        checks = {
+            "rehydration reports the conflict": rehydrated is False,
+            "archived history kept": kept,
+            # Newest first: the recreated messages, then the archived history
+            "history merged on the next archive": merged and restored == messages(2)[::-1] + messages(4)[::-1],
+            "archive row removed after rehydrating": sid not in await archived_ids([sid]),
+        }
+        for name, ok in checks.items():
+            print(f"{'✓' if ok else '✗'} {name}")
+        return all(checks.values())
+    finally:
+        await cleanup([sid])
+
+async def check_concurrent_archive():
+    """Two archivers racing on one session leave exactly one archived copy"""
+    r = chat.get_redis_client()
+    sid = session_id(5)
+    idle_days = (time.time() - CUTOFF.timestamp()) / 86400
+    try:
+        await write_session(r, sid, 4, {"messageCount": "4", "lastActivity": OLD_ACTIVITY})
+        # Like two uvicorn workers, or a worker and POST /chat/archive
+        await asyncio.gather(chat.archive_idle_sessions(idle_days), chat.archive_idle_sessions(idle_days))
+        archived = sid in await archived_ids([sid])
+        rehydrated = await chat.rehydrate_session(r, sid)
+        restored = await r.lrange(sid, 0, -1)
+
+        checks = {
+            "archive row kept": archived,
+            "list removed from Redis": archived and rehydrated,
+            "history restored intact": restored == messages(4)[::-1],
+        }
+        for name, ok in checks.items():
+            print(f"{'✓' if ok else '✗'} {name}")
+        return all(checks.values())
+    finally:
+        await cleanup([sid])
+
+async def main():
+    try:
+        return [await check_idle_sessions(), await check_rehydrate_conflict(), await check_concurrent_archive()]
+    finally:
+        await chat.close_redis_pool()
+
+if __name__ == "__main__":
+    print("Testing chat session archiving")
+    print("=" * 50)
+    results = asyncio.run(main())
+    print("=" * 50)
+    if all(results):
+        print("✓ All tests passed")
+    else:
+        print("✗ Some tests failed")
+        sys.exit(1)
@@ -78,6 +78,14 @@ CREATE TABLE knowledge_base (
     filename VARCHAR(255),
     content_type VARCHAR(100),
     link_citations TEXT[],
+    -- Plain text extracted from file_attachment by the backend's background worker
+    attachment_text TEXT,
+    attachment_text_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', COALESCE(attachment_text, ''))) STORED,
+    attachment_extracted_at TIMESTAMP WITH TIME ZONE,
+    -- Set by the worker that is extracting the attachment; expires so a crashed worker's claim is retried
+    attachment_extraction_claimed_at TIMESTAMP WITH TIME ZONE,
+    -- SHA-256 of the source file for documents loaded by the bulk ingestion pipeline
+    content_hash VARCHAR(64),
     date_added DATE DEFAULT CURRENT_DATE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -92,4 +100,42 @@ CREATE TABLE knowledge_base_references (
     entity_id UUID NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(knowledge_base_id, entity_type, entity_id)
+);
+
+-- MinHash signatures used for near-duplicate detection (maintained by the backend)
+CREATE TABLE knowledge_base_minhash (
+    knowledge_base_id UUID PRIMARY KEY REFERENCES knowledge_base(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL
+);
+
+-- LSH band buckets over the MinHash signatures
+CREATE TABLE knowledge_base_lsh_buckets (
+    knowledge_base_id UUID NOT NULL REFERENCES knowledge_base(id) ON DELETE CASCADE,
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    PRIMARY KEY (knowledge_base_id, band)
+);
+
+-- Chat sessions moved out of Redis after being idle (maintained by the backend).
+-- messages is the session's Redis list (newest first) as a zlib-compressed JSON array.
+CREATE TABLE chat_session_archive (
+    session_id VARCHAR(64) PRIMARY KEY,
+    description TEXT,
+    message_count INTEGER NOT NULL,
+    messages BYTEA NOT NULL,
+    redis_bytes BIGINT,
+    last_activity TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Displayed text of every chat message, for full-text search over chat history
+-- (kept in sync from Redis by the backend). message_offset is the message's
+-- position in the conversation, 0 being the oldest.
+CREATE TABLE chat_message_search (
+    session_id VARCHAR(64) NOT NULL,
+    message_offset INTEGER NOT NULL,
+    role VARCHAR(10) NOT NULL CHECK (role IN ('user', 'agent')),
+    content TEXT NOT NULL,
+    content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    PRIMARY KEY (session_id, message_offset)
 );
\ No newline at end of file
@@ -19,12 +19,16 @@ CREATE INDEX idx_tasks_priority ON tasks(priority) WHERE priority IS NOT NULL;
 -- Knowledge base search indexes
 CREATE INDEX idx_knowledge_base_references_entity ON knowledge_base_references(entity_type, entity_id);
 CREATE INDEX idx_knowledge_base_date_added ON knowledge_base(date_added);
+CREATE INDEX idx_knowledge_base_lsh_buckets_bucket ON knowledge_base_lsh_buckets(band, bucket);
+CREATE INDEX idx_knowledge_base_content_hash ON knowledge_base(content_hash) WHERE content_hash IS NOT NULL;
 
 -- Full-text search indexes
 CREATE INDEX idx_projects_search ON projects USING gin(to_tsvector('english', name || ' ' || COALESCE(description, '')));
 CREATE INDEX idx_goals_search ON goals USING gin(to_tsvector('english', name || ' ' || COALESCE(description, '') || ' ' || COALESCE(success_criteria, '')));
 CREATE INDEX idx_tasks_search ON tasks USING gin(to_tsvector('english', name || ' ' || COALESCE(description, '')));
 CREATE INDEX idx_knowledge_base_search ON knowledge_base USING gin(to_tsvector('english', document_name || ' ' || COALESCE(content, '') || ' ' || COALESCE(ai_summary, '')));
+CREATE INDEX idx_knowledge_base_attachment_search ON knowledge_base USING gin(attachment_text_tsv);
+CREATE INDEX idx_chat_message_search ON chat_message_search USING gin(content_tsv);
 
 -- Composite indexes for common queries
 CREATE INDEX idx_goals_project_status ON goals(project_id, status);
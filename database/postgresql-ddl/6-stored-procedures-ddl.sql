@@ -187,9 +187,11 @@ BEGIN
             kb.id as entity_id,
             kb.document_name as entity_name,
             kb.ai_summary as entity_description,
-            ts_rank(to_tsvector('english', kb.document_name || ' ' || COALESCE(kb.content, '') || ' ' || COALESCE(kb.ai_summary, '')), plainto_tsquery('english', p_search_term)) as relevance_score
+            ts_rank(to_tsvector('english', kb.document_name || ' ' || COALESCE(kb.content, '') || ' ' || COALESCE(kb.ai_summary, '')), plainto_tsquery('english', p_search_term))
+                + ts_rank(kb.attachment_text_tsv, plainto_tsquery('english', p_search_term)) as relevance_score
         FROM knowledge_base kb
         WHERE to_tsvector('english', kb.document_name || ' ' || COALESCE(kb.content, '') || ' ' || COALESCE(kb.ai_summary, '')) @@ plainto_tsquery('english', p_search_term)
+           OR kb.attachment_text_tsv @@ plainto_tsquery('english', p_search_term)
     )
     ORDER BY relevance_score DESC
     LIMIT p_limit;
@@ -4,12 +4,20 @@ from discord.ext import commands
 import asyncio
 import aiohttp
 from aiohttp import web
+import io
 import json
 import logging
 import os
+import random
+import secrets
+import time
+import uuid
+from collections import Counter, deque
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from urllib.parse import urlparse
+import redis.asyncio as aioredis
 
 # Load environment variables
 load_dotenv()
@@ -27,21 +35,270 @@ logger = logging.getLogger(__name__)
 
 logger.info(f"Starting Discord bot in {APP_ENV} mode")
 
+# Short approval IDs, typed into /accept and /reject (no 0/o or 1/l lookalikes)
+APPROVAL_ID_ALPHABET = "23456789abcdefghjkmnpqrstuvwxyz"
+APPROVAL_ID_LENGTH = 6
+
+def new_approval_id() -> str:
+    return ''.join(secrets.choice(APPROVAL_ID_ALPHABET) for _ in range(APPROVAL_ID_LENGTH))
+
 class ApprovalRequest:
     """Represents an active approval request"""
-    def __init__(self, resume_webhook: str, request_data: dict = None):
+    def __init__(self, approval_id: str, resume_webhook: str, request_data: dict = None, description: str = ''):
+        self.approval_id = approval_id
         self.resume_webhook = resume_webhook
         self.request_data = request_data or {}
+        self.description = description
         self.timestamp = datetime.now()
         self.is_active = True
     
     def to_dict(self) -> dict:
         return {
+            'approval_id': self.approval_id,
             'resume_webhook': self.resume_webhook,
             'request_data': self.request_data,
+            'description': self.description,
             'timestamp': self.timestamp.isoformat(),
             'is_active': self.is_active
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ApprovalRequest':
+        approval = cls(data['approval_id'], data['resume_webhook'], data.get('request_data'), data.get('description', ''))
+        approval.timestamp = datetime.fromisoformat(data['timestamp'])
+        approval.is_active = data.get('is_active', True)
+        return approval
+
+# Pending approvals and undelivered webhook responses live in Redis, so a
+# restart loses neither and any replica can take a request or answer a
+# command. Outbox entries are due at their score (epoch seconds); a sender
+# leases an entry by moving its score past the attempt's timeout.
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "n8n_password")
+APPROVALS_KEY = "discord_approvals"
+OUTBOX_KEY = "discord_webhook_outbox"
+OUTBOX_ITEMS_KEY = "discord_webhook_outbox_items"
+DEAD_LETTERS_KEY = "discord_webhook_dead_letters"
+
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "30"))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "2"))
+WEBHOOK_RETRY_MAX_SECONDS = float(os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "300"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "12"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+WEBHOOK_LEASE_SECONDS = WEBHOOK_TIMEOUT_SECONDS + 5
+
+# Every replica receives every interaction from the gateway; the first to set
+# its claim key answers it. Discord expects an answer within 3 seconds.
+INTERACTION_CLAIM_PREFIX = "discord_interaction:"
+INTERACTION_CLAIM_SECONDS = 60
+REPLICA_ID = os.getenv("HOSTNAME") or uuid.uuid4().hex[:12]
+
+# Take an outbox entry if it is due: move its score to the lease expiry
+LEASE_OUTBOX_ENTRY = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) <= tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Answer an approval: remove it from the pending approvals and add its
+# response to the outbox (leased, for the caller's first attempt), or do
+# nothing if it was already answered
+CLAIM_APPROVAL = """
+if redis.call('HDEL', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[2])
+return 1
+"""
+
+# Outcomes of ApprovalBot.answer_approval
+ANSWER_DELIVERED = "delivered"
+ANSWER_RETRYING = "retrying"
+ANSWER_TAKEN = "taken"
+ANSWER_NOT_STORED = "not_stored"
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: half the capped backoff plus a random share of the other half"""
+    backoff = min(WEBHOOK_RETRY_MAX_SECONDS, WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+def is_permanent_failure(status: int) -> bool:
+    """4xx answers (e.g. 404 once the n8n execution is gone) will not change on retry"""
+    return 400 <= status < 500 and status not in (408, 425, 429)
+
+# Outbound Discord messages go through one queue worker. Discord allows about
+# 5 messages per 5 seconds per channel; sending faster only earns 429s.
+DISCORD_CHANNEL_RATE_LIMIT = int(os.getenv("DISCORD_CHANNEL_RATE_LIMIT", "5"))
+DISCORD_CHANNEL_RATE_WINDOW = float(os.getenv("DISCORD_CHANNEL_RATE_WINDOW", "5"))
+DISCORD_OUTBOUND_QUEUE_SIZE = int(os.getenv("DISCORD_OUTBOUND_QUEUE_SIZE", "1000"))
+# Request data longer than this is sent as a text file instead of a series of messages
+DISCORD_ATTACHMENT_THRESHOLD = int(os.getenv("DISCORD_ATTACHMENT_THRESHOLD", "6000"))
+
+DISCORD_MESSAGE_LIMIT = 2000
+DISCORD_EMBEDS_PER_MESSAGE = 10
+DISCORD_EMBED_TOTAL_LIMIT = 6000
+
+class OutboundMessage:
+    """Text, an embed or a file waiting to be sent to the Discord channel"""
+    def __init__(self, content: str = '', embed: discord.Embed = None, file: Tuple[str, bytes] = None):
+        self.content = content
+        self.embed = embed
+        self.file = file  # (filename, data)
+
+def split_message(content: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """Split text into pieces of at most `limit` characters, preferring newlines near the end"""
+    pieces = []
+    while len(content) > limit:
+        split_point = limit
+        newline_pos = content.rfind('\n', 0, limit)
+        if newline_pos > limit - 200:  # If newline is reasonably close
+            split_point = newline_pos
+        pieces.append(content[:split_point])
+        content = content[split_point:].lstrip('\n')
+    pieces.append(content)
+    return pieces
+
+def coalesce_messages(items: List[OutboundMessage]) -> List[dict]:
+    """
+    Pack queued items into as few channel.send calls as possible, in order:
+    consecutive texts are joined up to the message limit, and embeds ride
+    along with the text before them.
+    """
+    messages = []
+    current = {'content': '', 'embeds': []}
+    
+    def flush():
+        nonlocal current
+        if current['content'] or current['embeds']:
+            messages.append({key: value for key, value in current.items() if value})
+        current = {'content': '', 'embeds': []}
+    
+    for item in items:
+        if item.file:
+            flush()
+            filename, data = item.file
+            messages.append({'content': item.content, 'file': (filename, data)})
+            continue
+        if item.content:
+            if current['embeds']:
+                flush()  # Text after an embed would be shown above it
+            text = f"{current['content']}\n{item.content}" if current['content'] else item.content
+            *full, current['content'] = split_message(text)
+            for piece in full:
+                messages.append({'content': piece})
+        if item.embed:
+            embeds_length = sum(len(embed) for embed in current['embeds']) + len(item.embed)
+            if len(current['embeds']) == DISCORD_EMBEDS_PER_MESSAGE or embeds_length > DISCORD_EMBED_TOTAL_LIMIT:
+                flush()
+            current['embeds'].append(item.embed)
+    flush()
+    return messages
+
+class ChannelRateLimiter:
+    """Sliding-window limit of `rate` sends per `per` seconds for one channel"""
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.sent = deque()
+    
+    def delay(self) -> float:
+        """Seconds until the next send is allowed"""
+        now = time.monotonic()
+        while self.sent and now - self.sent[0] >= self.per:
+            self.sent.popleft()
+        if len(self.sent) < self.rate:
+            return 0.0
+        return self.per - (now - self.sent[0])
+    
+    async def wait(self) -> float:
+        """Wait for a free slot without taking it; returns the time waited"""
+        waited = 0.0
+        delay = self.delay()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.delay()
+        return waited
+    
+    async def acquire(self) -> float:
+        waited = await self.wait()
+        self.sent.append(time.monotonic())
+        return waited
+
+# Histogram bucket upper bounds in seconds. Approvals wait for a human, so
+# decision times get buckets from seconds to days.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DECISION_BUCKETS = (10, 30, 60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600, 24 * 3600, 72 * 3600)
+
+class Histogram:
+    """Cumulative bucket counts of observed durations, like a Prometheus histogram"""
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+    
+    def metrics(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'avg': round(self.sum / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'buckets': {**{f'le_{bound:g}': n for bound, n in zip(self.buckets, self.bucket_counts)}, '+Inf': self.count}
+        }
+
+class BotMetrics:
+    """Counters and latency histograms of this replica since it started"""
+    def __init__(self):
+        self.started_at = time.time()
+        self.approval_requests = Counter()  # by HTTP status
+        self.decisions = Counter()          # accepted / rejected / already_answered / not_stored
+        self.discord_messages = Counter()   # sent / failed / dropped (queue full)
+        self.webhook_attempts = Counter()   # delivered / retry_scheduled / dead_lettered
+        self.webhook_failures = Counter()   # by HTTP status or exception
+        self.intake_seconds = Histogram(LATENCY_BUCKETS)
+        self.discord_send_seconds = Histogram(LATENCY_BUCKETS)
+        self.rate_limit_wait_seconds = Histogram(LATENCY_BUCKETS)
+        self.decision_seconds = Histogram(DECISION_BUCKETS)
+        self.webhook_seconds = Histogram(LATENCY_BUCKETS)
+    
+    def metrics(self) -> dict:
+        return {
+            'uptime_seconds': round(time.time() - self.started_at),
+            'counters': {
+                'approval_requests': dict(self.approval_requests),
+                'decisions': dict(self.decisions),
+                'discord_messages': dict(self.discord_messages),
+                'webhook_attempts': dict(self.webhook_attempts),
+                'webhook_failures': dict(self.webhook_failures)
+            },
+            'histograms': {
+                'approval_intake_seconds': self.intake_seconds.metrics(),
+                'discord_send_seconds': self.discord_send_seconds.metrics(),
+                'discord_rate_limit_wait_seconds': self.rate_limit_wait_seconds.metrics(),
+                'approval_decision_seconds': self.decision_seconds.metrics(),
+                'webhook_response_seconds': self.webhook_seconds.metrics()
+            }
+        }
+
+class ReplicaCommandTree(app_commands.CommandTree):
+    """Lets one replica handle each interaction, see INTERACTION_CLAIM_PREFIX"""
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await self.client.claim_interaction(interaction)
 
 class ApprovalBot(commands.Bot):
     """Discord bot for handling n8n approval workflows"""
@@ -53,16 +310,27 @@ class ApprovalBot(commands.Bot):
         super().__init__(
             command_prefix='!',
             intents=intents,
-            description='N8N Approval Bot with Slash Commands'
+            description='N8N Approval Bot with Slash Commands',
+            tree_cls=ReplicaCommandTree
         )
         
-        # Store current approval request
-        self.current_approval: ApprovalRequest = None
-        self.approval_lock = asyncio.Lock()
-        
         # HTTP session for webhook calls
         self.session: aiohttp.ClientSession = None
         
+        # Pending approvals and the webhook outbox, see REDIS_HOST
+        self.redis: aioredis.Redis = None
+        self.outbox_task: asyncio.Task = None
+        
+        # Outbound Discord messages, sent by _outbound_worker
+        self.outbound_queue: asyncio.Queue = asyncio.Queue(maxsize=DISCORD_OUTBOUND_QUEUE_SIZE)
+        self.outbound_task: asyncio.Task = None
+        self.channel_id = int(os.getenv('DISCORD_CHANNEL_ID', '0'))
+        self.channel: discord.abc.Messageable = None
+        self.rate_limiters: Dict[int, ChannelRateLimiter] = {}
+        
+        # Served on /metrics
+        self.metrics = BotMetrics()
+        
         # Internal n8n URL for Docker network communication
         self.n8n_internal_url = os.getenv('N8N_URL', 'http://n8n:5678')
     
@@ -92,7 +360,17 @@ class ApprovalBot(commands.Bot):
     async def setup_hook(self):
         """Called when the bot is starting up"""
         # Create HTTP session
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=WEBHOOK_TIMEOUT_SECONDS))
+        
+        # Deliver webhook responses still in the outbox, including those of
+        # other replicas that went away mid-attempt
+        self.redis = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, decode_responses=True)
+        self.lease_outbox_entry = self.redis.register_script(LEASE_OUTBOX_ENTRY)
+        self.claim_approval_script = self.redis.register_script(CLAIM_APPROVAL)
+        self.outbox_task = asyncio.create_task(self._outbox_sender())
+        
+        # Start sending queued Discord messages once the bot is ready
+        self.outbound_task = asyncio.create_task(self._outbound_worker())
         
         # Start HTTP server for n8n integration
         await self.start_http_server()
@@ -109,6 +387,7 @@ class ApprovalBot(commands.Bot):
         app = web.Application()
         app.router.add_post('/approval-request', self.handle_approval_request)
         app.router.add_get('/health', self.health_check)
+        app.router.add_get('/metrics', self.metrics_endpoint)
         
         runner = web.AppRunner(app)
         await runner.setup()
@@ -121,6 +400,13 @@ class ApprovalBot(commands.Bot):
     
     async def handle_approval_request(self, request):
         """Handle incoming approval requests from n8n"""
+        started = time.perf_counter()
+        response = await self.create_approval_request(request)
+        self.metrics.intake_seconds.observe(time.perf_counter() - started)
+        self.metrics.approval_requests[str(response.status)] += 1
+        return response
+    
+    async def create_approval_request(self, request) -> web.Response:
         try:
             data = await request.json()
             resume_webhook = data.get('resume_webhook')
@@ -132,34 +418,43 @@ class ApprovalBot(commands.Bot):
             if not resume_webhook:
                 return web.json_response({'error': 'resume_webhook is required'}, status=400)
             
-            async with self.approval_lock:
-                # Cancel previous approval if exists
-                if self.current_approval and self.current_approval.is_active:
-                    self.current_approval.is_active = False
-                    await self.send_discord_message("❌ Previous approval request canceled - new request received")
-                
-                # Create new approval request
-                self.current_approval = ApprovalRequest(resume_webhook, data)
-                
-                # First send the raw request data as a regular message (split if too long)
-                if request_data:
-                    await self.send_request_data_messages(request_data)
-                
-                # Then send the approval interaction embed (cleaner/shorter)
-                embed = discord.Embed(
-                    title="🔔 New Approval Request",
-                    description=description,
-                    color=discord.Color.orange(),
-                    timestamp=self.current_approval.timestamp
-                )
-                
-                embed.add_field(name="Actions", value="Use `/accept` to accept or `/reject <reason>` to reject", inline=False)
-                
-                await self.send_discord_embed(embed)
+            try:
+                # HSETNX reserves the ID across replicas
+                while True:
+                    approval = ApprovalRequest(new_approval_id(), resume_webhook, data, description)
+                    if await self.redis.hsetnx(APPROVALS_KEY, approval.approval_id, json.dumps(approval.to_dict())):
+                        break
+                approval_id = approval.approval_id
+            except aioredis.RedisError as e:
+                # Tell n8n rather than accept a request no replica could answer
+                logger.error(f"Failed to store approval request: {e}")
+                return web.json_response({'error': f'Failed to store approval request: {e}'}, status=503)
+            
+            # First the raw request data, then the approval embed; both are queued,
+            # so n8n gets its answer without waiting for Discord
+            if request_data:
+                self.queue_request_data(request_data, approval_id)
+            
+            # Then send the approval interaction embed (cleaner/shorter)
+            embed = discord.Embed(
+                title=f"🔔 New Approval Request `{approval_id}`",
+                description=description,
+                color=discord.Color.orange(),
+                timestamp=approval.timestamp
+            )
+            
+            embed.add_field(
+                name="Actions",
+                value=f"Use `/accept {approval_id}` to accept or `/reject {approval_id} <reason>` to reject",
+                inline=False
+            )
+            
+            self.queue_discord_embed(embed)
             
             return web.json_response({
                 'status': 'approval_request_created',
-                'timestamp': self.current_approval.timestamp.isoformat()
+                'approval_id': approval_id,
+                'timestamp': approval.timestamp.isoformat()
             })
         
         except Exception as e:
@@ -168,101 +463,284 @@ class ApprovalBot(commands.Bot):
     
     async def health_check(self, request):
         """Health check endpoint"""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hlen(APPROVALS_KEY)
+                pipe.zcard(OUTBOX_KEY)
+                pipe.hlen(DEAD_LETTERS_KEY)
+                pending, outbox, dead_letters = await pipe.execute()
+        except aioredis.RedisError as e:
+            return web.json_response({
+                'status': 'unhealthy',
+                'bot_ready': self.is_ready(),
+                'replica': REPLICA_ID,
+                'error': f'Redis unavailable: {e}'
+            }, status=503)
         return web.json_response({
             'status': 'healthy',
             'bot_ready': self.is_ready(),
-            'has_active_approval': self.current_approval is not None and self.current_approval.is_active
+            'replica': REPLICA_ID,
+            'has_active_approval': bool(pending),
+            'pending_approvals': pending,
+            'queues': {
+                # Per replica
+                'discord_outbound': self.outbound_queue.qsize(),
+                # Shared by all replicas
+                'webhook_outbox': outbox,
+                'webhook_dead_letters': dead_letters
+            }
         })
     
-    async def send_discord_message(self, message: str):
-        """Send a text message to the configured Discord channel"""
-        channel_id = int(os.getenv('DISCORD_CHANNEL_ID', '0'))
-        if channel_id:
-            channel = self.get_channel(channel_id)
-            if channel:
-                await channel.send(message)
-            else:
-                logger.error(f"Channel {channel_id} not found")
-        else:
-            logger.error("DISCORD_CHANNEL_ID not configured")
-    
-    async def send_discord_embed(self, embed: discord.Embed):
-        """Send an embed to the configured Discord channel"""
-        channel_id = int(os.getenv('DISCORD_CHANNEL_ID', '0'))
-        if channel_id:
-            channel = self.get_channel(channel_id)
-            if channel:
-                await channel.send(embed=embed)
-            else:
-                logger.error(f"Channel {channel_id} not found")
-        else:
-            logger.error("DISCORD_CHANNEL_ID not configured")
+    async def metrics_endpoint(self, request):
+        """Counters and latency histograms of this replica"""
+        return web.json_response({'replica': REPLICA_ID, **self.metrics.metrics()})
     
-    async def send_request_data_messages(self, request_data: str):
-        """Send request data, splitting into multiple messages if needed"""
-        MAX_LENGTH = 1900  # Conservative limit to account for Discord's 2000 char limit
-        
-        if len(request_data) <= MAX_LENGTH:
-            # Single message - same as before
-            await self.send_discord_message(f"📋 **Request Details:**\n{request_data}")
+    async def pending_approvals(self) -> List[ApprovalRequest]:
+        """Pending approval requests of all replicas, oldest first"""
+        stored = await self.redis.hgetall(APPROVALS_KEY)
+        approvals = [ApprovalRequest.from_dict(json.loads(data)) for data in stored.values()]
+        return sorted(approvals, key=lambda approval: approval.timestamp)
+    
+    async def get_approval(self, approval_id: str) -> Optional[ApprovalRequest]:
+        """A pending approval request, or None if it is unknown or already answered"""
+        data = await self.redis.hget(APPROVALS_KEY, approval_id.strip().lower())
+        return ApprovalRequest.from_dict(json.loads(data)) if data else None
+    
+    async def claim_interaction(self, interaction: discord.Interaction) -> bool:
+        """True if this replica should answer the interaction"""
+        try:
+            return bool(await self.redis.set(f"{INTERACTION_CLAIM_PREFIX}{interaction.id}", REPLICA_ID,
+                                             nx=True, ex=INTERACTION_CLAIM_SECONDS))
+        except aioredis.RedisError as e:
+            # Answering twice beats not answering; the approval claim still
+            # lets only one answer reach n8n
+            logger.error(f"Failed to claim interaction {interaction.id}: {e}")
+            return True
+    
+    def queue_discord_message(self, message: str):
+        """Queue a text message for the configured Discord channel"""
+        self._queue_outbound(OutboundMessage(content=message))
+    
+    def queue_discord_embed(self, embed: discord.Embed):
+        """Queue an embed for the configured Discord channel"""
+        self._queue_outbound(OutboundMessage(embed=embed))
+    
+    def queue_request_data(self, request_data: str, approval_id: str):
+        """Queue request data; the worker splits it into messages, or it goes as a file if very large"""
+        header = f"📋 **Request Details `{approval_id}`:**"
+        if len(request_data) > DISCORD_ATTACHMENT_THRESHOLD:
+            self._queue_outbound(OutboundMessage(
+                content=f"{header} attached ({len(request_data):,} characters)",
+                file=(f"request-{approval_id}.txt", request_data.encode('utf-8'))
+            ))
         else:
-            # Split into multiple numbered messages
-            header_template = "📋 **Request Details (Part {}):**\n"
-            remaining_data = request_data
-            part_number = 1
-            
-            while remaining_data:
-                # Calculate available space for this chunk
-                current_header = header_template.format(part_number)
-                available_space = MAX_LENGTH - len(current_header)
+            self._queue_outbound(OutboundMessage(content=f"{header}\n{request_data}"))
+    
+    def _queue_outbound(self, message: OutboundMessage):
+        try:
+            self.outbound_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.metrics.discord_messages['dropped'] += 1
+            logger.error(f"Outbound Discord queue is full ({self.outbound_queue.maxsize}), dropping message")
+    
+    async def resolve_channel(self) -> Optional[discord.abc.Messageable]:
+        """The configured channel, looked up once and cached"""
+        if self.channel is None:
+            if not self.channel_id:
+                logger.error("DISCORD_CHANNEL_ID not configured")
+                return None
+            try:
+                self.channel = self.get_channel(self.channel_id) or await self.fetch_channel(self.channel_id)
+            except discord.DiscordException as e:
+                logger.error(f"Channel {self.channel_id} not found: {e}")
+        return self.channel
+    
+    def rate_limiter(self, channel_id: int) -> ChannelRateLimiter:
+        if channel_id not in self.rate_limiters:
+            self.rate_limiters[channel_id] = ChannelRateLimiter(DISCORD_CHANNEL_RATE_LIMIT, DISCORD_CHANNEL_RATE_WINDOW)
+        return self.rate_limiters[channel_id]
+    
+    async def _outbound_worker(self):
+        """Send queued messages in order, coalesced and within the channel's rate limit"""
+        await self.wait_until_ready()
+        while True:
+            items = [await self.outbound_queue.get()]
+            try:
+                channel = await self.resolve_channel()
+                if channel is None:
+                    continue
+                limiter = self.rate_limiter(self.channel_id)
+                # Whatever queues up while we wait for the bucket is sent together
+                waited = await limiter.wait()
+                while not self.outbound_queue.empty():
+                    items.append(self.outbound_queue.get_nowait())
                 
-                if len(remaining_data) <= available_space:
-                    # Last chunk
-                    await self.send_discord_message(f"{current_header}{remaining_data}")
-                    break
-                else:
-                    # Find a good split point (try to split at newlines)
-                    split_point = available_space
-                    newline_pos = remaining_data.rfind('\n', 0, available_space)
-                    if newline_pos > available_space - 200:  # If newline is reasonably close
-                        split_point = newline_pos
-                    
-                    chunk = remaining_data[:split_point]
-                    await self.send_discord_message(f"{current_header}{chunk}")
-                    
-                    remaining_data = remaining_data[split_point:].lstrip('\n')
-                    part_number += 1
-    
-    async def send_webhook_response(self, webhook_url: str, approved: bool, feedback: str = None) -> bool:
-        """Send approval/rejection response to n8n webhook"""
+                for message in coalesce_messages(items):
+                    waited += await limiter.acquire()
+                    self.metrics.rate_limit_wait_seconds.observe(waited)
+                    waited = 0.0
+                    await self._send(channel, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in outbound Discord worker: {e}")
+            finally:
+                for _ in items:
+                    self.outbound_queue.task_done()
+    
+    async def _send(self, channel: discord.abc.Messageable, message: dict):
+        kwargs = dict(message)
+        if 'file' in kwargs:
+            filename, data = kwargs.pop('file')
+            kwargs['file'] = discord.File(io.BytesIO(data), filename=filename)
+        started = time.perf_counter()
+        try:
+            # discord.py also waits out any 429 Discord still returns
+            await channel.send(**kwargs)
+            self.metrics.discord_messages['sent'] += 1
+        except discord.HTTPException as e:
+            self.metrics.discord_messages['failed'] += 1
+            logger.error(f"Failed to send Discord message: {e}")
+        finally:
+            self.metrics.discord_send_seconds.observe(time.perf_counter() - started)
+    
+    async def queue_webhook_response(self, approval: ApprovalRequest, approved: bool, feedback: str = None) -> Optional[str]:
+        """
+        Replace the pending approval with its answer in the outbox, atomically.
+        Returns the outbox entry ID, or None if the approval was already
+        answered. The entry starts out leased, so the caller can make the
+        first delivery attempt itself.
+        """
+        # Start with the original request data
+        response_data = dict(approval.request_data)
+        
+        # Add approval response fields
+        response_data.update({
+            'approved': approved,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+        if feedback:
+            response_data['feedback'] = feedback
+        
+        entry_id = uuid.uuid4().hex
+        entry = {
+            'approval_id': approval.approval_id,
+            'resume_webhook': approval.resume_webhook,
+            'payload': response_data,
+            'attempts': 0,
+            'created_at': time.time()
+        }
+        claimed = await self.claim_approval_script(
+            keys=[APPROVALS_KEY, OUTBOX_ITEMS_KEY, OUTBOX_KEY],
+            args=[approval.approval_id, entry_id, json.dumps(entry), time.time() + WEBHOOK_LEASE_SECONDS]
+        )
+        return entry_id if claimed else None
+    
+    async def deliver_webhook_response(self, entry_id: str, leased: bool = False) -> bool:
+        """
+        Make one delivery attempt for an outbox entry. On failure the entry is
+        rescheduled with backoff, or moved to the dead letters when retrying
+        cannot help. Returns True once n8n has the response.
+        """
+        if not leased and not await self.lease_outbox_entry(
+                keys=[OUTBOX_KEY], args=[entry_id, time.time(), time.time() + WEBHOOK_LEASE_SECONDS]):
+            return False  # not due, or another attempt holds it
+        data = await self.redis.hget(OUTBOX_ITEMS_KEY, entry_id)
+        if data is None:
+            await self.redis.zrem(OUTBOX_KEY, entry_id)
+            return False
+        entry = json.loads(data)
+        entry['attempts'] += 1
+        
+        permanent = False
+        started = time.perf_counter()
         try:
             # Translate public URL to internal Docker network URL
-            internal_url = self.translate_to_internal_url(webhook_url)
-            logger.info(f"Translated webhook URL: {webhook_url} -> {internal_url}")
-            
-            # Start with the original request data
-            response_data = dict(self.current_approval.request_data)
-            
-            # Add approval response fields
-            response_data.update({
-                'approved': approved,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            if feedback:
-                response_data['feedback'] = feedback
+            internal_url = self.translate_to_internal_url(entry['resume_webhook'])
+            logger.info(f"Translated webhook URL: {entry['resume_webhook']} -> {internal_url}")
             
-            async with self.session.post(internal_url, json=response_data) as response:
+            async with self.session.post(internal_url, json=entry['payload']) as response:
+                self.metrics.webhook_seconds.observe(time.perf_counter() - started)
                 if response.status == 200:
-                    logger.info(f"Successfully sent response to webhook: {response_data}")
+                    self.metrics.webhook_attempts['delivered'] += 1
+                    logger.info(f"Successfully sent response to webhook: {entry['payload']}")
+                    async with self.redis.pipeline(transaction=True) as pipe:
+                        pipe.zrem(OUTBOX_KEY, entry_id)
+                        pipe.hdel(OUTBOX_ITEMS_KEY, entry_id)
+                        await pipe.execute()
+                    if entry['attempts'] > 1:
+                        self.queue_discord_message(
+                            f"📬 Response for `{entry['approval_id']}` delivered to n8n after {entry['attempts']} attempts"
+                        )
                     return True
-                else:
-                    logger.error(f"Failed to send webhook response: {response.status}")
-                    return False
+                entry['last_error'] = f"HTTP {response.status}: {(await response.text())[:200]}"
+                permanent = is_permanent_failure(response.status)
+                self.metrics.webhook_failures[f"http_{response.status}"] += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.metrics.webhook_seconds.observe(time.perf_counter() - started)
+            self.metrics.webhook_failures[type(e).__name__] += 1
+            entry['last_error'] = str(e) or type(e).__name__
         
-        except Exception as e:
-            logger.error(f"Error sending webhook response: {e}")
-            return False
+        logger.error(f"Failed to send webhook response for {entry['approval_id']} "
+                     f"(attempt {entry['attempts']}): {entry['last_error']}")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if permanent or entry['attempts'] >= WEBHOOK_MAX_ATTEMPTS:
+                pipe.zrem(OUTBOX_KEY, entry_id)
+                pipe.hdel(OUTBOX_ITEMS_KEY, entry_id)
+                pipe.hset(DEAD_LETTERS_KEY, entry_id, json.dumps(entry))
+                self.metrics.webhook_attempts['dead_lettered'] += 1
+                self.queue_discord_message(
+                    f"⚠️ Gave up sending the response for `{entry['approval_id']}` to n8n after "
+                    f"{entry['attempts']} attempt(s): {entry['last_error']}"
+                )
+            else:
+                pipe.hset(OUTBOX_ITEMS_KEY, entry_id, json.dumps(entry))
+                pipe.zadd(OUTBOX_KEY, {entry_id: time.time() + retry_delay(entry['attempts'])})
+                self.metrics.webhook_attempts['retry_scheduled'] += 1
+            await pipe.execute()
+        return False
+    
+    async def answer_approval(self, approval: ApprovalRequest, approved: bool, feedback: str = None) -> str:
+        """
+        Store the answer in the outbox and make the first delivery attempt.
+        Returns ANSWER_DELIVERED (n8n has it), ANSWER_RETRYING (it will be
+        retried), ANSWER_TAKEN (someone answered first) or ANSWER_NOT_STORED
+        (Redis failed; the approval is still pending).
+        """
+        try:
+            entry_id = await self.queue_webhook_response(approval, approved, feedback)
+        except aioredis.RedisError as e:
+            logger.error(f"Failed to store the answer for {approval.approval_id}: {e}")
+            self.metrics.decisions['not_stored'] += 1
+            return ANSWER_NOT_STORED
+        if entry_id is None:
+            self.metrics.decisions['already_answered'] += 1
+            return ANSWER_TAKEN
+        self.metrics.decisions['accepted' if approved else 'rejected'] += 1
+        self.metrics.decision_seconds.observe((datetime.now() - approval.timestamp).total_seconds())
+        try:
+            delivered = await self.deliver_webhook_response(entry_id, leased=True)
+        except aioredis.RedisError as e:
+            # The answer is stored; the outbox sender picks it up once its lease expires
+            logger.error(f"Failed to deliver the answer for {approval.approval_id}: {e}")
+            delivered = False
+        return ANSWER_DELIVERED if delivered else ANSWER_RETRYING
+    
+    async def _outbox_sender(self):
+        """Retry due outbox entries, including those left behind by a restart"""
+        while True:
+            try:
+                due = await self.redis.zrangebyscore(OUTBOX_KEY, '-inf', time.time(), start=0, num=20)
+                for entry_id in due:
+                    await self.deliver_webhook_response(entry_id)
+                if len(due) == 20:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in webhook outbox sender: {e}")
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
     
     async def on_ready(self):
         """Called when the bot is ready"""
@@ -275,130 +753,193 @@ class ApprovalBot(commands.Bot):
             description="Discord approval bot is online and ready!",
             color=discord.Color.green()
         )
-        await self.send_discord_embed(embed)
+        self.queue_discord_embed(embed)
     
     async def close(self):
         """Clean up resources when bot shuts down"""
+        for task in (self.outbound_task, self.outbox_task):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
         if self.session:
             await self.session.close()
+        if self.redis:
+            await self.redis.aclose()
         await super().close()
 
 # Create bot instance
 bot = ApprovalBot()
 
-@bot.tree.command(name="accept", description="Accept the pending approval request")
-async def accept_command(interaction: discord.Interaction):
-    """Accept the current approval request"""
-    async with bot.approval_lock:
-        if not bot.current_approval or not bot.current_approval.is_active:
-            embed = discord.Embed(
-                title="❌ No Active Request",
-                description="No active approval request to accept",
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            return
-        
-        # Mark as inactive and send response
-        bot.current_approval.is_active = False
-        webhook_url = bot.current_approval.resume_webhook
-        success = await bot.send_webhook_response(webhook_url, True)
-        
-        if success:
-            embed = discord.Embed(
-                title="✅ Request Accepted",
-                description="Request accepted! Response sent to n8n",
-                color=discord.Color.green()
-            )
-            embed.add_field(name="Accepted by", value=interaction.user.mention, inline=True)
-            embed.add_field(name="Timestamp", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
-        else:
-            embed = discord.Embed(
-                title="✅ Request Accepted",
-                description="Request accepted! ⚠️ Warning: Failed to send response to n8n",
-                color=discord.Color.yellow()
-            )
-        
-        await interaction.response.send_message(embed=embed)
-        bot.current_approval = None
-
-@bot.tree.command(name="reject", description="Reject the pending approval request with feedback")
-@app_commands.describe(reason="Reason for rejecting the request")
-async def reject_command(interaction: discord.Interaction, reason: str):
-    """Reject the current approval request with feedback"""
-    async with bot.approval_lock:
-        if not bot.current_approval or not bot.current_approval.is_active:
-            embed = discord.Embed(
-                title="❌ No Active Request",
-                description="No active approval request to reject",
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            return
-        
-        # Mark as inactive and send response with feedback
-        bot.current_approval.is_active = False
-        webhook_url = bot.current_approval.resume_webhook
-        success = await bot.send_webhook_response(webhook_url, False, reason)
-        
-        if success:
-            embed = discord.Embed(
-                title="❌ Request Rejected",
-                description="Request rejected! Feedback sent to n8n",
-                color=discord.Color.red()
-            )
-            embed.add_field(name="Rejected by", value=interaction.user.mention, inline=True)
-            embed.add_field(name="Timestamp", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
-            embed.add_field(name="Reason", value=reason, inline=False)
-        else:
-            embed = discord.Embed(
-                title="❌ Request Rejected",
-                description=f"Request rejected! ⚠️ Warning: Failed to send feedback to n8n.\nReason was: {reason}",
-                color=discord.Color.dark_red()
-            )
-        
-        await interaction.response.send_message(embed=embed)
-        bot.current_approval = None
+async def approval_id_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest pending approval IDs, matching on the ID or the description"""
+    current = current.strip().lower()
+    choices = []
+    try:
+        pending = await bot.pending_approvals()
+    except aioredis.RedisError as e:
+        logger.error(f"Failed to load pending approvals: {e}")
+        return choices
+    for approval in pending:
+        if current and current not in approval.approval_id and current not in approval.description.lower():
+            continue
+        label = f"{approval.approval_id} · {approval.description}"
+        choices.append(app_commands.Choice(name=label[:100], value=approval.approval_id))
+        if len(choices) == 25:  # Discord's limit
+            break
+    return choices
+
+def no_request_embed(approval_id: str, action: str) -> discord.Embed:
+    return discord.Embed(
+        title="❌ No Active Request",
+        description=f"No active approval request `{approval_id}` to {action}. Use `/status` to list pending requests",
+        color=discord.Color.red()
+    )
+
+def not_stored_embed(approval_id: str) -> discord.Embed:
+    return discord.Embed(
+        title="⚠️ Answer Not Saved",
+        description=f"Could not save the answer for `{approval_id}`; the request is still pending. Please try again",
+        color=discord.Color.yellow()
+    )
+
+def already_answered_embed(approval_id: str) -> discord.Embed:
+    return discord.Embed(
+        title="❌ Already Answered",
+        description=f"Approval request `{approval_id}` was answered by someone else in the meantime",
+        color=discord.Color.red()
+    )
+
+async def find_approval(interaction: discord.Interaction, approval_id: str, action: str) -> Optional[ApprovalRequest]:
+    """The pending approval to answer; otherwise responds to the interaction and returns None"""
+    try:
+        approval = await bot.get_approval(approval_id)
+    except aioredis.RedisError as e:
+        logger.error(f"Failed to load approval request {approval_id}: {e}")
+        await interaction.response.send_message(embed=not_stored_embed(approval_id), ephemeral=True)
+        return None
+    if approval is None:
+        await interaction.response.send_message(embed=no_request_embed(approval_id, action), ephemeral=True)
+    return approval
+
+@bot.tree.command(name="accept", description="Accept a pending approval request")
+@app_commands.describe(approval_id="ID of the approval request")
+@app_commands.autocomplete(approval_id=approval_id_autocomplete)
+async def accept_command(interaction: discord.Interaction, approval_id: str):
+    """Accept a pending approval request"""
+    approval = await find_approval(interaction, approval_id, "accept")
+    if approval is None:
+        return
+    
+    # The webhook call can outlast Discord's 3 second response deadline
+    await interaction.response.defer()
+    outcome = await bot.answer_approval(approval, True)
+    
+    if outcome == ANSWER_NOT_STORED:
+        await interaction.followup.send(embed=not_stored_embed(approval.approval_id))
+        return
+    if outcome == ANSWER_TAKEN:
+        await interaction.followup.send(embed=already_answered_embed(approval.approval_id))
+        return
+    if outcome == ANSWER_DELIVERED:
+        embed = discord.Embed(
+            title=f"✅ Request `{approval.approval_id}` Accepted",
+            description="Request accepted! Response sent to n8n",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Accepted by", value=interaction.user.mention, inline=True)
+        embed.add_field(name="Timestamp", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
+    else:
+        embed = discord.Embed(
+            title=f"✅ Request `{approval.approval_id}` Accepted",
+            description="Request accepted! ⚠️ n8n did not take the response yet; it will be retried in the background",
+            color=discord.Color.yellow()
+        )
+    
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="reject", description="Reject a pending approval request with feedback")
+@app_commands.describe(approval_id="ID of the approval request", reason="Reason for rejecting the request")
+@app_commands.autocomplete(approval_id=approval_id_autocomplete)
+async def reject_command(interaction: discord.Interaction, approval_id: str, reason: str):
+    """Reject a pending approval request with feedback"""
+    approval = await find_approval(interaction, approval_id, "reject")
+    if approval is None:
+        return
+    
+    # The webhook call can outlast Discord's 3 second response deadline
+    await interaction.response.defer()
+    outcome = await bot.answer_approval(approval, False, reason)
+    
+    if outcome == ANSWER_NOT_STORED:
+        await interaction.followup.send(embed=not_stored_embed(approval.approval_id))
+        return
+    if outcome == ANSWER_TAKEN:
+        await interaction.followup.send(embed=already_answered_embed(approval.approval_id))
+        return
+    if outcome == ANSWER_DELIVERED:
+        embed = discord.Embed(
+            title=f"❌ Request `{approval.approval_id}` Rejected",
+            description="Request rejected! Feedback sent to n8n",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="Rejected by", value=interaction.user.mention, inline=True)
+        embed.add_field(name="Timestamp", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
+        embed.add_field(name="Reason", value=reason, inline=False)
+    else:
+        embed = discord.Embed(
+            title=f"❌ Request `{approval.approval_id}` Rejected",
+            description=f"Request rejected! ⚠️ n8n did not take the feedback yet; it will be retried in the background.\nReason was: {reason}",
+            color=discord.Color.dark_red()
+        )
+    
+    await interaction.followup.send(embed=embed)
 
 @bot.tree.command(name="status", description="Check the status of pending approval requests")
 async def status_command(interaction: discord.Interaction):
     """Show status of pending approval requests"""
-    async with bot.approval_lock:
-        if bot.current_approval and bot.current_approval.is_active:
-            embed = discord.Embed(
-                title="📋 Active Approval Request",
-                description="There is currently an active approval request",
-                color=discord.Color.blue()
-            )
-            embed.add_field(
-                name="Started", 
-                value=bot.current_approval.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC'), 
-                inline=True
-            )
-            embed.add_field(
-                name="Webhook", 
-                value=f"```{bot.current_approval.resume_webhook[:50]}{'...' if len(bot.current_approval.resume_webhook) > 50 else ''}```", 
-                inline=False
-            )
-            embed.add_field(
-                name="Available Actions", 
-                value="Use `/accept` or `/reject <reason>` to respond", 
-                inline=False
-            )
-            
-            if bot.current_approval.request_data:
-                request_content = bot.current_approval.request_data.get('request-content', {})
-                if request_content:
-                    content_text = json.dumps(request_content, indent=2)
-                    if len(content_text) > 1024:
-                        content_text = content_text[:1021] + "..."
-                    embed.add_field(name="Request Details", value=f"```json\n{content_text}\n```", inline=False)
-        else:
-            embed = discord.Embed(
-                title="📋 No Active Requests",
-                description="No pending approval requests at this time",
-                color=discord.Color.green()
-            )
+    try:
+        pending = await bot.pending_approvals()
+    except aioredis.RedisError as e:
+        logger.error(f"Failed to load pending approvals: {e}")
+        embed = discord.Embed(
+            title="⚠️ Status Unavailable",
+            description="Could not load the pending approval requests. Please try again",
+            color=discord.Color.yellow()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    if pending:
+        embed = discord.Embed(
+            title="📋 Active Approval Requests",
+            description=f"There {'is' if len(pending) == 1 else 'are'} currently {len(pending)} active approval request{'s' if len(pending) != 1 else ''}",
+            color=discord.Color.blue()
+        )
+        # Embeds are limited to 25 fields and 6000 characters
+        shown = pending[:10]
+        for approval in shown:
+            details = f"Started {approval.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            request_content = approval.request_data.get('request-content', {})
+            if request_content:
+                content_text = json.dumps(request_content)
+                if len(content_text) > 200:
+                    content_text = content_text[:197] + "..."
+                details += f"\n```json\n{content_text}\n```"
+            description = approval.description if len(approval.description) <= 200 else approval.description[:197] + "..."
+            embed.add_field(name=f"`{approval.approval_id}` {description}", value=details, inline=False)
+        if len(pending) > len(shown):
+            embed.add_field(name="More", value=f"...and {len(pending) - len(shown)} more", inline=False)
+        embed.add_field(
+            name="Available Actions", 
+            value="Use `/accept <id>` or `/reject <id> <reason>` to respond", 
+            inline=False
+        )
+    else:
+        embed = discord.Embed(
+            title="📋 No Active Requests",
+            description="No pending approval requests at this time",
+            color=discord.Color.green()
+        )
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -5,7 +5,9 @@ import {
   sendChatRequest,
   webhookResponseToChatMessage,
   getChatSessions,
-  restoreConversation
+  restoreConversation,
+  loadOlderMessages,
+  CHAT_SESSIONS_PAGE_SIZE
 } from '@/data/api/chatApi';
 import { ChatMessage, ChatSession } from '@/types/chat';
 
@@ -20,7 +22,10 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
   void apiEndpoint; // Explicitly mark as unused
   const [currentView, setCurrentView] = useState<'history' | 'interface'>('history');
   const [sessions, setSessions] = useState<ChatSession[]>([]);
+  const [hasMoreSessions, setHasMoreSessions] = useState(false);
   const [messages, setMessages] = useState<ChatMessage[]>([]);
+  // Offset to load older restored messages from; null when there are none
+  const [olderMessagesBefore, setOlderMessagesBefore] = useState<number | null>(null);
   const [isLoading, setIsLoading] = useState(false);
   const [isRestoring, setIsRestoring] = useState(false);
   const [currentConversationId, setCurrentConversationId] = useState<string | null>(null);
@@ -33,6 +38,7 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
       try {
         const chatSessions = await getChatSessions();
         setSessions(chatSessions);
+        setHasMoreSessions(chatSessions.length === CHAT_SESSIONS_PAGE_SIZE);
       } catch (error) {
         console.error('Error loading chat sessions:', error);
         // Continue with empty sessions if API fails
@@ -42,9 +48,22 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
     loadSessions();
   }, []);
 
+  const handleLoadOlderSessions = async () => {
+    const oldest = sessions[sessions.length - 1];
+    if (!oldest) return;
+    try {
+      const olderSessions = await getChatSessions(oldest.sessionId);
+      setSessions((current) => [...current, ...olderSessions]);
+      setHasMoreSessions(olderSessions.length === CHAT_SESSIONS_PAGE_SIZE);
+    } catch (error) {
+      console.error('Error loading older chat sessions:', error);
+    }
+  };
+
   const handleNewChat = async () => {
     setCurrentView('interface');
     setMessages([]);
+    setOlderMessagesBefore(null);
     setCurrentConversationId(null);
     setSessionId(null);
     setResumeUrl(null);
@@ -75,6 +94,7 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
   const handleSelectConversation = async (sessionId: string) => {
     setCurrentView('interface');
     setMessages([]);
+    setOlderMessagesBefore(null);
     setCurrentConversationId(sessionId);
     setSessionId(sessionId);
     setResumeUrl(null);
@@ -86,6 +106,7 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
       
       // Set the restored messages
       setMessages(restoredData.messages);
+      setOlderMessagesBefore(restoredData.hasMore ? restoredData.oldestOffset : null);
       
       // Don't initialize the chat session yet - wait for user to send a message
       // This prevents the 500 error since we don't have a resumeUrl yet
@@ -98,6 +119,17 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
     }
   };
 
+  const handleLoadOlderMessages = async () => {
+    if (!sessionId || olderMessagesBefore === null) return;
+    try {
+      const olderData = await loadOlderMessages(sessionId, olderMessagesBefore);
+      setMessages((prev: ChatMessage[]) => [...olderData.messages, ...prev]);
+      setOlderMessagesBefore(olderData.hasMore ? olderData.oldestOffset : null);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    }
+  };
+
   const handleBackToHistory = () => {
     setCurrentView('history');
     setSessionId(null);
@@ -177,6 +209,8 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
         <ChatHistoryView
           conversations={undefined}
           sessions={sessions}
+          hasMoreSessions={hasMoreSessions}
+          onLoadOlderSessions={handleLoadOlderSessions}
           onNewChat={handleNewChat}
           onSelectConversation={handleSelectConversation}
           title={title}
@@ -185,6 +219,8 @@ export const Chat = ({ title, apiEndpoint, className }: ChatProps) => {
         <ChatInterfaceView
           conversationId={currentConversationId}
           messages={messages}
+          hasOlderMessages={olderMessagesBefore !== null}
+          onLoadOlderMessages={handleLoadOlderMessages}
           isLoading={isLoading || isRestoring}
           onSendMessage={handleSendMessage}
           onBack={handleBackToHistory}
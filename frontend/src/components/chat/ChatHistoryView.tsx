@@ -6,6 +6,8 @@ import { ChatConversation, ChatSession } from '@/types/chat';
 interface ChatHistoryViewProps {
   conversations?: ChatConversation[];
   sessions?: ChatSession[];
+  hasMoreSessions?: boolean;
+  onLoadOlderSessions?: () => void;
   onNewChat: () => void;
   onSelectConversation?: (id: string) => void;
   title?: string;
@@ -14,6 +16,8 @@ interface ChatHistoryViewProps {
 export const ChatHistoryView = ({
   conversations,
   sessions,
+  hasMoreSessions,
+  onLoadOlderSessions,
   onNewChat,
   onSelectConversation,
   title
@@ -55,6 +59,16 @@ export const ChatHistoryView = ({
             />
           ))
         )}
+
+        {/* LOAD OLDER SESSIONS */}
+        {hasSessions && hasMoreSessions && onLoadOlderSessions && (
+          <button
+            className="glass-card w-full p-4 rounded-xl glass-hover-level-1 text-glass-muted"
+            onClick={onLoadOlderSessions}
+          >
+            Load older conversations
+          </button>
+        )}
       </div>
     </div>
   );
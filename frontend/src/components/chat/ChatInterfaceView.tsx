@@ -11,6 +11,8 @@ import { ChatMessage } from '@/types/chat';
 interface ChatInterfaceViewProps {
   conversationId: string | null;
   messages: ChatMessage[];
+  hasOlderMessages?: boolean;
+  onLoadOlderMessages?: () => void;
   isLoading: boolean;
   onSendMessage: (message: string) => void;
   onBack: () => void; // Return to history view
@@ -18,6 +20,8 @@ interface ChatInterfaceViewProps {
 
 export const ChatInterfaceView = ({
   messages,
+  hasOlderMessages,
+  onLoadOlderMessages,
   isLoading,
   onSendMessage,
   onBack
@@ -48,6 +52,8 @@ export const ChatInterfaceView = ({
         <ChatMessageFeed
           ref={messageFeedRef}
           messages={messages}
+          hasOlderMessages={hasOlderMessages}
+          onLoadOlderMessages={onLoadOlderMessages}
           isLoading={isLoading}
         />
       </div>
@@ -6,22 +6,26 @@ import { Loader2 } from 'lucide-react';
 
 interface ChatMessageFeedProps {
   messages: ChatMessageType[];
+  hasOlderMessages?: boolean;
+  onLoadOlderMessages?: () => void;
   isLoading: boolean;
 }
 
 export const ChatMessageFeed = forwardRef<
   { scrollToBottom: () => void },
   ChatMessageFeedProps
->(({ messages, isLoading }, ref) => {
+>(({ messages, hasOlderMessages, onLoadOlderMessages, isLoading }, ref) => {
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
+  // Only follow new messages at the bottom; prepending older ones keeps the position
+  const newestMessageId = messages.length > 0 ? messages[messages.length - 1].id : null;
   useEffect(() => {
     scrollToBottom();
-  }, [messages]);
+  }, [newestMessageId]);
 
   useImperativeHandle(ref, () => ({
     scrollToBottom
@@ -30,6 +34,14 @@ export const ChatMessageFeed = forwardRef<
   return (
     <ScrollArea className="h-full">
       <div className="space-y-4 p-4">
+        {hasOlderMessages && onLoadOlderMessages && (
+          <button
+            className="glass-card w-full p-2 rounded-xl glass-hover-level-1 text-sm text-glass-muted"
+            onClick={onLoadOlderMessages}
+          >
+            Load older messages
+          </button>
+        )}
         {messages.length === 0 ? (
           <div className="flex items-center justify-center h-64">
             <p className="text-glass-muted">Agent is waking up...</p>
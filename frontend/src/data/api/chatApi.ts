@@ -127,11 +127,21 @@ export const sendMessage = async (
   // return response.json();
 };
 
+export const CHAT_SESSIONS_PAGE_SIZE = 50;
+
 /**
- * Get all chat sessions with their descriptions and metadata
+ * Get a page of chat sessions with their descriptions and metadata, newest first.
+ * Pass the sessionId of the last loaded session as `before` to load older sessions.
  */
-export const getChatSessions = async (): Promise<ChatSession[]> => {
-  const response = await fetch('/api/chat/sessions', {
+export const getChatSessions = async (
+  before?: string,
+  limit: number = CHAT_SESSIONS_PAGE_SIZE
+): Promise<ChatSession[]> => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (before) {
+    params.set('before', before);
+  }
+  const response = await fetch(`/api/chat/sessions?${params.toString()}`, {
     method: 'GET',
     headers: {
       'Content-Type': 'application/json',
@@ -145,23 +155,52 @@ export const getChatSessions = async (): Promise<ChatSession[]> => {
   return response.json();
 };
 
+export const CHAT_MESSAGES_PAGE_SIZE = 50;
+
 /**
- * Restore a conversation by fetching all messages for a session
+ * Restore a conversation by fetching its most recent messages
  */
 export const restoreConversation = async (
-  sessionId: string
+  sessionId: string,
+  limit: number = CHAT_MESSAGES_PAGE_SIZE
 ): Promise<RestoreConversationResponse> => {
   const response = await fetch('/api/chat/restore', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
     },
-    body: JSON.stringify({ sessionId }),
+    body: JSON.stringify({ sessionId, limit }),
   });
 
   if (!response.ok) {
     throw new Error(`Failed to restore conversation: ${response.statusText}`);
   }
 
+  return response.json();
+};
+
+/**
+ * Load the messages of a conversation that precede `before` (the oldestOffset of the last page)
+ */
+export const loadOlderMessages = async (
+  sessionId: string,
+  before: number,
+  limit: number = CHAT_MESSAGES_PAGE_SIZE
+): Promise<RestoreConversationResponse> => {
+  const params = new URLSearchParams({ before: String(before), limit: String(limit) });
+  const response = await fetch(
+    `/api/chat/messages/${encodeURIComponent(sessionId)}?${params.toString()}`,
+    {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    }
+  );
+
+  if (!response.ok) {
+    throw new Error(`Failed to load older messages: ${response.statusText}`);
+  }
+
   return response.json();
 };
\ No newline at end of file
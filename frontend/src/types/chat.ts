@@ -55,6 +55,7 @@ export type ChatSession = {
   lastMessage: string;
   messageCount: number;
   timestamp: string;
+  lastActivity?: string | null;
 };
 
 export type RestoreConversationRequest = {
@@ -64,4 +65,7 @@ export type RestoreConversationRequest = {
 export type RestoreConversationResponse = {
   messages: ChatMessage[];
   sessionId: string;
+  totalMessages: number;
+  oldestOffset: number; // pass as `before` to load the previous page
+  hasMore: boolean;
 };
\ No newline at end of file